@@ -0,0 +1,76 @@
+"""
+Анимация N entity: кадры переключает Lua в on_update через handle:set_frame против
+AnimationEngine с готовыми Timeline (один проход на тик).
+
+Запуск из корня репозитория: python -m benchmarks.bench_animation
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.animation import AnimationEngine
+from src.core.entity_registry import entity_registry
+from src.core.entity_store import entity_store
+from src.core.logger import logger
+from src.lua.loader import LoaderLua
+from src.resource.models.animation import ModelAnimationClip
+from src.resource.models.entity import ModelEntity
+
+TICKS = 120
+DELTA_TIME = 1 / 60
+CLIP = ModelAnimationClip(frames=list(range(8)), fps=12, mode="loop", events={4: "step"})
+
+LUA_ANIMATOR = '''
+local handles, elapsed = {}, 0
+function setup(ids)
+    for i, id in ipairs(ids) do handles[i] = entities.handle(id) end
+end
+-- То же, что делает клип: 8 кадров по 1/12 с
+function on_update(dt)
+    elapsed = elapsed + dt
+    local frame = math.floor(elapsed * 12) % 8
+    for i = 1, #handles do handles[i]:set_frame(frame) end
+end
+'''
+
+
+def make(count: int):
+    # Lua API работает с глобальными реестром и хранилищем
+    entity_registry.clear()
+    entity_store.clear()
+    entity_store.configure("auto")
+    for i in range(count):
+        entity_registry.register(ModelEntity(id=f"e{i}", content_pack_id="bench", animations={"walk": CLIP}))
+        entity_store.spawn(f"bench.e{i}")
+
+
+def tick_ms(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        fn()
+    return (time.perf_counter() - start) / TICKS * 1000
+
+
+def main():
+    logger.remove()
+    print(f"{'entities':>9} {'lua on_update ms':>17} {'engine ms':>10} {'frame changes/tick':>19}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "animator.lua").write_text(LUA_ANIMATOR, encoding="utf-8")
+        for count in (100, 1000, 10000):
+            make(count)
+            ids = [f"bench.e{i}" for i in range(count)]
+            script = LoaderLua().scan_content_pack_scripts(root, "bench")["animator"]
+            script["env"].setup(script["sandbox"].runtime.table_from(ids))
+            lua = tick_ms(lambda: script["env"].on_update(DELTA_TIME))
+
+            engine = AnimationEngine()
+            for qualified_id in ids:
+                engine.play(qualified_id, "walk")
+            changes = []
+            engine_ms = tick_ms(lambda: changes.append(engine.update(DELTA_TIME)))
+            print(f"{count:>9} {lua:>17.2f} {engine_ms:>10.2f} {sum(changes) / len(changes):>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Стоимость вызова Python API из Lua: прямая привязка, счётчики, трассировка с выборкой.
+
+Запуск из корня репозитория: python -m benchmarks.bench_api_bridge
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.settings import settings
+from src.lua.bridge import get_api_stats, reset_api_stats
+from src.lua.loader import LoaderLua
+from src.lua.modules import LUA_FUNCTIONS
+
+CALLS = 100_000
+
+MODES = {
+    "direct": dict(lua_api_stats=False, lua_api_trace={}),
+    "stats": dict(lua_api_stats=True, lua_api_trace={}),
+    "trace 1/1000": dict(lua_api_stats=False, lua_api_trace={"bench_noop": 1000}),
+    "trace 1/1": dict(lua_api_stats=False, lua_api_trace={"bench_noop": 1}),
+}
+
+
+def main():
+    LUA_FUNCTIONS["bench_noop"] = lambda *args: None
+    logger.remove()
+
+    print(f"{CALLS} calls of bench_noop() from Lua")
+    print(f"{'mode':>14} {'ns/call':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "bench.lua").write_text(
+            "function run(n) for i = 1, n do bench_noop(i) end end\n", encoding="utf-8"
+        )
+        for mode, overrides in MODES.items():
+            settings.update_settings(**overrides)
+            reset_api_stats()
+            script = LoaderLua().scan_content_pack_scripts(root)["bench"]
+            start = time.perf_counter_ns()
+            script["env"].run(CALLS)
+            elapsed = time.perf_counter_ns() - start
+            print(f"{mode:>14} {elapsed / CALLS:>9.0f}")
+            if overrides["lua_api_stats"]:
+                print(f"{'':>14} get_api_stats: {get_api_stats()['bench_noop']}")
+
+
+if __name__ == "__main__":
+    main()
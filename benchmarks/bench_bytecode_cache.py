@@ -0,0 +1,66 @@
+"""
+Время загрузки большого синтетического пака без кэша байткода, с холодным и с тёплым кэшем.
+
+Запуск из корня репозитория: python -m benchmarks.bench_bytecode_cache
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.settings import settings
+from src.lua.bytecode_cache import BytecodeCache
+from src.lua.loader import LoaderLua
+
+SCRIPTS = 200
+FUNCTIONS_PER_SCRIPT = 150
+MODULES = 20
+
+
+def make_pack(root: Path):
+    body = "\n".join(
+        f"function f{j}(a, b)\n"
+        f"    local t = {{}}\n"
+        f"    for i = 1, a do t[#t + 1] = (i * {j} + b) % 7 end\n"
+        f"    return t\n"
+        f"end"
+        for j in range(FUNCTIONS_PER_SCRIPT)
+    )
+    (root / "lib").mkdir()
+    for i in range(MODULES):
+        (root / "lib" / f"m{i}.lua").write_text(f"{body}\nreturn {{id = {i}}}\n", encoding="utf-8")
+    for i in range(SCRIPTS):
+        (root / f"s{i}.lua").write_text(
+            f"local m = require('lib.m{i % MODULES}')\n{body}\nfunction on_update(dt) end\n",
+            encoding="utf-8"
+        )
+
+
+def run(root: Path, mode: str, cache: bool, cache_dir: Path) -> float:
+    LoaderLua._shared_sandboxes.clear()
+    BytecodeCache._instances.clear()
+    settings.update_settings(lua_runtime_mode=mode, lua_bytecode_cache=cache, lua_cache_directory=str(cache_dir),
+                             lua_cache_key_file=str(cache_dir.parent / "lua_cache.key"))
+    start = time.perf_counter()
+    LoaderLua().scan_content_pack_scripts(root)
+    return time.perf_counter() - start
+
+
+def main():
+    logger.disable("src")
+    print(f"{SCRIPTS} scripts + {MODULES} modules, {FUNCTIONS_PER_SCRIPT} functions each")
+    print(f"{'mode':>10} {'no cache ms':>12} {'cold ms':>9} {'warm ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "pack"
+        root.mkdir()
+        make_pack(root)
+        for mode in LoaderLua.RUNTIME_MODES:
+            cache_dir = Path(tmp) / f"cache_{mode}"
+            plain = run(root, mode, False, cache_dir)
+            cold = run(root, mode, True, cache_dir)
+            warm = run(root, mode, True, cache_dir)
+            print(f"{mode:>10} {plain * 1000:>12.1f} {cold * 1000:>9.1f} {warm * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
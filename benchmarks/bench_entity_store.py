@@ -0,0 +1,91 @@
+"""
+Память и время тика на 10k entity: объекты ModelEntity против колонок EntityStore
+(numpy и array), с пространственным индексом и без; с индексом - и с запросом к нему каждый тик.
+
+Запуск из корня репозитория: python -m benchmarks.bench_entity_store
+"""
+import random
+import time
+import tracemalloc
+
+from src.core.entity_registry import EntityRegistry
+from src.core.entity_store import EntityStore, load_numpy
+from src.core.logger import logger
+from src.resource.models.entity import ModelEntity
+
+ENTITIES = 10_000
+TICKS = 200
+DELTA_TIME = 1 / 60
+
+
+def allocated(factory):
+    tracemalloc.start()
+    result = factory()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def make_models():
+    return [ModelEntity(id=f"e{i}", position=[str(i % 1920), str(i % 1080)], size=["64", "64"],
+                        content_pack_id="bench") for i in range(ENTITIES)]
+
+
+def model_tick(models, velocities):
+    # То же движение на моделях: разбор строк и запись обратно
+    for model, (vx, vy) in zip(models, velocities):
+        x = min(max(float(model.position[0]) + vx * DELTA_TIME, 0.0), 1920 - 64)
+        y = min(max(float(model.position[1]) + vy * DELTA_TIME, 0.0), 1080 - 64)
+        model.position = [str(x), str(y)]
+
+
+def make_store(backend: str, registry=None):
+    rng = random.Random(1)
+    store = EntityStore(backend=backend, registry=registry, capacity=ENTITIES)
+    store.bounds = (0.0, 0.0, 1920.0, 1080.0)
+    for i in range(ENTITIES):
+        store.spawn(f"bench.e{i}", rng.uniform(0, 1800), rng.uniform(0, 1000), 64, 64,
+                    rng.uniform(-200, 200), rng.uniform(-200, 200))
+    return store
+
+
+def tick_time_us(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        fn()
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+def main():
+    logger.disable("src")
+    print(f"{ENTITIES} entities, {TICKS} ticks")
+    print(f"{'variant':<22} {'memory KB':>10} {'tick us':>10}")
+
+    models, size = allocated(make_models)
+    rng = random.Random(1)
+    velocities = [(rng.uniform(-200, 200), rng.uniform(-200, 200)) for _ in models]
+    print(f"{'ModelEntity':<22} {size / 1024:>10.0f} {tick_time_us(lambda: model_tick(models, velocities)):>10.0f}")
+
+    numpy = load_numpy()
+    backends = ["array"] + (["numpy"] if numpy is not None else [])
+    for backend in backends:
+        store, size = allocated(lambda: make_store(backend))
+        print(f"{'store ' + backend:<22} {size / 1024:>10.0f} {tick_time_us(lambda: store.update(DELTA_TIME)):>10.0f}")
+
+        registry = EntityRegistry()
+        synced = make_store(backend, registry)
+        for handle in synced.handles:
+            entity = ModelEntity(id=handle.id.split(".", 1)[1], content_pack_id="bench",
+                                 position=[str(handle.x), str(handle.y)], size=["64", "64"])
+            registry.register(entity)
+        print(f"{'store ' + backend + ' + grid':<22} {'':>10} "
+              f"{tick_time_us(lambda: synced.update(DELTA_TIME)):>10.0f}")
+        # Индекс синхронизируется лениво: запрос каждый тик платит за перенос позиций
+        print(f"{'  + query every tick':<22} {'':>10} "
+              f"{tick_time_us(lambda: (synced.update(DELTA_TIME), registry.at_point(960, 540))):>10.0f}")
+    if numpy is None:
+        print("numpy is not installed, numpy backend skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Стоимость LuaManager.execute_all в зависимости от числа глобалов и реализаций хука.
+
+Запуск из корня репозитория: python -m benchmarks.bench_hook_dispatch
+"""
+import tempfile
+import timeit
+from pathlib import Path
+
+from src.core.logger import logger
+from src.lua.loader import LoaderLua
+from src.lua.manager import LuaManager
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.resources import ModelResources
+
+SCRIPTS = 100
+ITERATIONS = 200
+
+
+def make_pack(root: Path, implementers: int, globals_per_script: int) -> ModelResources:
+    for i in range(SCRIPTS):
+        lines = [f"function helper_{j}() return {j} end" for j in range(globals_per_script)]
+        if i < implementers:
+            lines.append("function on_update(dt) end")
+        (root / f"s{i}.lua").write_text("\n".join(lines), encoding="utf-8")
+
+    scripts = LoaderLua().scan_content_pack_scripts(root)
+    return ModelResources(content_packs={"bench": ModelContentPack(id="bench", path=root, scripts=scripts)})
+
+
+def run(implementers: int, globals_per_script: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = LuaManager(make_pack(Path(tmp), implementers, globals_per_script))
+        total = timeit.timeit(lambda: manager.execute_all("on_update", 0.016), number=ITERATIONS)
+    return total / ITERATIONS * 1e6
+
+
+def main():
+    logger.disable("src")
+    print(f"{SCRIPTS} scripts, {ITERATIONS} ticks")
+    print(f"{'implementers':>12} {'globals/script':>15} {'us/tick':>10}")
+    for implementers in (1, 10, 100):
+        for globals_per_script in (0, 50, 500):
+            us = run(implementers, globals_per_script)
+            print(f"{implementers:>12} {globals_per_script:>15} {us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
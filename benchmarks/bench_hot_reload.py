@@ -0,0 +1,61 @@
+"""
+Задержка горячей перезагрузки одного изменённого скрипта в зависимости от числа паков.
+
+Запуск из корня репозитория: python -m benchmarks.bench_hot_reload
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.lua.manager import LuaManager
+from src.resource.hot_reload import HotReloader
+from src.resource.loader import Loader
+
+SCRIPTS_PER_PACK = 3
+RELOADS = 20
+
+
+def make_packs(root: Path, packs: int):
+    for p in range(packs):
+        pack = root / f"pack{p}"
+        (pack / "lib").mkdir(parents=True)
+        (pack / "info.yaml").write_text(f"id: pack{p}\n", encoding="utf-8")
+        (pack / "pet.yaml").write_text("id: pet\nname: Pet\n", encoding="utf-8")
+        (pack / "lib" / "util.lua").write_text("return {speed = 1}\n", encoding="utf-8")
+        for s in range(SCRIPTS_PER_PACK):
+            (pack / f"s{s}.lua").write_text(
+                "local util = require('lib.util')\nfunction on_update(dt) end\n", encoding="utf-8"
+            )
+
+
+def run(packs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_packs(root, packs)
+        resources = Loader().scan([root])
+        reloader = HotReloader(resources, LuaManager(resources))
+
+        script = root / "pack0" / "s0.lua"
+        module = root / "pack0" / "lib" / "util.lua"
+        entity = root / "pack0" / "pet.yaml"
+        results = []
+        for path in (script, module, entity):
+            start = time.perf_counter()
+            for _ in range(RELOADS):
+                reloader.reload_paths([path])
+            results.append((time.perf_counter() - start) / RELOADS * 1000)
+        return results
+
+
+def main():
+    logger.disable("src")
+    print(f"{SCRIPTS_PER_PACK} scripts requiring lib.util per pack")
+    print(f"{'packs':>6} {'script ms':>10} {'module ms':>10} {'entity ms':>10}")
+    for packs in (10, 50, 200):
+        script_ms, module_ms, entity_ms = run(packs)
+        print(f"{packs:>6} {script_ms:>10.2f} {module_ms:>10.2f} {entity_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
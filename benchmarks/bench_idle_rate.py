@@ -0,0 +1,57 @@
+"""
+Пробуждения в секунду и загрузка CPU GlobalTimer в активном режиме и в простое,
+плюс стоимость тика при множестве подписчиков с собственной частотой (TimerWheel).
+
+Запуск из корня репозитория: python -m benchmarks.bench_idle_rate
+"""
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from src.core.global_timer import GlobalTimer
+
+SECONDS = 3
+RATED_SUBSCRIBERS = 1000
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def global_update(self, delta_time):
+        self.calls += 1
+
+
+def measure(label: str):
+    GlobalTimer.reset_stats()
+    loop = QEventLoop()
+    QTimer.singleShot(SECONDS * 1000, loop.quit)
+    loop.exec()
+    stats = GlobalTimer.get_stats()
+    print(f"{label:>8} {stats['wakeups_per_second']:>12.1f} {stats['cpu_percent']:>8.2f} {stats['mean_ms']:>10.4f}")
+
+
+def main():
+    # Экземпляр удерживает сам Qt (QCoreApplication.instance())
+    QCoreApplication([])
+    # Простой только по явной причине, чтобы замер активного режима не ушёл в inactive
+    GlobalTimer(ticks_per_second=60, idle=True, idle_ticks_per_second=2, idle_timeout=3600)
+
+    every_tick = Counter()
+    GlobalTimer.subscribe(every_tick)
+    rated = [Counter() for _ in range(RATED_SUBSCRIBERS)]
+    for index, counter in enumerate(rated):
+        GlobalTimer.subscribe(counter, rate=(1, 5, 10)[index % 3])
+
+    print(f"1 subscriber every tick, {RATED_SUBSCRIBERS} at 1/5/10 Hz, {SECONDS} s per mode")
+    print(f"{'mode':>8} {'wakeups/s':>12} {'cpu %':>8} {'tick ms':>10}")
+    measure("active")
+    GlobalTimer.set_idle_reason("paused", True)
+    measure("idle")
+    GlobalTimer.set_idle_reason("paused", False)
+
+    calls = sum(counter.calls for counter in rated)
+    print(f"rated subscriber calls: {calls} (each tick would be {every_tick.calls * RATED_SUBSCRIBERS})")
+    GlobalTimer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Время запуска и память процесса при eager и lazy загрузке 100 паков, из которых
+активен один.
+
+Запуск из корня репозитория: python -m benchmarks.bench_lazy_packs
+"""
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PACKS = 100
+SCRIPTS_PER_PACK = 5
+
+CHILD = """
+import resource, sys, time
+from pathlib import Path
+from src.core.logger import logger
+logger.disable("src")
+from src.core.models.m_settings import ModelSettings
+from src.resource.loader import Loader
+config = ModelSettings(content_pack_loading=sys.argv[2], content_packs_active=["pack0"],
+                       lua_bytecode_cache=False, manifest_cache=False)
+start = time.perf_counter()
+resources = Loader(config).scan([Path(sys.argv[1])])
+print((time.perf_counter() - start) * 1000, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def make_packs(root: Path):
+    for p in range(PACKS):
+        pack = root / f"pack{p:03}"
+        pack.mkdir()
+        (pack / "info.yaml").write_text(f"id: pack{p}\n", encoding="utf-8")
+        (pack / "pet.yaml").write_text("id: pet\nname: Pet\n", encoding="utf-8")
+        for s in range(SCRIPTS_PER_PACK):
+            (pack / f"s{s}.lua").write_text(
+                "data = {}\nfor i = 1, 1000 do data[i] = i end\nfunction on_update(dt) end\n", encoding="utf-8"
+            )
+
+
+def main():
+    print(f"{PACKS} packs, {SCRIPTS_PER_PACK} scripts each, 1 active")
+    print(f"{'mode':>6} {'startup ms':>12} {'max RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        make_packs(Path(tmp))
+        for mode in ("eager", "lazy"):
+            # Отдельный процесс на режим, чтобы RSS не смешивался
+            output = subprocess.run([sys.executable, "-c", CHILD, tmp, mode], capture_output=True, text=True,
+                                    check=True).stdout.split()
+            ms, rss_kb = float(output[-2]), int(output[-1])
+            print(f"{mode:>6} {ms:>12.1f} {rss_kb / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Стоимость одного вызова print из скрипта, который пишет каждый тик: профиль dev (как
+прежний lua_print - logger.info на каждый вызов) против production и ScriptLog, где
+повторы, лишние по лимиту строки и уровни ниже обработчиков отбрасываются до форматирования.
+
+Запуск из корня репозитория: python -m benchmarks.bench_logging
+"""
+import os
+import sys
+import tempfile
+import time
+
+from src.core.logger import logger, logger_setup
+from src.core.models.m_settings import ModelSettings
+from src.core.script_log import ScriptLog
+
+CALLS = 50000
+ARGS = ("gay", "bro", "cal")
+
+
+def per_call_ns(fn) -> float:
+    start = time.perf_counter_ns()
+    for i in range(CALLS):
+        fn(i)
+    # Очередь enqueue-обработчиков тоже входит в стоимость
+    logger.complete()
+    return (time.perf_counter_ns() - start) / CALLS
+
+
+def setup(log_dir: str, **overrides) -> ScriptLog:
+    config = ModelSettings(log_directory=log_dir, **overrides)
+    logger_setup.configure(config)
+    script_log = ScriptLog()
+    script_log.configure(config)
+    return script_log
+
+
+def main():
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        setup(tmp, log_profile="dev")
+        rows.append(("dev: logger.info на каждый print", per_call_ns(lambda i: logger.info(" ".join(ARGS)))))
+
+        setup(tmp, log_profile="production")
+        rows.append(("production: logger.info на каждый print", per_call_ns(lambda i: logger.info(" ".join(ARGS)))))
+        rows.append(("production: logger.debug ниже уровня", per_call_ns(lambda i: logger.debug(" ".join(ARGS)))))
+
+        script_log = setup(tmp, log_profile="production", script_log_rate=0)
+        rows.append(("ScriptLog: повтор (dedup)", per_call_ns(lambda i: script_log.write("bench.s", ARGS))))
+
+        script_log = setup(tmp, log_profile="production", script_log_dedup=False, script_log_rate=20)
+        rows.append(("ScriptLog: разные строки, лимит 20/с", per_call_ns(lambda i: script_log.write("bench.s", (i,)))))
+
+        script_log = setup(tmp, log_profile="production", log_level="WARNING")
+        rows.append(("ScriptLog: уровень ниже обработчиков", per_call_ns(lambda i: script_log.write("bench.s", ARGS))))
+
+        script_log = setup(tmp, log_profile="production", log_ring_buffer=10000)
+        rows.append(("ScriptLog: повтор + кольцевой буфер", per_call_ns(lambda i: script_log.write("bench.s", ARGS))))
+        logger.remove()
+    sys.stderr.close()
+    sys.stderr = stderr
+
+    print(f"{'case':<42} {'ns/call':>9}")
+    for name, ns in rows:
+        print(f"{name:<42} {ns:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
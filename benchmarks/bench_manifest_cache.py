@@ -0,0 +1,71 @@
+"""
+Холодный и тёплый старт Loader.scan: разбор YAML чистым Python и через libyaml,
+с пустым и заполненным manifest cache.
+
+Запуск из корня репозитория: python -m benchmarks.bench_manifest_cache
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+import src.resource.loader as loader_module
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.resource.loader import Loader
+from src.resource.manifest_cache import ManifestCache
+
+PACKS = 50
+ENTITIES_PER_PACK = 40
+
+ENTITY = """id: e{index}
+name: Entity {index}
+icon: icons/e{index}.png
+sprite: sprites/e{index}.png
+position: ["0", "0"]
+size: ["64", "64"]
+scripts: [scripts/e{index}.lua, scripts/common.lua]
+"""
+
+
+def make_packs(root: Path):
+    for p in range(PACKS):
+        pack = root / f"pack{p:03}"
+        pack.mkdir()
+        (pack / "info.yaml").write_text(f"id: pack{p}\ntitle: Pack {p}\nauthors: [someone]\n", encoding="utf-8")
+        for e in range(ENTITIES_PER_PACK):
+            (pack / f"e{e}.yaml").write_text(ENTITY.format(index=e), encoding="utf-8")
+
+
+def run(root: Path, cache_file: Path, use_cache: bool) -> float:
+    config = ModelSettings(manifest_cache=use_cache, manifest_cache_file=str(cache_file),
+                           lua_execution_mode="workers", loader_workers=1)
+    # Новый экземпляр, чтобы снимок читался с диска, как при запуске приложения
+    ManifestCache._instances.clear()
+    start = time.perf_counter()
+    resources = Loader(config).scan([root])
+    elapsed = time.perf_counter() - start
+    assert len(resources.content_packs) == PACKS
+    return elapsed * 1000
+
+
+def main():
+    logger.disable("src")
+    print(f"{PACKS} packs, {ENTITIES_PER_PACK} entities each (scripts not loaded)")
+    print(f"{'yaml loader':>12} {'no cache ms':>12} {'cold ms':>10} {'warm ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "packs"
+        root.mkdir()
+        make_packs(root)
+        for name, yaml_loader in (("SafeLoader", yaml.SafeLoader), ("CSafeLoader", loader_module.YamlSafeLoader)):
+            loader_module.YamlSafeLoader = yaml_loader
+            cache_file = Path(tmp) / f"{name}.bin"
+            no_cache = run(root, cache_file, False)
+            cold = run(root, cache_file, True)
+            warm = run(root, cache_file, True)
+            print(f"{name:>12} {no_cache:>12.1f} {cold:>10.1f} {warm:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Отрисовка N движущихся питомцев: один оверлей на монитор против окна на каждого.
+
+Оценка нагрузки на композитор: число окон (поверхностей), paintEvent и перерисованных
+пикселей за кадр. Под offscreen-платформой композитора нет, поэтому время кадра - только
+сторона приложения.
+
+Запуск из корня репозитория: python -m benchmarks.bench_overlay_renderer
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from PySide6.QtCore import qInstallMessageHandler  # noqa: E402
+from PySide6.QtGui import QColor, QImage, QPainter  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from src.core.entity_registry import EntityRegistry  # noqa: E402
+from src.core.entity_store import EntityStore  # noqa: E402
+from src.core.logger import logger  # noqa: E402
+from src.core.models.m_settings import ModelSettings  # noqa: E402
+from src.core.window.renderer import OverlayRenderer, WindowRenderer  # noqa: E402
+from src.resource.models.content_pack import ModelContentPack  # noqa: E402
+from src.resource.models.entity import ModelEntity  # noqa: E402
+from src.resource.models.resources import ModelResources  # noqa: E402
+from src.resource.sprite_cache import SpriteCache  # noqa: E402
+
+FRAMES = 120
+SPRITE = 96
+SCREEN = {"name": "bench", "x": 0, "y": 0, "width": 1920, "height": 1080, "logicalDpi": 96, "dpr": 1}
+
+
+def make_pack(root: Path, count: int) -> ModelResources:
+    image = QImage(SPRITE, SPRITE, QImage.Format.Format_ARGB32)
+    image.fill(0)
+    painter = QPainter(image)
+    painter.setBrush(QColor(230, 160, 60))
+    painter.drawEllipse(8, 8, SPRITE - 16, SPRITE - 16)
+    painter.end()
+    image.save(str(root / "pet.png"))
+
+    entities = {f"pet{i}": ModelEntity(id=f"pet{i}", sprite="pet.png", content_pack_id="bench") for i in range(count)}
+    resources = ModelResources()
+    resources.content_packs["bench"] = ModelContentPack(id="bench", path=root, entities=entities)
+    return resources
+
+
+def run(app, renderer_cls, resources, count: int, moving: float):
+    registry = EntityRegistry()
+    store = EntityStore(registry=registry)
+    geometry = app.primaryScreen().geometry()
+    store.bounds = (0, 0, geometry.width(), geometry.height())
+    rng = random.Random(1)
+    for entity in resources.content_packs["bench"].entities.values():
+        registry.register(entity)
+        speed = 120.0 if rng.random() < moving else 0.0
+        store.spawn(f"bench.{entity.id}", rng.uniform(0, geometry.width() - SPRITE),
+                    rng.uniform(0, geometry.height() - SPRITE), SPRITE, SPRITE, speed, speed / 2)
+
+    sprite_cache = SpriteCache(ModelSettings(sprite_disk_cache=False))
+    renderer = renderer_cls(sprite_cache, resources, store=store, registry=registry)
+    for _ in range(50):
+        renderer.sync()
+        app.processEvents()
+        if len(renderer.items) == count:
+            break
+        time.sleep(0.01)
+
+    for window in renderer.windows():
+        window.paint_events = window.painted_pixels = 0
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        store.update(1 / 60)
+        renderer.sync()
+        app.processEvents()
+    elapsed = (time.perf_counter() - start) / FRAMES * 1000
+
+    windows = renderer.windows()
+    paints = sum(window.paint_events for window in windows) / FRAMES
+    pixels = sum(window.painted_pixels for window in windows) / FRAMES
+    renderer.close()
+    sprite_cache.shutdown()
+    app.processEvents()
+    return len(windows), elapsed, paints, pixels
+
+
+def main():
+    logger.disable("src")
+    if "QT_QPA_PLATFORM" not in os.environ:
+        # Экран offscreen по умолчанию 800x600, для сравнения нужен обычный монитор
+        config = Path(tempfile.gettempdir()) / "vpet_bench_screens.json"
+        config.write_text(json.dumps({"screens": [SCREEN]}), encoding="utf-8")
+        os.environ["QT_QPA_PLATFORM"] = f"offscreen:configfile={config}"
+    # offscreen не поддерживает маски окон и сообщает об этом на каждый setMask
+    qInstallMessageHandler(lambda *args: None)
+    app = QApplication([])
+    print(f"{'pets':>5} {'moving':>7} {'mode':<8} {'windows':>8} {'frame ms':>9} {'paints':>7} {'kpx/frame':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (10, 50, 200):
+            resources = make_pack(Path(tmp), count)
+            for moving in (0.2, 1.0):
+                for name, renderer_cls in (("overlay", OverlayRenderer), ("windows", WindowRenderer)):
+                    windows, elapsed, paints, pixels = run(app, renderer_cls, resources, count, moving)
+                    print(f"{count:>5} {moving:>7.0%} {name:<8} {windows:>8} {elapsed:>9.2f} {paints:>7.1f} "
+                          f"{pixels / 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Время Loader.scan для 60 паков: последовательно и в пуле потоков, для независимых
+паков (одна волна) и цепочки зависимостей (волна на пак - критический путь на всю длину).
+
+Запуск из корня репозитория: python -m benchmarks.bench_pack_loading
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.resource.loader import Loader
+
+PACKS = 60
+ENTITIES_PER_PACK = 20
+SCRIPTS_PER_PACK = 10
+
+
+def make_packs(root: Path, chain: bool):
+    for p in range(PACKS):
+        pack = root / f"pack{p:03}"
+        pack.mkdir()
+        info = f"id: pack{p}\n"
+        if chain and p:
+            info += f"dependencies: [pack{p - 1}]\n"
+        (pack / "info.yaml").write_text(info, encoding="utf-8")
+        for e in range(ENTITIES_PER_PACK):
+            (pack / f"e{e}.yaml").write_text(f"id: e{e}\nname: Entity {e}\n", encoding="utf-8")
+        for s in range(SCRIPTS_PER_PACK):
+            body = "\n".join(f"function helper_{i}() return {i} end" for i in range(50))
+            (pack / f"s{s}.lua").write_text(body + "\nfunction on_update(dt) end\n", encoding="utf-8")
+
+
+def run(chain: bool, workers: int) -> float:
+    config = ModelSettings(loader_workers=workers, lua_bytecode_cache=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_packs(root, chain)
+        start = time.perf_counter()
+        resources = Loader(config).scan([root])
+        elapsed = time.perf_counter() - start
+        assert len(resources.content_packs) == PACKS
+    return elapsed * 1000
+
+
+def main():
+    logger.disable("src")
+    print(f"{PACKS} packs, {ENTITIES_PER_PACK} entities and {SCRIPTS_PER_PACK} scripts each")
+    print(f"{'layout':>12} {'workers':>8} {'ms':>10}")
+    for chain in (False, True):
+        for workers in (1, 0):
+            ms = run(chain, workers)
+            print(f"{'chain' if chain else 'independent':>12} {workers or 'auto':>8} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
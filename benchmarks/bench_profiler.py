@@ -0,0 +1,46 @@
+"""
+Стоимость тика LuaManager.update с выключенным и включённым профилировщиком.
+
+Запуск из корня репозитория: python -m benchmarks.bench_profiler
+"""
+import tempfile
+import timeit
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.profiler import profiler
+from src.lua.loader import LoaderLua
+from src.lua.manager import LuaManager
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.resources import ModelResources
+
+SCRIPTS = 100
+ITERATIONS = 500
+
+
+def make_manager(root: Path) -> LuaManager:
+    for i in range(SCRIPTS):
+        (root / f"s{i}.lua").write_text("x = 0\nfunction on_update(dt) x = x + dt end\n", encoding="utf-8")
+    scripts = LoaderLua().scan_content_pack_scripts(root)
+    resources = ModelResources(content_packs={"bench": ModelContentPack(id="bench", path=root, scripts=scripts)})
+    return LuaManager(resources)
+
+
+def main():
+    logger.disable("src")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(Path(tmp))
+        print(f"{SCRIPTS} scripts with on_update, {ITERATIONS} ticks")
+        print(f"{'profiler':>10} {'us/tick':>10}")
+        for enabled in (False, True, False):
+            if enabled:
+                profiler.start()
+            else:
+                profiler.stop()
+            total = timeit.timeit(lambda: manager.update(0.016), number=ITERATIONS)
+            print(f"{'on' if enabled else 'off':>10} {total / ITERATIONS * 1e6:>10.1f}")
+        print(f"spans in buffer: {len(profiler.spans())}")
+
+
+if __name__ == "__main__":
+    main()
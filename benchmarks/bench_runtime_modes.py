@@ -0,0 +1,53 @@
+"""
+Время загрузки и память Lua на скрипт для режимов lua_runtime_mode.
+
+Запуск из корня репозитория: python -m benchmarks.bench_runtime_modes
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.settings import settings
+from src.lua.loader import LoaderLua
+
+SCRIPTS = 200
+
+
+def make_pack(root: Path):
+    for i in range(SCRIPTS):
+        (root / f"s{i}.lua").write_text(
+            f"local state = {{id = {i}, items = {{}}}}\n"
+            "function on_update(dt) state.items[#state.items + 1] = dt end\n",
+            encoding="utf-8"
+        )
+
+
+def run(root: Path, mode: str):
+    LoaderLua._shared_sandboxes.clear()
+    settings.update_settings(lua_runtime_mode=mode)
+
+    start = time.perf_counter()
+    scripts = LoaderLua().scan_content_pack_scripts(root)
+    elapsed = time.perf_counter() - start
+
+    sandboxes = {id(data['sandbox']): data['sandbox'] for data in scripts.values()}
+    memory_kb = sum(sandbox.memory_kb() for sandbox in sandboxes.values())
+    return elapsed, memory_kb, len(sandboxes)
+
+
+def main():
+    logger.disable("src")
+    print(f"{SCRIPTS} scripts in one content pack")
+    print(f"{'mode':>10} {'runtimes':>9} {'load ms':>9} {'ms/script':>10} {'KB/script':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_pack(root)
+        for mode in LoaderLua.RUNTIME_MODES:
+            elapsed, memory_kb, runtimes = run(root, mode)
+            print(f"{mode:>10} {runtimes:>9} {elapsed * 1000:>9.1f} "
+                  f"{elapsed * 1000 / SCRIPTS:>10.3f} {memory_kb / SCRIPTS:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
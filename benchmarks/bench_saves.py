@@ -0,0 +1,116 @@
+"""
+Сохранение большого состояния скрипта (таблица на 100k ключей): полная запись YAML в
+GUI-потоке против журнала SaveManager, где GUI-поток только собирает изменённые ключи,
+а запись, fsync и сворачивание журнала идут в потоке записи. Загрузка - из снимка и из
+снимка с журналом.
+
+Запуск из корня репозитория: python -m benchmarks.bench_saves
+"""
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.core.saves import SaveManager
+from src.lua.events import lua_to_python
+from src.lua.loader import LoaderLua
+
+KEYS = 100_000
+CHANGED = 100
+INTERVALS = 60
+
+STATE_SCRIPT = f'''
+data = {{}}
+for i = 1, {KEYS} do data["k" .. i] = {{x = i, y = i * 2, name = "item" .. i}} end
+state = save.register("world", data)
+local tick = 0
+function change()
+    for i = 1, {CHANGED} do
+        tick = tick + 1
+        local key = "k" .. (tick % {KEYS} + 1)
+        state[key] = {{x = tick, y = -tick, name = "moved"}}
+    end
+end
+function change_all() save.mark("world") end
+'''
+
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def make_manager(directory: Path) -> SaveManager:
+    from src.core import saves
+    from src.lua import save
+
+    config = ModelSettings(save_directory=[str(directory)], save_compact_mb=0, save_entities=False)
+    manager = SaveManager()
+    manager.configure(config)
+    # Lua API работает с глобальным save_manager
+    saves.save_manager = save.save_manager = manager
+    return manager
+
+
+def load_script(root: Path):
+    (root / "state.lua").write_text(STATE_SCRIPT, encoding="utf-8")
+    return LoaderLua(ModelSettings(lua_bytecode_cache=False)).scan_content_pack_scripts(root, "bench")["state"]
+
+
+def main():
+    logger.remove()
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = make_manager(root / "saves")
+        manager.load()
+        manager.start()
+        script = load_script(root)
+        env = script["env"]
+        print(f"{KEYS} keys, {CHANGED} changed per interval, {INTERVALS} intervals")
+        print(f"{'GUI thread per save':<40} {'ms':>9}")
+
+        def naive():
+            data = lua_to_python(env.data)
+            with open(root / "naive.yaml", "w", encoding="utf-8") as f:
+                yaml.dump(data, f, Dumper=dumper)
+
+        print(f"{'full YAML dump (naive)':<40} {timed_ms(naive):>9.1f}")
+
+        env.change_all()
+        print(f"{'journal collect, all keys marked':<40} {timed_ms(manager.collect):>9.1f}")
+        print(f"{'  writer: write + compact':<40} {timed_ms(lambda: manager.flush(compact=True)):>9.1f}")
+
+        collects = []
+        for _ in range(INTERVALS):
+            env.change()
+            collects.append(timed_ms(manager.collect))
+        print(f"{'journal collect, changed keys (mean)':<40} {statistics.mean(collects):>9.2f}")
+        print(f"{'journal collect, changed keys (max)':<40} {max(collects):>9.2f}")
+        print(f"{'  writer: write + fsync of all':<40} {timed_ms(manager.flush):>9.1f}")
+        manager.shutdown()
+
+        print()
+        print(f"{'load':<40} {'ms':>9}")
+        journal_manager = make_manager(root / "saves")
+        print(f"{'snapshot':<40} {timed_ms(journal_manager.load):>9.1f}")
+
+        # Снимок + журнал: изменения после сворачивания без завершения (как после падения)
+        journal_manager.start()
+        script = load_script(root)
+        for _ in range(INTERVALS):
+            script["env"].change()
+            journal_manager.collect()
+        journal_manager.flush()
+        records = journal_manager.journal.records
+        replay_manager = make_manager(root / "saves")
+        print(f"{f'snapshot + {records} journal records':<40} {timed_ms(replay_manager.load):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
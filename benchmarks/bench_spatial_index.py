@@ -0,0 +1,61 @@
+"""
+Запросы к entity по области: SpatialGrid против линейного перебора всех прямоугольников.
+
+Запуск из корня репозитория: python -m benchmarks.bench_spatial_index
+"""
+import random
+import time
+
+from src.core.spatial_index import SpatialGrid
+
+WORLD = 4096.0
+QUERIES = 2000
+MOVES = 20000
+
+
+def linear_radius(bounds, x, y, radius):
+    result = []
+    radius_sq = radius * radius
+    for key, (bx, by, bw, bh) in bounds.items():
+        dx = x - min(max(x, bx), bx + bw)
+        dy = y - min(max(y, by), by + bh)
+        if dx * dx + dy * dy <= radius_sq:
+            result.append(key)
+    return result
+
+
+def measure(fn, queries) -> float:
+    start = time.perf_counter()
+    for x, y in queries:
+        fn(x, y)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    rng = random.Random(1)
+    queries = [(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for _ in range(QUERIES)]
+    print(f"{'entities':>9} {'linear us':>10} {'grid us':>8} {'move us':>8}")
+    for count in (100, 1000, 10000):
+        grid = SpatialGrid(128)
+        bounds = {}
+        for i in range(count):
+            rect = (rng.uniform(0, WORLD), rng.uniform(0, WORLD), rng.uniform(16, 96), rng.uniform(16, 96))
+            grid.insert(i, *rect)
+            bounds[i] = rect
+
+        for x, y in queries[:50]:
+            assert sorted(grid.query_radius(x, y, 100)) == sorted(linear_radius(bounds, x, y, 100))
+        linear = measure(lambda x, y: linear_radius(bounds, x, y, 100), queries)
+        indexed = measure(lambda x, y: grid.query_radius(x, y, 100), queries)
+
+        keys = [rng.randrange(count) for _ in range(MOVES)]
+        start = time.perf_counter()
+        for key in keys:
+            bx, by, _, _ = grid.bounds(key)
+            grid.move(key, bx + 1.0, by + 0.5)
+        move = (time.perf_counter() - start) / MOVES * 1e6
+        print(f"{count:>9} {linear:>10.1f} {indexed:>8.1f} {move:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Спрайты: загрузка кадра из PNG на каждый кадр анимации против SpriteCache, сборка атласа
+листа без дискового кэша и с ним.
+
+Запуск из корня репозитория: python -m benchmarks.bench_sprite_cache
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QColor, QGuiApplication, QImage, QPainter, QPixmap  # noqa: E402
+
+from src.core.logger import logger  # noqa: E402
+from src.core.models.m_settings import ModelSettings  # noqa: E402
+from src.resource.source import open_source  # noqa: E402
+from src.resource.sprite_cache import SpriteCache  # noqa: E402
+
+FRAME = 128
+COLUMNS = 8
+ROWS = 4
+DRAWS = 2000
+
+
+def make_sheet(path: Path):
+    sheet = QImage(FRAME * COLUMNS, FRAME * ROWS, QImage.Format.Format_ARGB32)
+    sheet.fill(0)
+    painter = QPainter(sheet)
+    for index in range(COLUMNS * ROWS):
+        x, y = index % COLUMNS * FRAME, index // COLUMNS * FRAME
+        # Каждый второй кадр повторяется, как в зацикленной анимации
+        shift = (index // 2) % 8 * 4
+        painter.setBrush(QColor(40 * (index // 2 % 6), 120, 200))
+        painter.drawEllipse(x + 16 + shift, y + 24, 64, 80)
+    painter.end()
+    sheet.save(str(path))
+
+
+def main():
+    logger.disable("src")
+    # Экземпляр удерживает сам Qt (QGuiApplication.instance())
+    QGuiApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_sheet(root / "sheet.png")
+        source = open_source(root)
+        frames = COLUMNS * ROWS
+
+        start = time.perf_counter()
+        for draw in range(DRAWS // 10):
+            index = draw % frames
+            # QImage: QPixmap(path) попадает в QPixmapCache и не декодирует повторно
+            QPixmap.fromImage(QImage(str(root / "sheet.png")).copy(index % COLUMNS * FRAME, index // COLUMNS * FRAME, FRAME, FRAME))
+        naive = (time.perf_counter() - start) / (DRAWS // 10) * 1e6
+
+        config = ModelSettings(sprite_cache_directory=str(root / "cache"))
+        cache = SpriteCache(config)
+        start = time.perf_counter()
+        atlas = cache.load(source, "sheet.png", (FRAME, FRAME))
+        cold = (time.perf_counter() - start) * 1000
+
+        key = cache.make_key(source, "sheet.png", (FRAME, FRAME))
+        start = time.perf_counter()
+        for draw in range(DRAWS):
+            cache.get(key).source_rect(draw % frames)
+        cached = (time.perf_counter() - start) / DRAWS * 1e6
+
+        warm_cache = SpriteCache(config)
+        start = time.perf_counter()
+        warm_cache.load(source, "sheet.png", (FRAME, FRAME))
+        warm = (time.perf_counter() - start) * 1000
+
+        no_disk = SpriteCache(ModelSettings(sprite_disk_cache=False))
+        start = time.perf_counter()
+        no_disk.load(source, "sheet.png", None)
+        plain = (time.perf_counter() - start) * 1000
+
+        print(f"sheet {COLUMNS * FRAME}x{ROWS * FRAME}, {frames} frames of {FRAME}x{FRAME}")
+        print(f"per-frame decode from PNG    {naive:>9.1f} us/draw")
+        print(f"SpriteCache.get + sub-rect   {cached:>9.2f} us/draw")
+        print(f"decode sheet without atlas   {plain:>9.1f} ms")
+        print(f"atlas build (cold)           {cold:>9.1f} ms, {atlas.width}x{atlas.height}, "
+              f"{len({(frame.x, frame.y) for frame in atlas.frames})} unique frames")
+        print(f"atlas from disk cache (warm) {warm:>9.1f} ms")
+        cache.shutdown()
+        warm_cache.shutdown()
+        no_disk.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Запуск приложения: отчёт в стиле -X importtime для `import src.app` и время до первого
+кадра при загрузке паков до трея (startup_background_loading: false) и в фоне.
+
+Этапы в мс от старта процесса: tray - трей и пустой оверлей, event_loop - первый оборот
+цикла событий (приложение отвечает), packs - паки загружены и on_startup выполнен,
+first_paint - первый paintEvent с питомцами.
+
+Запуск из корня репозитория: python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PySide6.QtGui import QColor, QImage, QPainter
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKS = 40
+SCRIPTS_PER_PACK = 3
+RUNS = 3
+SCREEN = {"name": "bench", "x": 0, "y": 0, "width": 1920, "height": 1080, "logicalDpi": 96, "dpr": 1}
+# Не должны импортироваться до первого кадра
+DEFERRED = ("lupa", "numpy", "src.lua.modules", "src.lua.manager", "src.resource.loader")
+
+CHILD = """
+import json, sys
+from time import perf_counter_ns
+STARTED_NS = perf_counter_ns()
+from PySide6.QtCore import QTimer, qInstallMessageHandler
+from src.app import App
+qInstallMessageHandler(lambda *args: None)
+app = App([sys.argv[0]], started_ns=STARTED_NS)
+stages = app.startup.stages
+
+def poll():
+    now = (perf_counter_ns() - STARTED_NS) / 1e6
+    stages.setdefault("event_loop", now)
+    if any(window.paint_events for window in app.renderer.windows()):
+        stages["first_paint"] = now
+        print(json.dumps(stages))
+        app.exit_app()
+    elif now > 60000:
+        print(json.dumps(stages))
+        app.exit_app()
+
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(1)
+app.exec()
+"""
+
+
+def import_report(limit: int = 12) -> Tuple[List[Tuple[str, float]], int, List[str]]:
+    """Прямые импорты src.app по суммарному времени (мс), общее время (мс), загруженные отложенные модули"""
+    code = "import sys, src.app; print(' '.join(sorted(m for m in sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    loaded = set(result.stdout.split())
+    direct: List[Tuple[str, float]] = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.strip() == "src.app":
+            total = int(cumulative) // 1000
+        # Отступ в имени - глубина: два пробела - прямой импорт src.app
+        elif name.startswith("   ") and not name.startswith("    "):
+            direct.append((name.strip(), int(cumulative) / 1000))
+    direct.sort(key=lambda item: -item[1])
+    return direct[:limit], total, [name for name in DEFERRED if name in loaded]
+
+
+def make_packs(root: Path):
+    image = QImage(64, 64, QImage.Format.Format_ARGB32)
+    image.fill(0)
+    painter = QPainter(image)
+    painter.setBrush(QColor(230, 160, 60))
+    painter.drawEllipse(4, 4, 56, 56)
+    painter.end()
+    for p in range(PACKS):
+        pack = root / f"pack{p:03}"
+        pack.mkdir(parents=True)
+        image.save(str(pack / "pet.png"))
+        (pack / "info.yaml").write_text(f"id: pack{p}\n", encoding="utf-8")
+        (pack / "pet.yaml").write_text(
+            f"id: pet\nname: Pet\nsprite: pet.png\nposition: ['{(p % 20) * 80}', '{(p // 20) * 80}']\n",
+            encoding="utf-8")
+        for s in range(SCRIPTS_PER_PACK):
+            (pack / f"s{s}.lua").write_text(
+                "data = {}\nfor i = 1, 20000 do data[i] = i * i end\nfunction on_update(dt) end\n", encoding="utf-8")
+
+
+def run(workdir: Path, background: bool) -> Dict[str, float]:
+    settings = {
+        "content_packs_dirs": [str(workdir / "packs")],
+        "startup_background_loading": background,
+        "log_profile": "production",
+        "lua_bytecode_cache": False,
+        "manifest_cache": False,
+        "sprite_disk_cache": False,
+        "lua_cache_directory": str(workdir / "cache"),
+        "global_timer_tick": 60,
+    }
+    (workdir / "data").mkdir(exist_ok=True)
+    (workdir / "data" / "settings.yaml").write_text(json.dumps(settings), encoding="utf-8")
+    screen = workdir / "screen.json"
+    screen.write_text(json.dumps({"screens": [SCREEN]}), encoding="utf-8")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.setdefault("QT_QPA_PLATFORM", f"offscreen:configfile={screen}")
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    direct, total, loaded = import_report()
+    print(f"import src.app: {total} ms")
+    for name, ms in direct:
+        print(f"  {name:<40} {ms:>8.1f} ms")
+    print(f"deferred modules imported by src.app: {', '.join(loaded) or 'none'}")
+    print()
+
+    stages = ("tray", "event_loop", "packs", "first_paint")
+    print(f"{PACKS} packs, {SCRIPTS_PER_PACK} scripts each, best of {RUNS}")
+    print(f"{'loading':<12}" + "".join(f"{stage + ' ms':>16}" for stage in stages))
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        make_packs(workdir / "packs")
+        for background in (False, True):
+            results = [run(workdir, background) for _ in range(RUNS)]
+            best = min(results, key=lambda result: result.get("first_paint", float("inf")))
+            print(f"{'background' if background else 'blocking':<12}"
+                  + "".join(f"{best.get(stage, float('nan')):>16.1f}" for stage in stages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Загрузка паков из каталогов и из упакованных .vpk (много мелких файлов).
+
+Запуск из корня репозитория: python -m benchmarks.bench_vpk
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.resource.loader import Loader
+from src.resource.vpk import pack
+
+PACKS = 30
+ENTITIES_PER_PACK = 60
+SCRIPTS_PER_PACK = 30
+
+
+def make_packs(root: Path):
+    for p in range(PACKS):
+        pack_dir = root / f"pack{p:03}"
+        (pack_dir / "entities").mkdir(parents=True)
+        (pack_dir / "scripts").mkdir()
+        (pack_dir / "info.yaml").write_text(f"id: pack{p}\n", encoding="utf-8")
+        for e in range(ENTITIES_PER_PACK):
+            (pack_dir / "entities" / f"e{e}.yaml").write_text(f"id: e{e}\nname: Entity {e}\n", encoding="utf-8")
+        for s in range(SCRIPTS_PER_PACK):
+            (pack_dir / "scripts" / f"s{s}.lua").write_text(f"value = {s}\n", encoding="utf-8")
+
+
+def run(root: Path) -> float:
+    config = ModelSettings(manifest_cache=False, lua_bytecode_cache=False, loader_workers=1)
+    start = time.perf_counter()
+    resources = Loader(config).scan([root])
+    elapsed = time.perf_counter() - start
+    assert len(resources.content_packs) == PACKS
+    return elapsed * 1000
+
+
+def main():
+    logger.disable("src")
+    print(f"{PACKS} packs, {ENTITIES_PER_PACK} entities and {SCRIPTS_PER_PACK} scripts each")
+    with tempfile.TemporaryDirectory() as tmp:
+        directories = Path(tmp) / "dirs"
+        archives = Path(tmp) / "vpk"
+        directories.mkdir()
+        archives.mkdir()
+        make_packs(directories)
+        for pack_dir in directories.iterdir():
+            pack(pack_dir, archives / f"{pack_dir.name}.vpk")
+
+        print(f"{'source':>8} {'ms':>10}")
+        for name, root in (("dirs", directories), ("vpk", archives)):
+            print(f"{name:>8} {run(root):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
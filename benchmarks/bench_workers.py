@@ -0,0 +1,70 @@
+"""
+Время тика для многих тяжёлых паков: в главном процессе и в пуле worker-процессов.
+
+Запуск из корня репозитория: python -m benchmarks.bench_workers
+Выигрыш виден только на многоядерной машине.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.logger import logger
+from src.core.settings import settings
+from src.lua.loader import LoaderLua
+from src.lua.manager import LuaManager
+from src.lua.workers import LuaWorkerPool
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.resources import ModelResources
+
+PACKS = 16
+SCRIPTS_PER_PACK = 4
+LOOP = 200_000
+TICKS = 20
+
+
+def make_packs(root: Path) -> ModelResources:
+    resources = ModelResources()
+    for p in range(PACKS):
+        pack = root / f"pack{p}"
+        pack.mkdir()
+        for s in range(SCRIPTS_PER_PACK):
+            (pack / f"s{s}.lua").write_text(
+                f"function on_update(dt) local x = 0 for i = 1, {LOOP} do x = x + i % 7 end end\n",
+                encoding="utf-8"
+            )
+        resources.content_packs[f"pack{p}"] = ModelContentPack(id=f"pack{p}", path=pack)
+    return resources
+
+
+def measure(manager) -> float:
+    manager.update(0.016)
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        manager.update(0.016)
+    return (time.perf_counter() - start) / TICKS * 1000
+
+
+def main():
+    logger.disable("src")
+    settings.update_settings(lua_budget_hooks={})
+    print(f"{PACKS} packs x {SCRIPTS_PER_PACK} scripts, {LOOP} iterations per on_update, {os.cpu_count()} cpus")
+    with tempfile.TemporaryDirectory() as tmp:
+        resources = make_packs(Path(tmp))
+
+        in_process = resources.model_copy(deep=True)
+        for content_pack_id, content_pack in in_process.content_packs.items():
+            content_pack.scripts = LoaderLua().scan_content_pack_scripts(content_pack.path, content_pack_id)
+        print(f"{'in_process':>12} {measure(LuaManager(in_process)):>9.1f} ms/tick")
+
+        for workers in sorted({2, os.cpu_count() or 1}):
+            settings.update_settings(lua_workers=workers)
+            pool = LuaWorkerPool(resources)
+            try:
+                print(f"{f'workers={workers}':>12} {measure(pool):>9.1f} ms/tick")
+            finally:
+                pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
-import sys
+from time import perf_counter_ns
 
-from src.app import App
+# Отсчёт этапов запуска (StartupStages) - до импорта Qt и модулей приложения
+STARTED_NS = perf_counter_ns()
+
+import argparse  # noqa: E402
+import sys  # noqa: E402
+
+from src.app import App  # noqa: E402
 
 if __name__ == "__main__":
-    app = App(sys.argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE_JSON",
+                        help="profile from startup and write Chrome trace on exit (default: profiler_directory)")
+    args, qt_args = parser.parse_known_args()
+
+    app = App([sys.argv[0], *qt_args], profile_output=args.profile, started_ns=STARTED_NS)
     sys.exit(app.exec())
\ No newline at end of file
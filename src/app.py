@@ -1,21 +1,60 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
 from PySide6.QtGui import QIcon, QAction
 from PySide6.QtWidgets import QSystemTrayIcon, QMenu, QApplication
 
+from src.core.animation import animation_engine
+from src.core.entity_registry import entity_registry
+from src.core.entity_store import entity_store
 from src.core.global_timer import GlobalTimer
-from src.lua.manager import LuaManager
-from src.resource.loader import Loader
+from src.core.logger import logger, logger_setup
+from src.core.profiler import profiler
+from src.core.saves import save_manager
+from src.core.script_log import script_log
+from src.core.settings import settings
+from src.core.startup import PackLoadingThread, StartupStages
+from src.core.window.renderer import create_renderer
+from src.resource.models.resources import ModelResources
+from src.resource.sprite_cache import SpriteCache
 
 
 class App(QApplication):
-    def __init__(self, sys_argv):
+    """
+    Запуск в два этапа: сначала трей, таймер и пустой оверлей, затем (по сигналу фоновой
+    загрузки или сразу при startup_background_loading: false) Lua, entity и on_startup.
+    Модули Lua и загрузчика паков импортируются только во втором этапе.
+    """
+
+    def __init__(self, sys_argv, profile_output: Optional[str] = None, started_ns: Optional[int] = None):
         super().__init__(sys_argv)
+        self.startup = StartupStages(started_ns)
 
-        # Load resources and initialize LuaManager
-        self.resources = Loader().scan()
-        self.lua_manager = LuaManager(self.resources)
+        logger_setup.configure(settings)
+        script_log.configure(settings)
+
+        # "" - файл в profiler_directory, None - не выгружать при выходе
+        self.profile_output = profile_output
+        if settings.profiler or profile_output is not None:
+            profiler.start(settings.profiler_capacity)
+
+        entity_registry.configure(settings.entity_grid_cell_size)
+        save_manager.configure(settings)
+        # Заполняются в _on_packs_loaded
+        self.resources = ModelResources()
+        self.lua_manager = None
+        self.hot_reloader = None
+        self.pack_loading = None
+
+        self.sprite_cache = SpriteCache(settings)
 
         # Initialize GlobalTimer
-        self.global_timer = GlobalTimer()
+        self.global_timer = GlobalTimer(mode=settings.global_timer_mode,
+                                        max_catch_up_steps=settings.global_timer_max_catch_up_steps,
+                                        idle=settings.global_timer_idle,
+                                        idle_ticks_per_second=settings.global_timer_idle_tick,
+                                        idle_timeout=settings.global_timer_idle_timeout)
 
         # Setup tray icon
         self.tray_icon = QSystemTrayIcon(self)
@@ -27,35 +66,151 @@ class App(QApplication):
         self.pause_action.triggered.connect(self.toggle_pause)
         self.tray_menu.addAction(self.pause_action)
 
+        self.profiler_action = QAction("Stop profiler" if profiler.enabled else "Start profiler", self)
+        self.profiler_action.triggered.connect(self.toggle_profiler)
+        self.tray_menu.addAction(self.profiler_action)
+
+        self.export_profile_action = QAction("Export profile", self)
+        self.export_profile_action.triggered.connect(self.export_profile)
+        self.tray_menu.addAction(self.export_profile_action)
+
         self.exit_action = QAction("Exit", self)
         self.exit_action.triggered.connect(self.exit_app)
         self.tray_menu.addAction(self.exit_action)
 
         self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.setToolTip("Loading content packs")
         self.tray_icon.show()
 
         self.is_paused = False
 
-        # Call on_startup for all scripts if exists
-        self.lua_manager.execute_all("on_startup")
+        # Entity с FLAG_CLAMP не выходят за пределы рабочей области основного экрана
+        geometry = self.primaryScreen().availableGeometry()
+        entity_store.bounds = (geometry.left(), geometry.top(), geometry.right() + 1, geometry.bottom() + 1)
+
+        self.renderer = create_renderer(settings.render_mode, self.sprite_cache, self.resources,
+                                        settings.entity_grid_cell_size)
 
         # Subscribe to GlobalTimer for on_update
         GlobalTimer.subscribe(self)
+        GlobalTimer.add_activity_check(lambda: entity_store.last_moved > 0)
+        GlobalTimer.add_activity_check(animation_engine.is_animating)
+        self.startup.mark("tray")
+
+        # Load resources and initialize LuaManager
+        if settings.startup_background_loading:
+            self.pack_loading = PackLoadingThread(settings)
+            self.pack_loading.progress.connect(self._on_pack_progress)
+            self.pack_loading.loaded.connect(self._on_packs_loaded)
+            self.pack_loading.start()
+        else:
+            from src.resource.loader import Loader
+            save_manager.load()
+            self._on_packs_loaded(Loader().scan(), None)
+
+    def _on_pack_progress(self, loaded: int, total: int, content_pack_id: str):
+        self.tray_icon.setToolTip(f"Loading content packs: {loaded}/{total}")
+        logger.debug(f"Content pack {content_pack_id} loaded ({loaded}/{total})")
+
+    def _on_packs_loaded(self, resources: Optional[ModelResources], error: Optional[Exception]):
+        if resources is None:
+            logger.error(f"Started without content packs: {error}")
+            resources = ModelResources()
+        self.resources = resources
+        self.renderer.resources = resources
+        entity_store.configure(settings.entity_store_backend)
+
+        if settings.lua_execution_mode == "workers":
+            from src.lua.workers import LuaWorkerPool
+            self.lua_manager = LuaWorkerPool(self.resources)
+        else:
+            from src.lua.manager import LuaManager
+            self.lua_manager = LuaManager(self.resources)
+
+        # Спрайты декодируются в фоне, пока создаются остальные объекты
+        self.sprite_cache.preload(self.resources)
+
+        if settings.hot_reload:
+            if settings.lua_execution_mode != "workers":
+                from src.resource.hot_reload import HotReloader
+                self.hot_reloader = HotReloader(self.resources, self.lua_manager)
+                self.hot_reloader.start()
+            else:
+                logger.warning("Hot reload is not supported with lua_execution_mode: workers")
+
+        # Entity со спрайтом появляются на экране в позиции из YAML
+        animation_engine.event_handler = lambda *args: self.lua_manager.execute_all("on_frame_event", *args)
+        for qualified_id, entity in entity_registry.entities.items():
+            if entity.sprite:
+                entity_store.ensure(qualified_id)
+                if entity.default_animation:
+                    animation_engine.play(qualified_id, str(entity.default_animation))
+        save_manager.restore_entities()
+
+        # Call on_startup for all scripts if exists
+        self.lua_manager.execute_all("on_startup")
+
+        if self.resources.materializer is not None and settings.content_pack_memory_budget_mb > 0:
+            # Проверка бюджета памяти паков раз в 5 секунд
+            GlobalTimer.subscribe(self.resources.materializer, rate=0.2)
+        if save_manager.enabled:
+            save_manager.start()
+            GlobalTimer.subscribe(save_manager, rate=1.0 / max(settings.save_interval, 0.01))
+        self.tray_icon.setToolTip("")
+        self.startup.mark("packs")
 
     def global_update(self, delta_time: float):
-        if not self.is_paused:
-            self.lua_manager.execute_all("on_update", delta_time)
+        if not self.is_paused and self.lua_manager is not None:
+            self.lua_manager.update(delta_time)
+            animation_engine.update(delta_time)
+            entity_store.update(delta_time)
+            self.renderer.sync()
+            if self.renderer.items:
+                self.startup.mark("first_frame")
 
     def toggle_pause(self):
         self.is_paused = not self.is_paused
         if self.is_paused:
             self.pause_action.setText("Resume")
-            GlobalTimer.stop()
         else:
             self.pause_action.setText("Pause")
+
+        if settings.global_timer_idle:
+            # Таймер не останавливается: подписчики с собственным rate продолжают работать на паузе
+            GlobalTimer.set_idle_reason("paused", self.is_paused)
+            if not self.is_paused:
+                GlobalTimer.mark_active()
+        elif self.is_paused:
+            GlobalTimer.stop()
+        else:
             GlobalTimer.start()
 
+    def toggle_profiler(self):
+        if profiler.enabled:
+            profiler.stop()
+            self.profiler_action.setText("Start profiler")
+        else:
+            profiler.clear()
+            profiler.start(settings.profiler_capacity)
+            self.profiler_action.setText("Stop profiler")
+
+    def export_profile(self, path: Optional[str] = None):
+        if not path:
+            path = Path(settings.profiler_directory) / f"trace-{datetime.now():%Y%m%d-%H%M%S}.json"
+        profiler.export_chrome_trace(Path(path))
+        logger.info(f"Top scripts by time:\n{profiler.format_top_scripts()}")
+
     def exit_app(self):
         # Call on_exit for all scripts if exists
-        self.lua_manager.execute_all("on_exit")
+        if self.lua_manager is not None:
+            self.lua_manager.execute_all("on_exit")
+            self.lua_manager.shutdown()
+        # После on_exit: скрипты успевают записать последнее состояние
+        save_manager.shutdown()
+        self.renderer.close()
+        self.sprite_cache.shutdown()
+        if self.profile_output is not None:
+            self.export_profile(self.profile_output)
+        script_log.flush()
+        logger_setup.shutdown()
         self.quit()
\ No newline at end of file
@@ -0,0 +1,198 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.entity_registry import EntityRegistry, entity_registry
+from src.core.entity_store import EntityHandle, EntityStore, entity_store
+from src.core.logger import logger
+
+# Событие конца клипа once
+END_EVENT = "end"
+# Допуск на накопление ошибки float: 3 * 0.1 чуть больше 0.3
+EPSILON = 1e-9
+
+
+class Timeline:
+    """
+    Клип, развёрнутый в последовательность шагов: кадр атласа, момент конца шага
+    (накопленная сумма длительностей) и события шага. ping_pong разворачивается в
+    прямой и обратный проход без повтора крайних кадров.
+    """
+    __slots__ = ("frames", "ends", "events", "length", "loop", "animated")
+
+    MODES = ("once", "loop", "ping_pong")
+
+    def __init__(self, frames: List[int], durations: List[float], events: List[Tuple[str, ...]], loop: bool):
+        self.frames = frames
+        self.ends = list(accumulate(durations))
+        self.events = events
+        self.length = self.ends[-1]
+        self.loop = loop
+        # Зацикленный клип из одного кадра без событий ничего не меняет и не мешает простою таймера
+        self.animated = not loop or len(set(frames)) > 1 or any(events)
+
+    @classmethod
+    def compile(cls, clip, name: str = "") -> Optional["Timeline"]:
+        frames = list(clip.frames or ())
+        if not frames:
+            logger.error(f"Animation {name}: no frames")
+            return None
+        mode = clip.mode if clip.mode in cls.MODES else "loop"
+        if mode != clip.mode:
+            logger.error(f"Animation {name}: invalid mode {clip.mode}, use 'loop'")
+
+        if clip.durations:
+            durations = [float(clip.durations[min(i, len(clip.durations) - 1)]) for i in range(len(frames))]
+        else:
+            durations = [1.0 / clip.fps if clip.fps > 0 else 0.1] * len(frames)
+        if min(durations) <= 0:
+            logger.error(f"Animation {name}: frame durations must be positive")
+            return None
+
+        positions = list(range(len(frames)))
+        if mode == "ping_pong":
+            positions += list(range(len(frames) - 2, 0, -1))
+        events = clip.events or {}
+        return cls([frames[p] for p in positions], [durations[p] for p in positions],
+                   [(str(events[p]),) if p in events else () for p in positions], mode != "once")
+
+
+class _Playback:
+    __slots__ = ("handle", "clip", "timeline", "time", "step", "speed")
+
+    def __init__(self, handle: EntityHandle, clip: str, timeline: Timeline, speed: float):
+        self.handle = handle
+        self.clip = clip
+        self.timeline = timeline
+        self.time = 0.0
+        self.step = 0
+        self.speed = speed
+
+
+class AnimationEngine:
+    """
+    Проигрывание клипов из ModelEntity.animations для entity из EntityStore.
+
+    Клип компилируется в Timeline один раз на entity. update(dt) за один проход двигает
+    все активные анимации и пишет колонку frame EntityStore только при смене кадра, так что
+    перерисовка запрашивается только для изменившихся entity. События кадров (и "end" в
+    конце клипа once) собираются за проход и передаются в event_handler(entity_id, event, clip).
+    is_animating() - проверка активности для простоя GlobalTimer.
+    """
+
+    def __init__(self, store: EntityStore = entity_store, registry: EntityRegistry = entity_registry):
+        self.logger = logger
+        self.store = store
+        self.registry = registry
+        self.event_handler: Optional[Callable[[str, str, str], None]] = None
+        self._playing: Dict[str, _Playback] = {}
+        # (id entity, клип) -> (entity, из которого собран, Timeline)
+        self._timelines: Dict[Tuple[str, str], Tuple[object, Timeline]] = {}
+
+    def timeline(self, qualified_id: str, clip: str) -> Optional[Timeline]:
+        entity = self.registry.get(qualified_id)
+        if entity is None or clip not in (entity.animations or {}):
+            return None
+        cached = self._timelines.get((qualified_id, clip))
+        # После горячей перезагрузки в реестре новый объект entity - клип собирается заново
+        if cached is not None and cached[0] is entity:
+            return cached[1]
+        timeline = Timeline.compile(entity.animations[clip], f"{qualified_id}:{clip}")
+        if timeline is not None:
+            self._timelines[(qualified_id, clip)] = (entity, timeline)
+        return timeline
+
+    def play(self, qualified_id: str, clip: str, speed: float = 1.0, restart: bool = False) -> bool:
+        playback = self._playing.get(qualified_id)
+        if playback is not None and playback.clip == clip and playback.handle.alive and not restart:
+            playback.speed = speed
+            return True
+
+        timeline = self.timeline(qualified_id, clip)
+        if timeline is None:
+            self.logger.warning(f"Animation {clip} not found for entity {qualified_id}")
+            return False
+        handle = self.store.ensure(qualified_id)
+        if handle is None:
+            return False
+
+        playback = self._playing[qualified_id] = _Playback(handle, clip, timeline, speed)
+        handle.frame = timeline.frames[0]
+        if timeline.events[0] and self.event_handler is not None:
+            for event in timeline.events[0]:
+                self.event_handler(qualified_id, event, clip)
+        return True
+
+    def stop(self, qualified_id: str, frame: Optional[int] = None):
+        """Остановка на текущем кадре или на заданном"""
+        playback = self._playing.pop(qualified_id, None)
+        if playback is not None and frame is not None and playback.handle.alive:
+            playback.handle.frame = int(frame)
+
+    def playing(self, qualified_id: str) -> Optional[str]:
+        playback = self._playing.get(qualified_id)
+        return None if playback is None else playback.clip
+
+    def is_animating(self) -> bool:
+        """Есть клип, который меняет кадры или генерирует события"""
+        return any(playback.timeline.animated for playback in self._playing.values())
+
+    def clear(self):
+        self._playing.clear()
+        self._timelines.clear()
+
+    def update(self, delta_time: float) -> int:
+        """Возвращает число entity, у которых сменился кадр"""
+        fired: List[Tuple[str, str, str]] = []
+        finished: List[str] = []
+        changed = 0
+        frames = self.store.columns["frame"]
+
+        for qualified_id, playback in self._playing.items():
+            handle = playback.handle
+            if handle.slot < 0:
+                finished.append(qualified_id)
+                continue
+            timeline = playback.timeline
+            playback.time += delta_time * playback.speed
+            step = playback.step
+            if playback.time + EPSILON < timeline.ends[step]:
+                continue
+
+            ends = timeline.ends
+            last = len(ends) - 1
+            events = timeline.events
+            while playback.time + EPSILON >= ends[step]:
+                if step == last:
+                    if not timeline.loop:
+                        finished.append(qualified_id)
+                        fired.append((qualified_id, END_EVENT, playback.clip))
+                        break
+                    playback.time -= timeline.length
+                    if playback.time + EPSILON >= timeline.length:
+                        # Пропущено больше целого круга (например, после простоя): события не повторяются
+                        playback.time %= timeline.length
+                        step = bisect_right(ends, playback.time)
+                        break
+                    step = 0
+                else:
+                    step += 1
+                for event in events[step]:
+                    fired.append((qualified_id, event, playback.clip))
+
+            if step != playback.step:
+                playback.step = step
+                frame = timeline.frames[step]
+                if frames[handle.slot] != frame:
+                    frames[handle.slot] = frame
+                    changed += 1
+
+        for qualified_id in finished:
+            self._playing.pop(qualified_id, None)
+        if fired and self.event_handler is not None:
+            for qualified_id, event, clip in fired:
+                self.event_handler(qualified_id, event, clip)
+        return changed
+
+
+animation_engine = AnimationEngine()
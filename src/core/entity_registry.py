@@ -0,0 +1,128 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.logger import logger
+from src.core.spatial_index import SpatialGrid
+
+
+def parse_vector(values: Optional[Sequence[Any]], default: Tuple[float, float] = (0.0, 0.0)) -> Tuple[float, float]:
+    """position/size из YAML хранятся строками: ["10", "20"] -> (10.0, 20.0)"""
+    if not values or len(values) < 2:
+        return default
+    try:
+        return float(values[0]), float(values[1])
+    except (TypeError, ValueError):
+        return default
+
+
+class EntityRegistry:
+    """
+    Все загруженные entity по полному id "<content_pack_id>.<entity_id>".
+
+    Вторичные индексы по паку и тегу и SpatialGrid по прямоугольникам entity
+    (position + size) для запросов "что под точкой / в области / в радиусе".
+    """
+
+    def __init__(self, cell_size: float = 128.0):
+        self.logger = logger
+        self.entities: Dict[str, Any] = {}
+        self._by_pack: Dict[str, Dict[str, None]] = {}
+        self._by_tag: Dict[str, Dict[str, None]] = {}
+        self.spatial = SpatialGrid(cell_size)
+        # EntityStore.sync_spatial: позиции, сдвинутые update(), попадают в spatial перед запросом
+        self.syncer: Optional[Callable[[], None]] = None
+
+    def _sync(self):
+        if self.syncer is not None:
+            self.syncer()
+
+    def configure(self, cell_size: float):
+        if cell_size == self.spatial.cell_size:
+            return
+        self._sync()
+        old, self.spatial = self.spatial, SpatialGrid(cell_size)
+        for qualified_id in self.entities:
+            self.spatial.insert(qualified_id, *old.bounds(qualified_id))
+
+    @staticmethod
+    def qualified_id(content_pack_id: str, entity_id: str) -> str:
+        return f"{content_pack_id}.{entity_id}"
+
+    def register(self, entity) -> str:
+        qualified_id = self.qualified_id(entity.content_pack_id, entity.id)
+        if qualified_id in self.entities:
+            self._unindex(qualified_id)
+
+        self.entities[qualified_id] = entity
+        self._by_pack.setdefault(entity.content_pack_id, {})[qualified_id] = None
+        for tag in entity.tags or ():
+            self._by_tag.setdefault(tag, {})[qualified_id] = None
+
+        x, y = parse_vector(entity.position)
+        width, height = parse_vector(entity.size)
+        self.spatial.insert(qualified_id, x, y, width, height)
+        return qualified_id
+
+    def _unindex(self, qualified_id: str):
+        entity = self.entities[qualified_id]
+        for index, key in ((self._by_pack, entity.content_pack_id), *((self._by_tag, tag) for tag in entity.tags or ())):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(qualified_id, None)
+                if not ids:
+                    del index[key]
+        self.spatial.remove(qualified_id)
+
+    def unregister(self, qualified_id: str):
+        if qualified_id in self.entities:
+            self._unindex(qualified_id)
+            del self.entities[qualified_id]
+
+    def register_content_pack(self, content_pack):
+        """Заменяет entity пака на текущие content_pack.entities"""
+        self.unregister_content_pack(content_pack.id)
+        for entity in (content_pack.entities or {}).values():
+            self.register(entity)
+
+    def unregister_content_pack(self, content_pack_id: str):
+        for qualified_id in list(self._by_pack.get(content_pack_id, ())):
+            self.unregister(qualified_id)
+
+    def clear(self):
+        self.entities.clear()
+        self._by_pack.clear()
+        self._by_tag.clear()
+        self.spatial = SpatialGrid(self.spatial.cell_size)
+
+    def get(self, qualified_id: str):
+        return self.entities.get(qualified_id)
+
+    def by_pack(self, content_pack_id: str) -> List[str]:
+        return list(self._by_pack.get(content_pack_id, ()))
+
+    def by_tag(self, tag: str) -> List[str]:
+        return list(self._by_tag.get(tag, ()))
+
+    def bounds(self, qualified_id: str) -> Tuple[float, float, float, float]:
+        self._sync()
+        return self.spatial.bounds(qualified_id)
+
+    def move(self, qualified_id: str, x: float, y: float, width: Optional[float] = None,
+             height: Optional[float] = None):
+        """Обновляет положение в пространственном индексе (ячейки меняются, только если entity их покинул)"""
+        self.spatial.move(qualified_id, float(x), float(y),
+                          None if width is None else float(width), None if height is None else float(height))
+
+    def at_point(self, x: float, y: float) -> List[str]:
+        self._sync()
+        return self.spatial.query_point(x, y)
+
+    def in_rect(self, x: float, y: float, width: float, height: float) -> List[str]:
+        self._sync()
+        return self.spatial.query_rect(x, y, width, height)
+
+    def in_radius(self, x: float, y: float, radius: float) -> List[str]:
+        self._sync()
+        return self.spatial.query_radius(x, y, radius)
+
+
+entity_registry = EntityRegistry()
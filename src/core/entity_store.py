@@ -0,0 +1,358 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from src.core.entity_registry import EntityRegistry, entity_registry, parse_vector
+from src.core.logger import logger
+from src.core.spatial_index import OVERSIZED
+
+# numpy (~0.1 с на импорт) загружается при первом configure с backend auto или numpy
+numpy = None
+_numpy_checked = False
+
+
+def load_numpy():
+    """Импорт numpy по требованию; None - не установлен"""
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy, _numpy_checked = module, True
+    return numpy
+
+# flags
+FLAG_CLAMP = 1   # удерживать внутри bounds
+FLAG_STATIC = 2  # не двигать в update()
+FLAG_HIDDEN = 4  # не отрисовывать
+
+# колонка -> (typecode array, dtype numpy)
+COLUMNS = {
+    "x": ("d", "float64"),
+    "y": ("d", "float64"),
+    "vx": ("d", "float64"),
+    "vy": ("d", "float64"),
+    "width": ("d", "float64"),
+    "height": ("d", "float64"),
+    "frame": ("i", "int32"),
+    "flags": ("I", "uint32"),
+    # 1 - позиция изменилась в update() и ещё не перенесена в пространственный индекс
+    "grid_stale": ("B", "uint8"),
+}
+
+
+class EntityHandle:
+    """Лёгкая ссылка на строку EntityStore; после despawn slot == -1"""
+    __slots__ = ("store", "slot", "id")
+
+    def __init__(self, store: "EntityStore", slot: int, qualified_id: str):
+        self.store = store
+        self.slot = slot
+        self.id = qualified_id
+
+    @property
+    def alive(self) -> bool:
+        return self.slot >= 0
+
+    def _get(self, column: str):
+        return self.store.columns[column][self.slot]
+
+    def _set(self, column: str, value):
+        self.store.columns[column][self.slot] = value
+
+    x = property(lambda self: float(self._get("x")))
+    y = property(lambda self: float(self._get("y")))
+    vx = property(lambda self: float(self._get("vx")), lambda self, value: self._set("vx", value))
+    vy = property(lambda self: float(self._get("vy")), lambda self, value: self._set("vy", value))
+    width = property(lambda self: float(self._get("width")))
+    height = property(lambda self: float(self._get("height")))
+    frame = property(lambda self: int(self._get("frame")), lambda self, value: self._set("frame", value))
+    flags = property(lambda self: int(self._get("flags")), lambda self, value: self._set("flags", value))
+
+    def set_position(self, x: float, y: float):
+        self.store.set_position(self.slot, x, y)
+
+    def set_size(self, width: float, height: float):
+        self.store.set_size(self.slot, width, height)
+
+    def set_velocity(self, vx: float, vy: float):
+        self._set("vx", vx)
+        self._set("vy", vy)
+
+    def __repr__(self):
+        return f"EntityHandle({self.id!r}, slot={self.slot})"
+
+
+class EntityStore:
+    """
+    Горячее состояние entity во время работы: колонки (struct of arrays) вместо полей ModelEntity.
+
+    Колонки - массивы numpy, если он установлен и backend не "array", иначе array.array.
+    Строки плотные: despawn переносит последнюю строку на место удалённой и обновляет её handle.
+    update(dt) двигает все entity одним проходом по колонкам и прижимает entity с FLAG_CLAMP
+    к bounds. Сдвинутые entity только помечаются в колонке grid_stale: пространственный индекс
+    EntityRegistry досинхронизируется лениво, перед первым запросом к нему (sync_spatial).
+    """
+    BACKENDS = ("auto", "numpy", "array")
+
+    def __init__(self, backend: str = "auto", registry: Optional[EntityRegistry] = None, capacity: int = 64):
+        self.logger = logger
+        self.registry = registry
+        # (min_x, min_y, max_x, max_y); None - без ограничения
+        self.bounds: Optional[Tuple[float, float, float, float]] = None
+        self.count = 0
+        self.capacity = 0
+        self.columns: Dict[str, object] = {}
+        self.handles: List[EntityHandle] = []
+        self._slots: Dict[str, int] = {}
+        # Сдвинуто последним update(): пока entity движутся, GlobalTimer не уходит в простой
+        self.last_moved = 0
+        # Есть строки с grid_stale: следующий запрос к EntityRegistry сначала вызовет sync_spatial
+        self._grid_dirty = False
+        self.configure(backend, capacity)
+        if registry is not None:
+            registry.syncer = self.sync_spatial
+
+    def configure(self, backend: str = "auto", capacity: Optional[int] = None):
+        if backend not in self.BACKENDS:
+            self.logger.error(f"Invalid entity store backend: {backend}, use 'auto'")
+            backend = "auto"
+        if backend != "array":
+            load_numpy()
+        if backend == "numpy" and numpy is None:
+            self.logger.warning("numpy is not installed, entity store uses array backend")
+        use_numpy = numpy is not None and backend != "array"
+
+        old_columns, old_count = self.columns, self.count
+        self.backend = "numpy" if use_numpy else "array"
+        self.capacity = max(capacity or self.capacity, old_count, 1)
+        self.columns = {name: self._allocate(name, self.capacity) for name in COLUMNS}
+        for name, column in old_columns.items():
+            for slot in range(old_count):
+                self.columns[name][slot] = column[slot]
+
+    def _allocate(self, name: str, size: int):
+        typecode, dtype = COLUMNS[name]
+        if self.backend == "numpy":
+            return numpy.zeros(size, dtype=dtype)
+        return array(typecode, bytes(array(typecode).itemsize * size))
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name, column in self.columns.items():
+            grown = self._allocate(name, capacity)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, qualified_id: str):
+        return qualified_id in self._slots
+
+    def memory_bytes(self) -> int:
+        """Память колонок (с учётом запаса capacity)"""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+    def spawn(self, qualified_id: str, x: float = 0.0, y: float = 0.0, width: float = 0.0, height: float = 0.0,
+              vx: float = 0.0, vy: float = 0.0, flags: int = FLAG_CLAMP) -> EntityHandle:
+        slot = self._slots.get(qualified_id)
+        if slot is None:
+            if self.count == self.capacity:
+                self._grow()
+            slot = self.count
+            self.count += 1
+            self._slots[qualified_id] = slot
+            self.handles.append(EntityHandle(self, slot, qualified_id))
+
+        columns = self.columns
+        for name, value in (("x", x), ("y", y), ("vx", vx), ("vy", vy), ("width", width), ("height", height),
+                            ("frame", 0), ("flags", flags), ("grid_stale", 1)):
+            columns[name][slot] = value
+        self._grid_dirty = True
+        return self.handles[slot]
+
+    def ensure(self, qualified_id: str) -> Optional[EntityHandle]:
+        """Handle entity; загруженный, но ещё не созданный entity создаётся по position/size из YAML"""
+        slot = self._slots.get(qualified_id)
+        if slot is not None:
+            return self.handles[slot]
+        if self.registry is None:
+            return None
+        entity = self.registry.get(qualified_id)
+        if entity is None:
+            return None
+        x, y = parse_vector(entity.position)
+        width, height = parse_vector(entity.size)
+        return self.spawn(qualified_id, x, y, width, height)
+
+    def get(self, qualified_id: str) -> Optional[EntityHandle]:
+        slot = self._slots.get(qualified_id)
+        return None if slot is None else self.handles[slot]
+
+    def despawn(self, qualified_id: str):
+        slot = self._slots.pop(qualified_id, None)
+        if slot is None:
+            return
+        last = self.count - 1
+        handle = self.handles[slot]
+        if slot != last:
+            for column in self.columns.values():
+                column[slot] = column[last]
+            moved = self.handles[last]
+            moved.slot = slot
+            self.handles[slot] = moved
+            self._slots[moved.id] = slot
+        self.handles.pop()
+        handle.slot = -1
+        self.count = last
+
+    def despawn_content_pack(self, content_pack_id: str):
+        prefix = f"{content_pack_id}."
+        for qualified_id in [qualified_id for qualified_id in self._slots if qualified_id.startswith(prefix)]:
+            self.despawn(qualified_id)
+
+    def clear(self):
+        for handle in self.handles:
+            handle.slot = -1
+        self.handles.clear()
+        self._slots.clear()
+        self.count = 0
+
+    def _sync(self, slot: int):
+        if self.registry is not None:
+            qualified_id = self.handles[slot].id
+            if qualified_id in self.registry.entities:
+                self.registry.move(qualified_id, self.columns["x"][slot], self.columns["y"][slot],
+                                   self.columns["width"][slot], self.columns["height"][slot])
+
+    def set_position(self, slot: int, x: float, y: float):
+        self.columns["x"][slot] = x
+        self.columns["y"][slot] = y
+        self._sync(slot)
+
+    def set_size(self, slot: int, width: float, height: float):
+        self.columns["width"][slot] = width
+        self.columns["height"][slot] = height
+        self._sync(slot)
+
+    def update(self, delta_time: float) -> int:
+        """Один шаг движения и ограничения bounds; возвращает число сдвинутых entity"""
+        if self.count == 0:
+            self.last_moved = 0
+            return 0
+        if self.backend == "numpy":
+            moved = self._update_numpy(delta_time)
+        else:
+            moved = self._update_array(delta_time)
+        self.last_moved = moved
+        if moved:
+            self._grid_dirty = True
+        return moved
+
+    def sync_spatial(self):
+        """
+        Переносит в пространственный индекс EntityRegistry строки с grid_stale. Ячейки для
+        backend numpy считаются векторно; ячейки индекса меняются только у entity, сменивших их.
+        """
+        if not self._grid_dirty:
+            return
+        self._grid_dirty = False
+        if self.registry is None or self.count == 0:
+            return
+        n = self.count
+        c = self.columns
+        handles = self.handles
+        spatial = self.registry.spatial
+        size = spatial.cell_size
+
+        if self.backend == "numpy":
+            stale = c["grid_stale"][:n]
+            slots = numpy.flatnonzero(stale)
+            stale[:] = 0
+            x, y, width, height = (c[name][slots] for name in ("x", "y", "width", "height"))
+            with numpy.errstate(invalid="ignore", over="ignore"):
+                cells = numpy.floor(numpy.stack((x, y, x + numpy.maximum(width, 0.0),
+                                                 y + numpy.maximum(height, 0.0))) / size)
+                # Как SpatialGrid._cell_range: inf/nan и больше MAX_CELLS ячеек - в список oversized
+                fits = numpy.isfinite(cells).all(axis=0) & (
+                    (cells[2] - cells[0] + 1) * (cells[3] - cells[1] + 1) <= spatial.MAX_CELLS)
+            cells = numpy.where(fits, cells, numpy.array(OVERSIZED, dtype=numpy.float64)[:, None])
+            ranges = zip(*cells.astype(numpy.int64).tolist())
+            bounds = zip(x.tolist(), y.tolist(), width.tolist(), height.tolist())
+            spatial.move_many([handles[slot].id for slot in slots.tolist()], bounds, ranges)
+            return
+
+        stale = c["grid_stale"]
+        x, y, width, height = c["x"], c["y"], c["width"], c["height"]
+        for slot in range(n):
+            if stale[slot]:
+                stale[slot] = 0
+                qualified_id = handles[slot].id
+                if qualified_id in spatial:
+                    spatial.move(qualified_id, x[slot], y[slot], width[slot], height[slot])
+
+    def _update_numpy(self, delta_time: float):
+        n = self.count
+        c = self.columns
+        x, y, vx, vy = c["x"][:n], c["y"][:n], c["vx"][:n], c["vy"][:n]
+        flags = c["flags"][:n]
+
+        active = (flags & FLAG_STATIC) == 0
+        dx = numpy.where(active, vx * delta_time, 0.0)
+        dy = numpy.where(active, vy * delta_time, 0.0)
+        old_x, old_y = x.copy(), y.copy()
+        x += dx
+        y += dy
+
+        if self.bounds is not None:
+            min_x, min_y, max_x, max_y = self.bounds
+            clamp = active & ((flags & FLAG_CLAMP) != 0)
+            clamped_x = numpy.clip(x, min_x, numpy.maximum(min_x, max_x - c["width"][:n]))
+            clamped_y = numpy.clip(y, min_y, numpy.maximum(min_y, max_y - c["height"][:n]))
+            hit_x = clamp & (clamped_x != x)
+            hit_y = clamp & (clamped_y != y)
+            # Скорость в стену гасится, чтобы entity не упирался в границу каждый тик
+            x[hit_x] = clamped_x[hit_x]
+            y[hit_y] = clamped_y[hit_y]
+            vx[hit_x] = 0.0
+            vy[hit_y] = 0.0
+
+        moved = (x != old_x) | (y != old_y)
+        c["grid_stale"][:n] |= moved
+        return int(numpy.count_nonzero(moved))
+
+    def _update_array(self, delta_time: float):
+        c = self.columns
+        x, y, vx, vy = c["x"], c["y"], c["vx"], c["vy"]
+        width, height, flags, stale = c["width"], c["height"], c["flags"], c["grid_stale"]
+        bounds = self.bounds
+        moved = 0
+        for slot in range(self.count):
+            flag = flags[slot]
+            if flag & FLAG_STATIC:
+                continue
+            old_x, old_y = x[slot], y[slot]
+            new_x = old_x + vx[slot] * delta_time
+            new_y = old_y + vy[slot] * delta_time
+            if bounds is not None and flag & FLAG_CLAMP:
+                min_x, min_y, max_x, max_y = bounds
+                limit_x = max(min_x, max_x - width[slot])
+                limit_y = max(min_y, max_y - height[slot])
+                if new_x < min_x or new_x > limit_x:
+                    new_x = min(max(new_x, min_x), limit_x)
+                    vx[slot] = 0.0
+                if new_y < min_y or new_y > limit_y:
+                    new_y = min(max(new_y, min_y), limit_y)
+                    vy[slot] = 0.0
+            if new_x != old_x or new_y != old_y:
+                x[slot] = new_x
+                y[slot] = new_y
+                stale[slot] = 1
+                moved += 1
+        return moved
+
+
+# backend из настроек выставляет App (numpy импортируется в фоне вместе с загрузкой паков)
+entity_store = EntityStore(backend="array", registry=entity_registry)
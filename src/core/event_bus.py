@@ -0,0 +1,125 @@
+import itertools
+from time import perf_counter_ns
+from typing import AbstractSet, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.core.logger import logger
+
+
+class _Subscription:
+    __slots__ = ("id", "topic", "handler", "owner", "deliver")
+
+    def __init__(self, sub_id: int, topic: str, handler: Callable, owner: Optional[str], deliver: Optional[Callable]):
+        self.id = sub_id
+        self.topic = topic
+        self.handler = handler
+        self.owner = owner
+        # Как передать payload обработчику (например, сконвертировать в таблицу нужного LuaRuntime)
+        self.deliver = deliver
+
+
+class TopicStats:
+    __slots__ = ("emitted", "dispatched", "delivered", "latency_ns", "max_latency_ns")
+
+    def __init__(self):
+        self.emitted = 0
+        self.dispatched = 0
+        self.delivered = 0
+        self.latency_ns = 0
+        self.max_latency_ns = 0
+
+
+class EventBus:
+    """
+    Шина событий: topic -> подписчики.
+
+    emit() только кладёт событие в очередь; dispatch() раз за тик доставляет накопленное
+    пачкой. События, отправленные из обработчиков во время dispatch(), уходят в следующий тик.
+    """
+
+    def __init__(self):
+        self.logger = logger
+        self._topics: Dict[str, Dict[int, _Subscription]] = {}
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._queue: List[Tuple[str, Any, int]] = []
+        self._ids = itertools.count(1)
+        self.stats: Dict[str, TopicStats] = {}
+
+    def subscribe(self, topic: str, handler: Callable, owner: Optional[str] = None,
+                  deliver: Optional[Callable] = None) -> int:
+        subscription = _Subscription(next(self._ids), topic, handler, owner, deliver)
+        self._topics.setdefault(topic, {})[subscription.id] = subscription
+        self._subscriptions[subscription.id] = subscription
+        return subscription.id
+
+    def unsubscribe(self, sub_id: int, owner: Optional[str] = None) -> bool:
+        subscription = self._subscriptions.get(sub_id)
+        if subscription is None or (owner is not None and subscription.owner != owner):
+            return False
+        del self._subscriptions[sub_id]
+        handlers = self._topics.get(subscription.topic)
+        if handlers is not None:
+            handlers.pop(sub_id, None)
+            if not handlers:
+                del self._topics[subscription.topic]
+        return True
+
+    def owned(self, owner: str) -> Set[int]:
+        return {s.id for s in self._subscriptions.values() if s.owner == owner}
+
+    def unsubscribe_owner(self, owner: str, keep: AbstractSet[int] = frozenset()):
+        for sub_id in [s.id for s in self._subscriptions.values() if s.owner == owner and s.id not in keep]:
+            self.unsubscribe(sub_id)
+
+    def emit(self, topic: str, payload: Any = None):
+        stats = self.stats.get(topic)
+        if stats is None:
+            stats = self.stats[topic] = TopicStats()
+        stats.emitted += 1
+        # Событие без подписчиков не ставим в очередь
+        if topic in self._topics:
+            self._queue.append((topic, payload, perf_counter_ns()))
+
+    def dispatch(self):
+        if not self._queue:
+            return
+        queue, self._queue = self._queue, []
+
+        for topic, payload, emitted_at in queue:
+            handlers = self._topics.get(topic)
+            if not handlers:
+                continue
+            stats = self.stats[topic]
+            latency = perf_counter_ns() - emitted_at
+            stats.dispatched += 1
+            stats.latency_ns += latency
+            if latency > stats.max_latency_ns:
+                stats.max_latency_ns = latency
+
+            for subscription in list(handlers.values()):
+                try:
+                    if subscription.deliver is None:
+                        subscription.handler(payload)
+                    else:
+                        subscription.deliver(subscription.handler, payload)
+                    stats.delivered += 1
+                except Exception as e:
+                    self.logger.error(f"Error delivering <{topic}> to {subscription.owner or subscription.handler}: {e}")
+
+    def global_update(self, delta_time: float):
+        self.dispatch()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            topic: {
+                "emitted": stats.emitted,
+                "dispatched": stats.dispatched,
+                "delivered": stats.delivered,
+                "subscribers": len(self._topics.get(topic, ())),
+                "avg_latency_ms": stats.latency_ns / stats.dispatched / 1e6 if stats.dispatched else 0.0,
+                "max_latency_ms": stats.max_latency_ns / 1e6,
+            }
+            for topic, stats in self.stats.items()
+        }
+
+
+event_bus = EventBus()
@@ -1,40 +1,255 @@
-from PySide6.QtCore import QTimer
+from collections import deque
+from time import perf_counter_ns, process_time_ns
+from typing import Callable, Optional
+
+from PySide6.QtCore import QTimer, Qt
+
+from src.core.profiler import profiler
+from src.core.timer_wheel import TimerWheel
 
 
 class GlobalTimer:
+    """
+    Общий таймер приложения на монотонных часах (perf_counter_ns).
+
+    variable - подписчики получают реальное прошедшее время (не больше max_delta_time или
+    интервала таймера в простое).
+    fixed - симуляция идёт шагами 1 / ticks_per_second через аккумулятор; после зависания
+    выполняется не больше max_catch_up_steps шагов, остальное отбрасывается.
+    get_alpha() - доля следующего шага для интерполяции при отрисовке.
+
+    Подписчик с rate (Гц) вызывается только в свои тики через TimerWheel и получает время,
+    прошедшее с его прошлого вызова. Пока есть причина простоя (paused, hidden, inactive -
+    нет ввода дольше idle_timeout и ни одна проверка add_activity_check не сообщает о движении
+    или анимации), таймер просыпается с idle_ticks_per_second; mark_active() сразу возвращает
+    полную частоту. В простое меняется только интервал таймера: шаг fixed остаётся
+    1 / ticks_per_second, за пробуждение выполняются все накопившиеся шаги (до max_catch_up_steps
+    на каждый пропущенный тик полной частоты), и время симуляции идёт с реальной скоростью.
+    """
+    MODES = ("variable", "fixed")
+    STATS_WINDOW = 600
+
     _instance = None
     _timer = None
     _subscribers = []
     _last_time = 0
     _delta_time = 0
     _ticks_per_second = 60
+    _time = 0.0
+
+    _wheel = TimerWheel()
+    # подписчик -> (запись в колесе, rate)
+    _rated = {}
+
+    _idle_enabled = False
+    _idle_ticks_per_second = 2
+    _idle_timeout_ns = 5_000_000_000
+    _idle_reasons = set()
+    _last_activity = 0
+    # Проверки "что-то движется или анимируется": пока хоть одна True, inactive не наступает
+    _activity_checks = []
 
-    def __new__(cls, ticks_per_second=60):
+    _mode = "variable"
+    _max_catch_up_steps = 5
+    _max_delta_time = 0.25
+    _accumulator = 0.0
+    _alpha = 0.0
+
+    _tick_times = deque(maxlen=STATS_WINDOW)
+    _ticks = 0
+    _overruns = 0
+    _dropped_steps = 0
+    _wakeups = 0
+    _stats_since = 0
+    _cpu_since = 0
+
+    def __new__(cls, ticks_per_second=60, mode="variable", max_catch_up_steps=5,
+                idle=False, idle_ticks_per_second=2, idle_timeout=5.0):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._ticks_per_second = ticks_per_second
+            cls._mode = mode if mode in cls.MODES else "variable"
+            cls._max_catch_up_steps = max(1, int(max_catch_up_steps))
+            cls._idle_enabled = bool(idle)
+            cls._idle_ticks_per_second = max(1, idle_ticks_per_second)
+            cls._idle_timeout_ns = int(idle_timeout * 1e9)
             cls._timer = QTimer()
-            cls._last_time = cls._timer.remainingTime()
+            cls._timer.setTimerType(Qt.PreciseTimer)  # noqa
             cls._timer.timeout.connect(cls._update_all)
-            print(ticks_per_second)
-            interval = int(1000 / ticks_per_second)
-            cls._timer.start(interval)
+            cls._last_time = perf_counter_ns()
+            cls._last_activity = cls._last_time
+            cls.reset_stats()
+            cls._timer.start(cls._interval())
         return cls._instance
 
     @classmethod
-    def _update_all(cls):
-        current_time = cls._timer.remainingTime()
-        cls._delta_time = (current_time - cls._last_time) / 1000.0
-        cls._last_time = current_time
+    def _current_ticks_per_second(cls):
+        if cls._idle_reasons:
+            return min(cls._idle_ticks_per_second, cls._ticks_per_second)
+        return cls._ticks_per_second
 
-        for subscriber in cls._subscribers:
+    @classmethod
+    def _interval(cls) -> int:
+        return max(1, round(1000 / cls._current_ticks_per_second()))
+
+    @classmethod
+    def _period(cls, rate: float) -> int:
+        # В fixed колесо сдвигается каждым шагом симуляции, а их частота в простое не меняется
+        ticks = cls._ticks_per_second if cls._mode == "fixed" else cls._current_ticks_per_second()
+        return max(1, round(ticks / rate))
+
+    @classmethod
+    def _apply_rate(cls):
+        # Периоды в тиках зависят от частоты тиков; новые применяются со следующего срабатывания
+        for entry, rate in cls._rated.values():
+            entry.period = cls._period(rate)
+        if cls._timer and cls._timer.isActive():
+            cls._timer.setInterval(cls._interval())
+
+    @classmethod
+    def _dispatch(cls, delta_time: float):
+        cls._delta_time = delta_time
+        cls._time += delta_time
+        for subscriber in list(cls._subscribers):
             if hasattr(subscriber, 'global_update'):
-                subscriber.global_update(cls._delta_time)
+                subscriber.global_update(delta_time)
+
+        for entry in cls._wheel.advance():
+            subscriber = entry.item
+            subscriber_delta = cls._time - entry.last_time
+            entry.last_time = cls._time
+            if hasattr(subscriber, 'global_update'):
+                subscriber.global_update(subscriber_delta)
+
+    @classmethod
+    def _update_all(cls):
+        start = perf_counter_ns()
+        elapsed = (start - cls._last_time) / 1e9
+        cls._last_time = start
+        cls._wakeups += 1
+
+        if cls._idle_enabled:
+            cls._check_activity(start)
+
+        if cls._mode == "fixed":
+            step = 1.0 / cls._ticks_per_second
+            cls._accumulator += elapsed
+            # В простое одно пробуждение покрывает несколько шагов полной частоты
+            max_steps = cls._max_catch_up_steps * max(1, round(cls._ticks_per_second
+                                                               / cls._current_ticks_per_second()))
+            steps = 0
+            while cls._accumulator >= step and steps < max_steps:
+                cls._dispatch(step)
+                cls._accumulator -= step
+                steps += 1
+            if cls._accumulator >= step:
+                # Не догоняем после зависания бесконечно: лишние шаги пропускаем
+                dropped = int(cls._accumulator // step)
+                if not cls._idle_reasons:
+                    cls._dropped_steps += dropped
+                cls._accumulator -= dropped * step
+            cls._alpha = cls._accumulator / step
+        else:
+            # В простое интервал таймера больше max_delta_time: ограничение не должно замедлять время
+            cls._dispatch(min(elapsed, max(cls._max_delta_time, 1.0 / cls._current_ticks_per_second())))
+
+        duration = perf_counter_ns() - start
+        cls._tick_times.append(duration)
+        cls._ticks += 1
+        if duration > cls._interval() * 1_000_000:
+            cls._overruns += 1
+        if profiler.enabled:
+            profiler.record("tick", "timer", start, duration)
+
+    @classmethod
+    def _check_activity(cls, now: int):
+        inactive = "inactive" in cls._idle_reasons
+        if not inactive and now - cls._last_activity <= cls._idle_timeout_ns:
+            return
+        if any(check() for check in cls._activity_checks):
+            cls.mark_active()
+        elif not inactive:
+            cls.set_idle_reason("inactive", True)
+
+    @classmethod
+    def add_activity_check(cls, check: Callable[[], bool]):
+        """check() -> True, пока есть движение или анимация; опрашивается только после idle_timeout"""
+        if check not in cls._activity_checks:
+            cls._activity_checks.append(check)
+
+    @classmethod
+    def set_idle_reason(cls, reason: str, active: bool):
+        """Причина простоя: paused, hidden, inactive. Таймер в простое, пока есть хоть одна"""
+        if not cls._idle_enabled:
+            return
+        was_idle = bool(cls._idle_reasons)
+        if active:
+            cls._idle_reasons.add(reason)
+        else:
+            cls._idle_reasons.discard(reason)
+        if was_idle != bool(cls._idle_reasons):
+            cls._apply_rate()
+
+    @classmethod
+    def mark_active(cls):
+        """Ввод или анимация: сбрасывает таймер простоя и возвращает полную частоту"""
+        cls._last_activity = perf_counter_ns()
+        if "inactive" in cls._idle_reasons:
+            cls.set_idle_reason("inactive", False)
+
+    @classmethod
+    def is_idle(cls):
+        return bool(cls._idle_reasons)
 
     @classmethod
     def get_delta_time(cls):
         return cls._delta_time
 
+    @classmethod
+    def get_alpha(cls):
+        return cls._alpha
+
+    @classmethod
+    def get_mode(cls):
+        return cls._mode
+
+    @classmethod
+    def get_stats(cls):
+        """Время обработки тика по последним STATS_WINDOW тикам (мс) и счётчики перегрузок"""
+        samples = sorted(cls._tick_times)
+        count = len(samples)
+
+        def percentile(p):
+            return samples[min(count - 1, int(count * p))] / 1e6 if count else 0.0
+
+        wall = (perf_counter_ns() - cls._stats_since) / 1e9
+        cpu = (process_time_ns() - cls._cpu_since) / 1e9
+
+        return {
+            "ticks": cls._ticks,
+            "wakeups_per_second": cls._wakeups / wall if wall > 0 else 0.0,
+            "cpu_percent": cpu / wall * 100 if wall > 0 else 0.0,
+            "idle": bool(cls._idle_reasons),
+            "idle_reasons": sorted(cls._idle_reasons),
+            "mean_ms": sum(samples) / count / 1e6 if count else 0.0,
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": samples[-1] / 1e6 if count else 0.0,
+            "budget_ms": cls._interval(),
+            "overruns": cls._overruns,
+            "dropped_steps": cls._dropped_steps,
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        cls._tick_times.clear()
+        cls._ticks = 0
+        cls._overruns = 0
+        cls._dropped_steps = 0
+        cls._wakeups = 0
+        cls._stats_since = perf_counter_ns()
+        cls._cpu_since = process_time_ns()
+
     @classmethod
     def get_ticks_per_second(cls):
         return cls._ticks_per_second
@@ -42,19 +257,26 @@ class GlobalTimer:
     @classmethod
     def set_ticks_per_second(cls, ticks_per_second):
         cls._ticks_per_second = ticks_per_second
-        interval = int(1000 / ticks_per_second)
-        if cls._timer:
-            cls._timer.setInterval(interval)
+        cls._apply_rate()
 
     @classmethod
-    def subscribe(cls, subscriber):
-        if subscriber not in cls._subscribers:
+    def subscribe(cls, subscriber, rate: Optional[float] = None):
+        """rate - желаемая частота вызова в Гц; None - каждый тик"""
+        cls.unsubscribe(subscriber)
+        if rate is None:
             cls._subscribers.append(subscriber)
+            return
+        entry = cls._wheel.add(subscriber, cls._period(rate))
+        entry.last_time = cls._time
+        cls._rated[subscriber] = (entry, rate)
 
     @classmethod
     def unsubscribe(cls, subscriber):
         if subscriber in cls._subscribers:
             cls._subscribers.remove(subscriber)
+        rated = cls._rated.pop(subscriber, None)
+        if rated is not None:
+            cls._wheel.remove(rated[0])
 
     @classmethod
     def stop(cls):
@@ -65,5 +287,8 @@ class GlobalTimer:
     def start(cls, interval=None):
         if cls._timer:
             if interval is None:
-                interval = int(1000 / cls._ticks_per_second)
-            cls._timer.start(interval)
\ No newline at end of file
+                interval = cls._interval()
+            # Время на паузе не должно прийти одним большим dt
+            cls._last_time = perf_counter_ns()
+            cls._accumulator = 0.0
+            cls._timer.start(interval)
@@ -1,16 +1,64 @@
 # logger.py с дополнениями
 from loguru import logger as loguru_logger
+import json
 import sys
 import logging
+from collections import deque
+from datetime import datetime
 from pathlib import Path
 
 
+class RingBufferSink:
+    """
+    Последние записи в памяти; в файл (компактный JSONL) выгружаются только при записи
+    уровня trigger_level и выше. Запись в буфер - кортеж без сериализации, поэтому сбор
+    контекста для ошибки почти ничего не стоит, пока ошибки нет.
+    """
+
+    def __init__(self, log_dir: Path, capacity: int, trigger_level: str = "ERROR"):
+        self.log_dir = Path(log_dir)
+        self.records = deque(maxlen=capacity)
+        self.trigger_no = loguru_logger.level(trigger_level).no
+        self.dumps = 0
+
+    def __call__(self, message):
+        record = message.record
+        self.records.append((record["time"].timestamp(), record["level"].name, record["name"], record["line"],
+                             record["message"], record["extra"].get("script_id")))
+        if record["level"].no >= self.trigger_no:
+            self.dump()
+
+    def dump(self):
+        self.dumps += 1
+        path = self.log_dir / f"ring_{datetime.now():%Y-%m-%d_%H-%M-%S}_{self.dumps}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for time, level, name, line, message, script_id in self.records:
+                row = {"t": round(time, 3), "level": level, "at": f"{name}:{line}", "msg": message}
+                if script_id is not None:
+                    row["script"] = script_id
+                f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        self.records.clear()
+
+
 class LoggerSetup:
-    def __init__(self, log_dir="logs", level="DEBUG", format_string=None):
+    """
+    Профили логирования:
+        dev        - цветной stderr, backtrace/diagnose, файлы с построчным сбросом через очередь
+        production - уровни отсекаются до создания записи, stderr только с WARNING, без цвета,
+                     backtrace и diagnose, файл с буферизованной записью в вызывающем потоке
+    Профиль и каталог log_directory применяются configure() после загрузки настроек; до этого
+    действует dev только с stderr, файлы логов не создаются.
+    """
+    PROFILES = ("dev", "production")
+
+    def __init__(self, log_dir="data/logs", level="DEBUG", format_string=None):
         self.log_dir = Path(log_dir)
         self.level = level
         self.format_string = format_string or self._default_format()
         self.handlers = []
+        self.profile = "dev"
+        self.ring_buffer = None
         self._setup_done = False
 
     @staticmethod
@@ -47,6 +95,56 @@ class LoggerSetup:
         }
         self.handlers.append(handler)
 
+    @staticmethod
+    def _production_format():
+        return "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{line} - {message}"
+
+    def _add_production_handlers(self):
+        if sys.stderr:
+            self.handlers.append({"sink": sys.stderr, "format": self.format_string, "level": "WARNING",
+                                  "colorize": False, "backtrace": False, "diagnose": False})
+        self.handlers.append({"sink": self.log_dir / "app_{time}.log", "format": self.format_string,
+                              "level": self.level, "rotation": "10 MB", "retention": "30 days",
+                              "compression": "zip", "buffering": 64 * 1024,
+                              "backtrace": False, "diagnose": False})
+        self.handlers.append({"sink": self.log_dir / "errors_{time}.log", "format": self.format_string,
+                              "level": "ERROR", "rotation": "5 MB", "retention": "60 days",
+                              "compression": "zip", "backtrace": True, "diagnose": False})
+
+    def add_ring_buffer_handler(self, capacity: int, level: str = "DEBUG"):
+        self.ring_buffer = RingBufferSink(self.log_dir, capacity)
+        self.handlers.append({"sink": self.ring_buffer, "format": "{message}", "level": level,
+                              "colorize": False, "backtrace": False, "diagnose": False})
+
+    def configure(self, config):
+        """Пересоздаёт обработчики по log_profile, log_level и log_ring_buffer из настроек"""
+        profile = config.log_profile
+        if profile not in self.PROFILES:
+            loguru_logger.error(f"Invalid log profile: {profile}, use 'dev'")
+            profile = "dev"
+        self.profile = profile
+        self.log_dir = Path(config.log_directory)
+        self.level = config.log_level or ("DEBUG" if profile == "dev" else "INFO")
+        self.handlers = []
+        self.ring_buffer = None
+        if profile == "production":
+            self.format_string = self._production_format()
+            self._add_production_handlers()
+        else:
+            self.format_string = self._default_format()
+            self._add_default_handlers()
+        if config.log_ring_buffer > 0:
+            self.add_ring_buffer_handler(config.log_ring_buffer, config.log_ring_buffer_level)
+        self._setup_done = False
+        return self.setup()
+
+    def shutdown(self):
+        """Дописывает буферы и очереди файловых обработчиков"""
+        loguru_logger.remove()
+
+    def min_level_no(self) -> int:
+        return min((loguru_logger.level(handler["level"]).no for handler in self.handlers), default=0)
+
     def _setup_standard_logging_intercept(self):
         """Перехватывает стандартный logging и перенаправляет в loguru"""
 
@@ -66,27 +164,31 @@ class LoggerSetup:
                     level, record.getMessage()
                 )
 
+        # Записи stdlib ниже всех обработчиков не создаются вовсе
+        level = self.min_level_no()
         handler = InterceptHandler()
-        handler.setLevel(logging.DEBUG)
+        handler.setLevel(level)
 
-        logging.basicConfig(handlers=[handler], level=logging.DEBUG, force=True)
+        logging.basicConfig(handlers=[handler], level=level, force=True)
 
         # Для lupa и других библиотек
         for lib_name in ['lupa']:
             lib_logger = logging.getLogger(lib_name)
             lib_logger.handlers = [handler]
             lib_logger.propagate = False
-            lib_logger.setLevel(logging.DEBUG)
+            lib_logger.setLevel(level)
 
-    def setup(self):
+    def setup(self, files: bool = True):
+        """files=False - только stderr (до configure(), когда каталог логов ещё неизвестен)"""
         if self._setup_done:
             return loguru_logger
 
-        self.log_dir.mkdir(exist_ok=True)
         loguru_logger.remove()
 
         if not self.handlers:
-            self._add_default_handlers()
+            self._add_default_handlers(files)
+        if any(isinstance(handler["sink"], Path) for handler in self.handlers) or self.ring_buffer is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
 
         for handler in self.handlers:
             loguru_logger.add(**handler)
@@ -97,12 +199,15 @@ class LoggerSetup:
         self._setup_done = True
         return loguru_logger
 
-    def _add_default_handlers(self):
+    def _add_default_handlers(self, files: bool = True):
         if sys.stderr:
             self.add_console_handler()
+        if not files:
+            return
         self.add_file_handler("app_{time}.log")
         self.add_file_handler("errors_{time}.log", level="ERROR", rotation="5 MB", retention="60 days")
 
 
-# Глобальный логгер
-logger = LoggerSetup().setup()
\ No newline at end of file
+# Глобальный логгер; файлы в log_directory подключает logger_setup.configure(settings)
+logger_setup = LoggerSetup()
+logger = logger_setup.setup(files=False)
@@ -1,5 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import AnyStr, List, SupportsInt
+from typing import AnyStr, Dict, List, Optional, SupportsInt
+
+
+class ModelLuaBudget(BaseModel):
+    # None - взять значение из более общего уровня, 0 - без ограничения
+    instructions: Optional[int] = None # на один вызов хука
+    time_ms: Optional[float] = None # на один вызов хука
+    tick_time_ms: Optional[float] = None # на скрипт за тик
 
 
 class ModelSettings(BaseModel):
@@ -7,9 +14,98 @@ class ModelSettings(BaseModel):
 
     content_packs_dirs: List[AnyStr] = Field(default=["data/content_packs"]) # noqa
     save_directory: List[AnyStr] = Field(default=["data/saves"]) # noqa
+    # Журнал изменений таблиц save.register и позиций entity в первом каталоге save_directory
+    save_enabled: bool = True
+    save_entities: bool = True
+    save_interval: float = 1.0 # секунд между сборами изменений
+    save_fsync_interval: float = 1.0 # секунд между fsync журнала
+    save_compact_mb: float = 4.0 # журнал больше этого сворачивается в снимок
 
     log_directory: AnyStr = "data/logs"
+    # dev - цветной stderr, backtrace и diagnose; production - уровни отсекаются до форматирования, без цвета и diagnose
+    log_profile: str = "dev"
+    log_level: AnyStr = "" # "" - DEBUG для dev, INFO для production
+    # Последние N записей в памяти, выгружаются в JSONL только при ошибке (0 - выключено)
+    log_ring_buffer: int = 0
+    log_ring_buffer_level: AnyStr = "DEBUG"
+    # Вывод print скриптов: повторы подряд сворачиваются в счётчик, лимит строк в секунду и за сессию на скрипт
+    script_log_dedup: bool = True
+    script_log_dedup_interval: float = 10.0 # секунд между итогами по повторам
+    script_log_rate: float = 20.0 # строк в секунду, 0 - без ограничения
+    script_log_burst: int = 50
+    script_log_quota: int = 0 # строк за сессию, 0 - без ограничения
 
     file_name_for_content_pack: AnyStr = "info"
+    # Паки грузятся в фоновом потоке после появления трея; false - до трея, как раньше
+    startup_background_loading: bool = True
+    # Потоков загрузки паков: 0 - по умолчанию ThreadPoolExecutor (min(32, ядер + 4)), 1 - последовательно
+    loader_workers: int = 0
+    # Снимок проверенных info.yaml и entity .yaml по (путь, mtime, размер)
+    manifest_cache: bool = True
+    manifest_cache_file: AnyStr = "data/cache/manifests.bin"
+    # eager - все паки при запуске, lazy - при запуске только info.yaml, остальное при первом обращении
+    content_pack_loading: str = "eager"
+    # lazy: паки, загружаемые при запуске и не выгружаемые (вместе с зависимостями).
+    # Паки, упомянутые в сохранении, тоже загружаются при запуске, но могут быть выгружены
+    content_packs_active: List[AnyStr] = Field(default_factory=list) # noqa
+    # lazy: память Lua runtime загруженных паков, выше которой неиспользуемые выгружаются (0 - без ограничения)
+    content_pack_memory_budget_mb: float = 0
+    content_pack_min_idle: float = 60.0 # секунд без обращений до выгрузки
+    # Размер ячейки сетки пространственного индекса entity (в пикселях)
+    entity_grid_cell_size: float = 128.0
+    # Колонки EntityStore: auto - numpy, если установлен, иначе array
+    entity_store_backend: str = "auto"
+
+    # Спрайты в памяти (QPixmap) сверх бюджета выгружаются, начиная с давно не используемых
+    sprite_cache_budget_mb: float = 128
+    sprite_decode_workers: int = 2 # 0 - по умолчанию ThreadPoolExecutor
+    # Готовые атласы на диске: при следующем запуске PNG не декодируется
+    sprite_disk_cache: bool = True
+    sprite_cache_directory: AnyStr = "data/cache/sprites"
+    # overlay - одно прозрачное окно на монитор для всех entity, windows - окно на каждый entity
+    render_mode: str = "overlay"
 
     global_timer_tick: int = 24
+    # variable - реальный dt, fixed - фиксированный шаг симуляции с аккумулятором
+    global_timer_mode: str = "variable"
+    global_timer_max_catch_up_steps: int = 5
+    # Простой: на паузе, без видимых окон или без ввода, движения и анимации дольше idle_timeout (с) таймер тикает реже
+    global_timer_idle: bool = False
+    global_timer_idle_tick: int = 2
+    global_timer_idle_timeout: float = 5.0
+
+    # isolated - LuaRuntime на каждый скрипт, pack - один на content pack, global - один на всё.
+    # В isolated модуль, подключённый require из N скриптов, выполняется N раз (байткод общий)
+    lua_runtime_mode: str = "isolated"
+
+    lua_bytecode_cache: bool = True
+    lua_cache_directory: AnyStr = "data/cache/lua"
+    # Секрет подписи кэша байткода; должен лежать вне lua_cache_directory
+    lua_cache_key_file: AnyStr = "data/lua_cache.key"
+
+    # Счётчики вызовов и суммарное время функций Lua API
+    lua_api_stats: bool = False
+    # Трассировка вызовов Lua API: script_id, имя функции или "script_id:функция" -> логировать каждый N-й вызов
+    lua_api_trace: Dict[str, int] = Field(default_factory=dict) # noqa
+
+    # Ограничение CPU для хуков скриптов через debug.sethook
+    lua_watchdog: bool = True
+    lua_watchdog_step: int = 1000 # проверка каждые N инструкций
+    lua_budget: ModelLuaBudget = Field(default_factory=lambda: ModelLuaBudget(instructions=0, time_ms=100, tick_time_ms=0)) # noqa
+    lua_budget_hooks: Dict[str, ModelLuaBudget] = Field(default_factory=dict) # noqa
+    lua_budget_scripts: Dict[str, ModelLuaBudget] = Field(default_factory=dict) # noqa
+
+    # in_process - скрипты в главном процессе, workers - content pack в пуле процессов
+    lua_execution_mode: str = "in_process"
+    lua_workers: int = 0 # 0 - по числу ядер
+    lua_worker_timeout: float = 5.0 # секунд на ответ worker за тик
+    lua_worker_max_restarts: int = 5 # неудачных перезапусков подряд, после которых worker отключается
+
+    # Перезагрузка изменённых .lua/.yaml без перезапуска (только lua_execution_mode: in_process)
+    hot_reload: bool = False
+    hot_reload_debounce_ms: int = 100
+
+    # Профилировщик кадра: спаны тиков, хуков, загрузки и перезагрузки в кольцевом буфере
+    profiler: bool = False
+    profiler_capacity: int = 100000 # спанов в буфере
+    profiler_directory: AnyStr = "data/profiles"
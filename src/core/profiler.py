@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.logger import logger
+
+# (имя, категория, начало ns, длительность ns, id потока, args)
+Span = Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]
+
+
+class Profiler:
+    """
+    Профилировщик кадра: спаны тиков, хуков Lua, загрузки ресурсов и перезагрузок
+    в кольцевом буфере фиксированного размера.
+
+    Выключенный профилировщик стоит одну проверку enabled в месте вызова: точки
+    замера сами проверяют флаг до взятия времени. Спаны выгружаются в Chrome trace-event
+    JSON (открывается в Perfetto / chrome://tracing).
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.logger = logger
+        self.enabled = False
+        self._spans: deque = deque(maxlen=capacity)
+        self._origin_ns = perf_counter_ns()
+
+    def start(self, capacity: Optional[int] = None):
+        if capacity is not None and capacity != self._spans.maxlen:
+            self._spans = deque(self._spans, maxlen=capacity)
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def clear(self):
+        self._spans.clear()
+
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int,
+               args: Optional[Dict[str, Any]] = None):
+        # deque.append потокобезопасен, отдельная блокировка не нужна
+        self._spans.append((name, category, start_ns, duration_ns, threading.get_ident(), args))
+
+    @contextmanager
+    def span(self, name: str, category: str, args: Optional[Dict[str, Any]] = None):
+        """Для редких участков (загрузка, перезагрузка); в горячих местах - enabled + record()"""
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, perf_counter_ns() - start, args)
+
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        for name, category, start_ns, duration_ns, tid, args in self.spans():
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1000,
+                "dur": duration_ns / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        self.logger.info(f"Profiler: {len(self._spans)} spans exported to {path}")
+        return path
+
+    def top_scripts(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Скрипты по суммарному времени хуков в буфере"""
+        totals: Dict[str, List[int]] = {}
+        for _, category, _, duration_ns, _, args in self.spans():
+            if category != "lua" or not args:
+                continue
+            total = totals.setdefault(args["script"], [0, 0, 0])
+            total[0] += duration_ns
+            total[1] += 1
+            total[2] = max(total[2], duration_ns)
+
+        top = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [
+            {
+                "script": script_id,
+                "total_ms": total_ns / 1e6,
+                "calls": calls,
+                "mean_ms": total_ns / calls / 1e6,
+                "max_ms": max_ns / 1e6,
+            }
+            for script_id, (total_ns, calls, max_ns) in top
+        ]
+
+    def format_top_scripts(self, limit: int = 10) -> str:
+        lines = [f"{'script':<40} {'total ms':>10} {'calls':>8} {'mean ms':>9} {'max ms':>9}"]
+        for row in self.top_scripts(limit):
+            lines.append(f"{row['script']:<40} {row['total_ms']:>10.2f} {row['calls']:>8} "
+                         f"{row['mean_ms']:>9.3f} {row['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+
+profiler = Profiler()
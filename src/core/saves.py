@@ -0,0 +1,397 @@
+"""
+Сохранение состояния скриптов (save.register) и позиций entity.
+
+Файлы в каталоге сохранений (little-endian):
+    snapshot.bin  SNAPSHOT_MAGIC | версия u16 | pickle (seq, {scope: {ключ: значение}})
+    journal.bin   JOURNAL_MAGIC | версия u16 | записи
+    запись        длина u32 | crc32 u32 | pickle (seq, scope, {ключ: значение, None - удалён})
+
+Журнал только дописывается. Снимок пишется во временный файл и атомарно заменяет старый,
+после чего журнал начинается заново; при загрузке к снимку применяются записи журнала с
+seq больше, чем в снимке, а оборванная запись в конце журнала отбрасывается.
+"""
+import os
+import pickle
+import struct
+import zlib
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import monotonic, perf_counter_ns
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.core.entity_store import EntityStore, entity_store
+from src.core.logger import logger
+from src.core.profiler import profiler
+
+SNAPSHOT_MAGIC = b"VPSS"
+JOURNAL_MAGIC = b"VPSJ"
+SAVE_VERSION = 1
+
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<II")
+
+# Позиции entity: id -> (x, y)
+ENTITIES_SCOPE = "entities"
+
+# scope -> ключ -> значение
+SaveState = Dict[str, Dict[Any, Any]]
+Changes = List[Tuple[str, Dict[Any, Any]]]
+
+
+def _apply(state: SaveState, scope: str, values: Dict[Any, Any]):
+    scope_state = state.setdefault(scope, {})
+    for key, value in values.items():
+        if value is None:
+            scope_state.pop(key, None)
+        else:
+            scope_state[key] = value
+
+
+class SaveJournal:
+    """Снимок и журнал одного каталога; используется из одного потока"""
+
+    def __init__(self, directory: Path):
+        self.logger = logger
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / "snapshot.bin"
+        self.journal_path = self.directory / "journal.bin"
+        self.state: SaveState = {}
+        self.seq = 0
+        self.journal_bytes = 0
+        self.records = 0
+        self._file = None
+
+    def replay(self) -> SaveState:
+        self.state, self.seq = self._read_snapshot()
+        snapshot_seq = self.seq
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return self.state
+
+        position = HEADER.size
+        if len(data) < HEADER.size or HEADER.unpack_from(data, 0) != (JOURNAL_MAGIC, SAVE_VERSION):
+            self.logger.error(f"Rejected invalid save journal {self.journal_path}")
+            return self.state
+        while position + RECORD.size <= len(data):
+            length, crc = RECORD.unpack_from(data, position)
+            payload = data[position + RECORD.size:position + RECORD.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            seq, scope, values = pickle.loads(payload)
+            if seq > snapshot_seq:
+                _apply(self.state, scope, values)
+                self.seq = seq
+            position += RECORD.size + length
+            self.records += 1
+
+        if position != len(data):
+            # Запись, оборванная при падении; дальше журнал дописывается с последней целой
+            self.logger.warning(f"Save journal {self.journal_path}: dropped {len(data) - position} bytes of torn record")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(position)
+        self.journal_bytes = position
+        return self.state
+
+    def _read_snapshot(self) -> Tuple[SaveState, int]:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}, 0
+        try:
+            if HEADER.unpack_from(data, 0) != (SNAPSHOT_MAGIC, SAVE_VERSION):
+                raise ValueError("bad header")
+            seq, state = pickle.loads(data[HEADER.size:])
+        except Exception as e:
+            self.logger.error(f"Rejected invalid save snapshot {self.snapshot_path}: {e}")
+            return {}, 0
+        return state, seq
+
+    def _open(self):
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(HEADER.pack(JOURNAL_MAGIC, SAVE_VERSION))
+                self.journal_bytes = HEADER.size
+        return self._file
+
+    def append(self, changes: Changes) -> int:
+        """Возвращает число записанных байт; в файл попадает при sync() или заполнении буфера"""
+        f = self._open()
+        written = 0
+        for scope, values in changes:
+            try:
+                payload = pickle.dumps((self.seq + 1, scope, values), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                self.logger.error(f"Save {scope}: value can not be saved: {e}")
+                continue
+            self.seq += 1
+            f.write(RECORD.pack(len(payload), zlib.crc32(payload)))
+            f.write(payload)
+            _apply(self.state, scope, values)
+            written += RECORD.size + len(payload)
+            self.records += 1
+        self.journal_bytes += written
+        return written
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def compact(self):
+        """Полный снимок вместо журнала"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, SAVE_VERSION))
+            pickle.dump((self.seq, self.state), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._sync_directory()
+
+        # Записи старого журнала уже в снимке (их seq не больше seq снимка)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, "wb")
+        self._file.write(HEADER.pack(JOURNAL_MAGIC, SAVE_VERSION))
+        self.sync()
+        self.journal_bytes = HEADER.size
+        self.records = 0
+
+    def _sync_directory(self):
+        if os.name != "posix":
+            return
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class SaveManager:
+    """
+    Сохранение состояния без записи в GUI-потоке.
+
+    Скрипт регистрирует таблицу (save.register); её прокси в Lua отмечает изменённые ключи
+    верхнего уровня, и collect() раз в save_interval переводит в Python только их. Позиции
+    entity сравниваются с последними сохранёнными. Изменения уходят очередью в поток записи:
+    он сериализует их в журнал, делает fsync не чаще save_fsync_interval и сворачивает журнал
+    в снимок, когда тот больше save_compact_mb.
+    """
+
+    def __init__(self, store: EntityStore = entity_store):
+        self.logger = logger
+        self.store = store
+        self.enabled = False
+        self.journal: Optional[SaveJournal] = None
+        self.save_entities = True
+        self.fsync_interval = 1.0
+        self.compact_bytes = 4 * 1024 * 1024
+        # Последнее сохранённое состояние: из него восстанавливаются зарегистрированные таблицы
+        self.state: SaveState = {}
+        # scope -> (таблица данных Lua, таблица изменённых ключей Lua)
+        self._tables: Dict[str, Tuple[Any, Any]] = {}
+        self._positions: Dict[str, Tuple[float, float]] = {}
+        self._queue: Queue = Queue()
+        self._thread: Optional[Thread] = None
+        self._loaded = False
+
+    def configure(self, config):
+        self.enabled = bool(config.save_enabled) and bool(config.save_directory)
+        directory = Path(config.save_directory[0]) if config.save_directory else None
+        self.journal = SaveJournal(directory) if self.enabled else None
+        self.save_entities = bool(config.save_entities)
+        self.fsync_interval = max(0.0, float(config.save_fsync_interval))
+        self.compact_bytes = int(config.save_compact_mb * 1024 * 1024)
+        self.state = {}
+        self._loaded = False
+
+    def load(self) -> SaveState:
+        """Снимок и журнал в память; до регистрации таблиц скриптами"""
+        if self.journal is None or self._loaded:
+            return self.state
+        start = perf_counter_ns()
+        state = self.journal.replay()
+        # Копия: словари журнала дальше меняет только поток записи
+        self.state = {scope: dict(values) for scope, values in state.items()}
+        self._loaded = True
+        self.logger.info(f"Loaded save {self.journal.directory}: {len(self.state)} scopes, "
+                         f"{self.journal.records} journal records in {(perf_counter_ns() - start) / 1e6:.1f} ms")
+        return self.state
+
+    def start(self):
+        if self.journal is None or self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="save-writer", daemon=True)
+        self._thread.start()
+
+    def saved(self, scope: str) -> Dict[Any, Any]:
+        if scope in self._tables:
+            # Повторная регистрация (горячая перезагрузка): несобранные изменения старой таблицы не теряются
+            self.collect([scope])
+        return self.state.get(scope, {})
+
+    def track(self, scope: str, data, dirty):
+        """data - таблица состояния, dirty - таблица, в которую прокси пишет изменённые ключи"""
+        self._tables[scope] = (data, dirty)
+
+    def forget_content_pack(self, content_pack_id: str):
+        """Перед выгрузкой пака: последние изменения его таблиц записываются, ссылки на runtime снимаются"""
+        prefix = f"{content_pack_id}."
+        self.collect([scope for scope in self._tables if scope.startswith(prefix)])
+        for scope in [scope for scope in self._tables if scope.startswith(prefix)]:
+            del self._tables[scope]
+        for qualified_id in [qualified_id for qualified_id in self._positions if qualified_id.startswith(prefix)]:
+            del self._positions[qualified_id]
+
+    def content_pack_ids(self) -> Set[str]:
+        """Паки, чьи таблицы или entity есть в загруженном сохранении"""
+        keys = [scope for scope in self.state if scope != ENTITIES_SCOPE]
+        keys.extend(str(qualified_id) for qualified_id in self.state.get(ENTITIES_SCOPE, {}))
+        return {key.split(".", 1)[0] for key in keys if "." in key}
+
+    def restore_entities(self) -> int:
+        """Сохранённые позиции заспавненных entity"""
+        positions = self.state.get(ENTITIES_SCOPE, {})
+        restored = 0
+        for handle in self.store.handles:
+            position = positions.get(handle.id)
+            if position is not None:
+                handle.set_position(*position)
+                self._positions[handle.id] = position
+                restored += 1
+        return restored
+
+    def _collect_tables(self, scopes, changes: Changes):
+        from src.lua.events import lua_to_python
+
+        for scope in scopes:
+            data, dirty = self._tables[scope]
+            keys = list(dirty.keys())
+            if not keys:
+                continue
+            values = {}
+            for key in keys:
+                dirty[key] = None
+                try:
+                    values[key] = lua_to_python(data[key])
+                except ValueError as e:
+                    self.logger.error(f"Save {scope}.{key}: {e}")
+            changes.append((scope, values))
+
+    def _collect_entities(self, changes: Changes):
+        columns = self.store.columns
+        x, y = columns["x"], columns["y"]
+        saved = self._positions
+        values = {}
+        for slot, handle in enumerate(self.store.handles):
+            position = (float(x[slot]), float(y[slot]))
+            if saved.get(handle.id) != position:
+                saved[handle.id] = position
+                values[handle.id] = position
+        if values:
+            changes.append((ENTITIES_SCOPE, values))
+
+    def collect(self, scopes=None) -> int:
+        """Изменения с прошлого вызова в очередь записи; возвращает число изменённых ключей"""
+        if self.journal is None:
+            return 0
+        start = perf_counter_ns() if profiler.enabled else 0
+        changes: Changes = []
+        self._collect_tables(self._tables if scopes is None else scopes, changes)
+        if scopes is None and self.save_entities:
+            self._collect_entities(changes)
+        for scope, values in changes:
+            _apply(self.state, scope, values)
+        if changes:
+            self._queue.put(("changes", changes))
+        count = sum(len(values) for _, values in changes)
+        if profiler.enabled:
+            profiler.record("save.collect", "save", start, perf_counter_ns() - start, {"keys": count})
+        return count
+
+    def global_update(self, delta_time: float):
+        self.collect()
+
+    def flush(self, compact: bool = False, timeout: Optional[float] = None) -> bool:
+        """Дождаться записи и fsync всего собранного; compact - заодно свернуть журнал"""
+        if self._thread is None:
+            return False
+        done = Event()
+        self._queue.put(("compact" if compact else "sync", done))
+        return done.wait(timeout)
+
+    def shutdown(self):
+        if self.journal is None:
+            return
+        self.collect()
+        if self._thread is not None:
+            self._queue.put(("stop", None))
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        journal = self.journal
+        last_sync = monotonic()
+        unsynced = False
+        while True:
+            timeout = max(0.0, last_sync + self.fsync_interval - monotonic()) if unsynced else None
+            try:
+                commands = [self._queue.get(timeout=timeout)]
+            except Empty:
+                commands = []
+            # Всё, что накопилось, пишется одной пачкой и покрывается одним fsync
+            while True:
+                try:
+                    commands.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            stop = False
+            waiters = []
+            compact = False
+            try:
+                for kind, payload in commands:
+                    if kind == "changes":
+                        journal.append(payload)
+                        unsynced = True
+                    elif kind == "stop":
+                        # Следующий запуск читает только снимок
+                        stop = True
+                        compact = compact or journal.records > 0
+                    else:
+                        compact = compact or kind == "compact"
+                        waiters.append(payload)
+
+                if compact or (self.compact_bytes > 0 and journal.journal_bytes > self.compact_bytes):
+                    start = perf_counter_ns()
+                    journal.compact()
+                    self.logger.debug(f"Save journal compacted in {(perf_counter_ns() - start) / 1e6:.1f} ms")
+                    unsynced = False
+                    last_sync = monotonic()
+                elif unsynced and (waiters or monotonic() - last_sync >= self.fsync_interval):
+                    journal.sync()
+                    unsynced = False
+                    last_sync = monotonic()
+            except OSError as e:
+                self.logger.error(f"Failed to write save {journal.directory}: {e}")
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                journal.close()
+                return
+
+
+save_manager = SaveManager()
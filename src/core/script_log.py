@@ -0,0 +1,139 @@
+from time import monotonic
+from typing import Any, Dict, Optional, Sequence
+
+from src.core.logger import logger, logger_setup
+
+
+class _ScriptLogState:
+    __slots__ = ("logger", "last", "repeats", "repeat_since", "tokens", "updated", "emitted", "dropped",
+                 "quota_dropped")
+
+    def __init__(self, script_id: str, burst: float):
+        self.logger = logger.bind(script_id=script_id)
+        # Аргументы последнего print: повтор определяется без сборки строки
+        self.last: Optional[tuple] = None
+        self.repeats = 0
+        self.repeat_since = 0.0
+        self.tokens = burst
+        self.updated = monotonic()
+        self.emitted = 0
+        # Отброшено лимитом скорости с последнего сообщения об этом
+        self.dropped = 0
+        self.quota_dropped = 0
+
+
+class ScriptLog:
+    """
+    Вывод скриптов (print) в лог с защитой от спама из хуков, вызываемых каждый тик.
+
+    Порядок проверок от дешёвой к дорогой: уровень ниже всех обработчиков - выход до сборки
+    строки; повтор предыдущего сообщения скрипта - только счётчик (итог "repeated N times"
+    раз в script_log_dedup_interval и при смене сообщения); квота строк за сессию; лимит
+    скорости (token bucket script_log_rate / script_log_burst). О пропущенных строках
+    скрипт отчитывается одной записью, когда лимит снова пропускает.
+    """
+
+    def __init__(self):
+        self.logger = logger
+        self.min_level_no = 0
+        self.dedup = False
+        self.dedup_interval = 10.0
+        self.rate = 0.0
+        self.burst = 0.0
+        self.quota = 0
+        self._level_nos: Dict[str, int] = {}
+        self._states: Dict[str, _ScriptLogState] = {}
+
+    def configure(self, config):
+        self.min_level_no = logger_setup.min_level_no()
+        self.dedup = bool(config.script_log_dedup)
+        self.dedup_interval = float(config.script_log_dedup_interval)
+        self.rate = max(0.0, float(config.script_log_rate))
+        self.burst = max(1.0, float(config.script_log_burst))
+        self.quota = max(0, int(config.script_log_quota))
+        self._level_nos.clear()
+        self._states.clear()
+
+    def _state(self, script_id: str) -> _ScriptLogState:
+        state = self._states.get(script_id)
+        if state is None:
+            state = self._states[script_id] = _ScriptLogState(script_id, self.burst)
+        return state
+
+    def _level_no(self, level: str) -> int:
+        level_no = self._level_nos.get(level)
+        if level_no is None:
+            level_no = self._level_nos[level] = self.logger.level(level).no
+        return level_no
+
+    def write(self, script_id: str, args: Sequence[Any], level: str = "INFO") -> bool:
+        """True - строка записана в лог"""
+        if self._level_no(level) < self.min_level_no:
+            return False
+        args = tuple(args)
+        state = self._states.get(script_id) or self._state(script_id)
+
+        if self.dedup:
+            if args == state.last:
+                state.repeats += 1
+                now = monotonic()
+                if now - state.repeat_since >= self.dedup_interval:
+                    self._flush_repeats(script_id, state, level, now)
+                return False
+            if state.repeats:
+                self._flush_repeats(script_id, state, level)
+            state.last = args
+            state.repeat_since = monotonic()
+
+        if not self._take(script_id, state, level):
+            return False
+        state.logger.log(level, f"<{script_id}> {' '.join(map(str, args))}")
+        return True
+
+    def _take(self, script_id: str, state: _ScriptLogState, level: str) -> bool:
+        if self.quota and state.emitted >= self.quota:
+            if not state.quota_dropped:
+                state.logger.warning(f"<{script_id}> reached log quota of {self.quota} lines, further output dropped")
+            state.quota_dropped += 1
+            return False
+        if self.rate > 0:
+            now = monotonic()
+            tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+            if tokens < 1.0:
+                state.tokens = tokens
+                state.dropped += 1
+                return False
+            state.tokens = tokens - 1.0
+            if state.dropped:
+                state.logger.log(level, f"<{script_id}> rate limit dropped {state.dropped} lines")
+                state.dropped = 0
+        state.emitted += 1
+        return True
+
+    def _flush_repeats(self, script_id: str, state: _ScriptLogState, level: str, now: Optional[float] = None):
+        state.logger.log(level, f"<{script_id}> previous message repeated {state.repeats} times")
+        state.repeats = 0
+        state.repeat_since = monotonic() if now is None else now
+
+    def flush(self):
+        """Итоги по повторам и пропускам, ещё не попавшие в лог (при выходе)"""
+        for script_id, state in self._states.items():
+            if state.repeats:
+                self._flush_repeats(script_id, state, "INFO")
+            if state.dropped:
+                state.logger.info(f"<{script_id}> rate limit dropped {state.dropped} lines")
+                state.dropped = 0
+
+    def forget(self, script_id: str):
+        self._states.pop(script_id, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            script_id: {"emitted": state.emitted, "pending_repeats": state.repeats, "dropped": state.dropped,
+                        "quota_dropped": state.quota_dropped}
+            for script_id, state in self._states.items()
+        }
+
+
+script_log = ScriptLog()
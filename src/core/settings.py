@@ -15,7 +15,8 @@ class Settings:
 
     @staticmethod
     def load_settings(path: Path) -> ModelSettings:
-        from src.resource.loader import Loader
+        # Не через Loader: его импорт тянет lupa и модели паков, которые до первого кадра не нужны
+        from src.resource.handlers import load_yaml
 
         logger.info(f"Load settings from {path}")
         if not os.path.exists(path):
@@ -26,7 +27,7 @@ class Settings:
             return data
 
         try:
-            loaded_data = Loader.load_yaml(path)
+            loaded_data = load_yaml(path)
             if not loaded_data:
                 logger.error("File settings is void, set default settings in settings.yaml")
                 data = ModelSettings(**{})
@@ -42,11 +43,11 @@ class Settings:
 
     @staticmethod
     def save_settings(path: Path, data: ModelSettings):
-        from src.resource.loader import Loader
+        from src.resource.handlers import save_yaml
 
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
-        Loader.save_yaml(path, data.model_dump())
+        save_yaml(path, data.model_dump())
         logger.debug(f"Save settings to {path}")
 
     def update_settings(self, **kwargs):
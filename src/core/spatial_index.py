@@ -0,0 +1,164 @@
+import math
+from itertools import compress
+from operator import ne
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+# (x, y, width, height)
+Bounds = Tuple[float, float, float, float]
+CellRange = Tuple[int, int, int, int]
+
+# Диапазон объекта, который не кладётся в ячейки: больше MAX_CELLS ячеек или нечисловые координаты
+OVERSIZED: CellRange = (0, 0, -1, -1)
+
+
+class SpatialGrid:
+    """
+    Равномерная сетка над прямоугольниками объектов.
+
+    Объект лежит во всех ячейках, которые задевает. move() трогает ячейки, только если
+    объект перешёл в другие; запросы проверяют кандидатов из задетых ячеек точно.
+    Объекты больше MAX_CELLS ячеек (и с inf/nan) лежат в отдельном списке oversized, который
+    каждый запрос проверяет целиком: иначе один огромный прямоугольник занимал бы миллиарды ячеек.
+    """
+    MAX_CELLS = 1024
+
+    def __init__(self, cell_size: float = 128.0):
+        self.cell_size = float(cell_size)
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, None]] = {}
+        self._bounds: Dict[Hashable, Bounds] = {}
+        self._ranges: Dict[Hashable, CellRange] = {}
+        self._oversized: Dict[Hashable, None] = {}
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, key: Hashable):
+        return key in self._bounds
+
+    def _cell_range(self, x: float, y: float, width: float, height: float) -> CellRange:
+        size = self.cell_size
+        right, bottom = x + max(width, 0.0), y + max(height, 0.0)
+        if not all(map(math.isfinite, (x, y, right, bottom))):
+            return OVERSIZED
+        cell_range = (math.floor(x / size), math.floor(y / size), math.floor(right / size), math.floor(bottom / size))
+        if (cell_range[2] - cell_range[0] + 1) * (cell_range[3] - cell_range[1] + 1) > self.MAX_CELLS:
+            return OVERSIZED
+        return cell_range
+
+    def _link(self, key: Hashable, cell_range: CellRange):
+        if cell_range == OVERSIZED:
+            self._oversized[key] = None
+            return
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self._cells.setdefault((cx, cy), {})[key] = None
+
+    def _unlink(self, key: Hashable, cell_range: CellRange):
+        if cell_range == OVERSIZED:
+            self._oversized.pop(key, None)
+            return
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is not None:
+                    cell.pop(key, None)
+                    if not cell:
+                        del self._cells[(cx, cy)]
+
+    def insert(self, key: Hashable, x: float, y: float, width: float = 0.0, height: float = 0.0):
+        if key in self._bounds:
+            self.move(key, x, y, width, height)
+            return
+        cell_range = self._cell_range(x, y, width, height)
+        self._bounds[key] = (x, y, width, height)
+        self._ranges[key] = cell_range
+        self._link(key, cell_range)
+
+    def move(self, key: Hashable, x: float, y: float, width: float = None, height: float = None):
+        old = self._bounds[key]
+        width = old[2] if width is None else width
+        height = old[3] if height is None else height
+        self._bounds[key] = (x, y, width, height)
+
+        cell_range = self._cell_range(x, y, width, height)
+        old_range = self._ranges[key]
+        if cell_range != old_range:
+            self._unlink(key, old_range)
+            self._link(key, cell_range)
+            self._ranges[key] = cell_range
+
+    def move_many(self, keys: Sequence[Hashable], bounds: Iterable[Bounds], ranges: Iterable[CellRange]):
+        """
+        Пакетный move: прямоугольники и диапазоны ячеек уже посчитаны вызывающим (EntityStore -
+        векторно). Ключи не из индекса пропускаются; в цикле Python только сменившие ячейки.
+        """
+        all_bounds, all_ranges = self._bounds, self._ranges
+        old_ranges = list(map(all_ranges.get, keys))
+        # Диапазон ячеек - непустой кортеж, None - ключа нет в индексе
+        all_bounds.update(compress(zip(keys, bounds), old_ranges))
+        ranges = list(ranges)
+        for key, old_range, cell_range in compress(zip(keys, old_ranges, ranges), map(ne, old_ranges, ranges)):
+            if old_range is None:
+                continue
+            self._unlink(key, old_range)
+            self._link(key, cell_range)
+            all_ranges[key] = cell_range
+
+    def remove(self, key: Hashable):
+        if key in self._bounds:
+            self._unlink(key, self._ranges.pop(key))
+            del self._bounds[key]
+
+    def bounds(self, key: Hashable) -> Bounds:
+        return self._bounds[key]
+
+    def _candidates(self, cell_range: CellRange) -> Iterable[Hashable]:
+        if cell_range == OVERSIZED:
+            # Область запроса сама больше MAX_CELLS ячеек: проверяются все объекты
+            return tuple(self._bounds)
+        x0, y0, x1, y1 = cell_range
+        if x0 == x1 and y0 == y1 and not self._oversized:
+            return tuple(self._cells.get((x0, y0), ()))
+        found: Dict[Hashable, None] = dict(self._oversized)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # Область больше занятых ячеек: дешевле пройти по занятым
+            for (cx, cy), cell in self._cells.items():
+                if x0 <= cx <= x1 and y0 <= cy <= y1:
+                    found.update(cell)
+            return found
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return found
+
+    def query_point(self, x: float, y: float) -> List[Hashable]:
+        result = []
+        for key in self._candidates(self._cell_range(x, y, 0.0, 0.0)):
+            bx, by, bw, bh = self._bounds[key]
+            if bx <= x <= bx + bw and by <= y <= by + bh:
+                result.append(key)
+        return result
+
+    def query_rect(self, x: float, y: float, width: float, height: float) -> List[Hashable]:
+        result = []
+        for key in self._candidates(self._cell_range(x, y, width, height)):
+            bx, by, bw, bh = self._bounds[key]
+            if bx <= x + width and x <= bx + bw and by <= y + height and y <= by + bh:
+                result.append(key)
+        return result
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[Hashable]:
+        result = []
+        radius_sq = radius * radius
+        for key in self._candidates(self._cell_range(x - radius, y - radius, radius * 2, radius * 2)):
+            bx, by, bw, bh = self._bounds[key]
+            # Ближайшая к центру точка прямоугольника
+            dx = x - min(max(x, bx), bx + bw)
+            dy = y - min(max(y, by), by + bh)
+            if dx * dx + dy * dy <= radius_sq:
+                result.append(key)
+        return result
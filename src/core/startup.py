@@ -0,0 +1,71 @@
+from threading import Thread
+from time import perf_counter_ns
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from src.core.logger import logger
+from src.core.profiler import profiler
+
+
+class StartupStages:
+    """
+    Моменты этапов запуска в мс от старта процесса (main.py):
+        tray        - иконка в трее и пустой оверлей на экране
+        packs       - паки загружены, скрипты получили on_startup
+        first_frame - первый кадр с entity передан окнам
+    """
+
+    def __init__(self, started_ns: Optional[int] = None):
+        self.started_ns = started_ns or perf_counter_ns()
+        self.stages: Dict[str, float] = {}
+        self._last_ns = self.started_ns
+
+    def mark(self, name: str):
+        if name in self.stages:
+            return
+        now = perf_counter_ns()
+        self.stages[name] = (now - self.started_ns) / 1e6
+        if profiler.enabled:
+            profiler.record(f"startup.{name}", "startup", self._last_ns, now - self._last_ns)
+        self._last_ns = now
+        logger.info(f"Startup stage {name}: {self.stages[name]:.1f} ms")
+
+
+class PackLoadingThread(QObject):
+    """
+    Загрузка паков в фоновом потоке, пока в GUI-потоке уже работают трей и таймер.
+
+    Модули, которые нужны только после загрузки (Loader, lupa, numpy для EntityStore),
+    импортируются в этом потоке. Сигналы доставляются в GUI-поток очередью событий Qt.
+    """
+    # (загружено, всего, id пака)
+    progress = Signal(int, int, str)
+    # (ModelResources или None, ошибка или None)
+    loaded = Signal(object, object)
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self._thread: Optional[Thread] = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, name="pack-loading", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            from src.core.entity_store import load_numpy
+            from src.core.saves import save_manager
+            from src.resource.loader import Loader
+
+            if self.config.entity_store_backend != "array":
+                load_numpy()
+            # Сохранение читается до загрузки скриптов: save.register выполняется при их запуске
+            save_manager.load()
+            resources = Loader(self.config).scan(progress=self.progress.emit)
+        except Exception as e:
+            logger.exception(f"Failed to load content packs: {e}")
+            self.loaded.emit(None, e)
+            return
+        self.loaded.emit(resources, None)
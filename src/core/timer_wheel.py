@@ -0,0 +1,60 @@
+from typing import Any, List
+
+
+class WheelEntry:
+    __slots__ = ("item", "period", "rounds", "cancelled", "last_time")
+
+    def __init__(self, item: Any, period: int):
+        self.item = item
+        self.period = period
+        self.rounds = 0
+        self.cancelled = False
+        self.last_time = 0.0
+
+
+class TimerWheel:
+    """
+    Хэшированное колесо таймеров: запись с периодом N тиков лежит в слоте (tick + N) % size.
+    advance() смотрит только текущий слот, поэтому стоимость тика зависит от числа
+    сработавших записей, а не от общего их числа. Сработавшие записи перевзводятся.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.tick = 0
+        self._slots: List[List[WheelEntry]] = [[] for _ in range(size)]
+
+    def add(self, item: Any, period: int) -> WheelEntry:
+        entry = WheelEntry(item, max(1, int(period)))
+        self._schedule(entry, entry.period)
+        return entry
+
+    def remove(self, entry: WheelEntry):
+        # Удаление ленивое: запись выбрасывается, когда до неё дойдёт колесо
+        entry.cancelled = True
+
+    def _schedule(self, entry: WheelEntry, delay: int):
+        entry.rounds = (delay - 1) // self.size
+        self._slots[(self.tick + delay) % self.size].append(entry)
+
+    def advance(self) -> List[WheelEntry]:
+        self.tick += 1
+        index = self.tick % self.size
+        slot = self._slots[index]
+        if not slot:
+            return []
+
+        due, keep = [], []
+        for entry in slot:
+            if entry.cancelled:
+                continue
+            if entry.rounds:
+                entry.rounds -= 1
+                keep.append(entry)
+            else:
+                due.append(entry)
+        self._slots[index] = keep
+
+        for entry in due:
+            self._schedule(entry, entry.period)
+        return due
@@ -1,15 +1,20 @@
-from typing import AnyStr
+from typing import AnyStr, Optional, Tuple
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QWidget
+from src.core.event_bus import event_bus
+from src.core.global_timer import GlobalTimer
 from src.core.logger import logger
 
 
 class BaseWindow(QWidget):
     WINDOW_TYPES = ("TRANSPARENT", "BASIC")
+    # id видимых окон; когда ни одного не осталось, GlobalTimer уходит в простой (hidden)
+    _visible = set()
 
-    def __init__(self):
+    def __init__(self, entity_id: Optional[str] = None):
         super().__init__()
+        self.entity_id = entity_id
 
     def set_window_type(self, window_type: AnyStr = "TRANSPARENT"):
         flags = None
@@ -29,13 +34,47 @@ class BaseWindow(QWidget):
     def set_geometry(self, x, y, width, height):
         self.setGeometry(x, y, width, height)
 
+    def showEvent(self, event):
+        BaseWindow._visible.add(id(self))
+        GlobalTimer.set_idle_reason("hidden", False)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        BaseWindow._visible.discard(id(self))
+        if not BaseWindow._visible:
+            GlobalTimer.set_idle_reason("hidden", True)
+        super().hideEvent(event)
+
+    def entity_at(self, x: float, y: float) -> Tuple[Optional[str], float, float]:
+        """Entity под точкой окна и координаты точки относительно entity"""
+        return self.entity_id, x, y
+
+    def _publish_mouse_event(self, topic: str, event):
+        GlobalTimer.mark_active()
+        position = event.position()
+        global_position = event.globalPosition()
+        entity_id, x, y = self.entity_at(position.x(), position.y())
+        event_bus.emit(topic, {
+            "entity_id": entity_id,
+            "window": id(self),
+            "x": x,
+            "y": y,
+            "global_x": global_position.x(),
+            "global_y": global_position.y(),
+            "button": event.button().value,
+            "buttons": event.buttons().value,
+        })
+
     def mousePressEvent(self, event):
+        self._publish_mouse_event("mouse.press", event)
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
+        self._publish_mouse_event("mouse.move", event)
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
+        self._publish_mouse_event("mouse.release", event)
         super().mouseReleaseEvent(event)
 
 
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QPoint, QRect, Qt
+from PySide6.QtGui import QPainter, QRegion
+
+from src.core.spatial_index import SpatialGrid
+from src.core.window.base_window import BaseWindow
+
+
+class OverlayWindow(BaseWindow):
+    """
+    Прозрачное окно на весь экран (одно на монитор), в котором рисуются все entity.
+
+    apply() получает изменившиеся элементы в координатах рабочего стола, перерисовывает
+    только объединение их старых и новых прямоугольников и обновляет маску ввода: клики
+    мимо entity уходят в окна под оверлеем.
+    """
+
+    def __init__(self, geometry: QRect, cell_size: float = 128.0):
+        super().__init__()
+        self.set_window_type("TRANSPARENT")
+        self.setAttribute(Qt.WA_ShowWithoutActivating)  # noqa
+        self.setAttribute(Qt.WA_NoSystemBackground)  # noqa
+        self.origin = geometry.topLeft()
+        self.setGeometry(geometry)
+        # id entity -> элемент в координатах окна; порядок словаря - порядок отрисовки
+        self.items: Dict[str, object] = {}
+        self._rects: Dict[str, QRect] = {}
+        self._grid = SpatialGrid(cell_size)
+        self._mask = QRegion()
+        # Entity, задевающие области, переданные в update() и ещё не перерисованные
+        self._pending: Set[str] = set()
+        self.paint_events = 0
+        self.painted_pixels = 0
+
+    def _local_rect(self, item) -> QRect:
+        return QRect(int(item.x) - self.origin.x(), int(item.y) - self.origin.y(), item.width, item.height)
+
+    def apply(self, changes: Iterable[Tuple[str, Optional[object], Optional[object]]]):
+        """changes - (id, старый элемент или None, новый элемент или None)"""
+        dirty_rects: List[QRect] = []
+        for entity_id, old, new in changes:
+            old_rect = self._rects.pop(entity_id, None)
+            if old_rect is not None:
+                dirty_rects.append(old_rect)
+            if new is None:
+                self.items.pop(entity_id, None)
+                self._grid.remove(entity_id)
+                continue
+            rect = self._local_rect(new)
+            self.items[entity_id] = new
+            self._rects[entity_id] = rect
+            self._grid.insert(entity_id, rect.x(), rect.y(), rect.width(), rect.height())
+            dirty_rects.append(rect)
+
+        if not dirty_rects:
+            return
+        if not self.items:
+            # Пустая маска снимает ограничение ввода, поэтому пустой оверлей прячется
+            self._mask = QRegion()
+            self._pending.clear()
+            self.hide()
+            return
+
+        dirty = QRegion()
+        for rect in dirty_rects:
+            dirty += rect
+        touched = self._query(dirty_rects)
+        # Маска пересобирается только в изменившихся местах
+        mask = self._mask.subtracted(dirty)
+        for entity_id in touched:
+            mask += self._rects[entity_id]
+        self._mask = mask
+        self.setMask(mask)
+
+        self._pending.update(touched)
+        if self.isHidden():
+            self.show()
+        self.update(dirty)
+
+    def _query(self, rects: List[QRect]) -> Set[str]:
+        if len(rects) * 2 > len(self.items):
+            # Изменилась большая часть entity: запросы к сетке дороже, чем взять всех
+            return set(self.items)
+        found = set()
+        for rect in rects:
+            found.update(self._grid.query_rect(rect.x(), rect.y(), rect.width(), rect.height()))
+        return found
+
+    def entity_at(self, x: float, y: float) -> Tuple[Optional[str], float, float]:
+        hits = self._grid.query_point(x, y)
+        if not hits:
+            return None, x, y
+        # Сверху - последний отрисованный
+        order = {entity_id: index for index, entity_id in enumerate(self.items)}
+        entity_id = max(hits, key=order.__getitem__)
+        rect = self._rects[entity_id]
+        return entity_id, x - rect.x(), y - rect.y()
+
+    def paintEvent(self, event):
+        region = event.region()
+        # Qt может объединить update() из apply() с системным expose в одно событие: область
+        # события очищается целиком, поэтому перерисовываются и все entity в ней
+        candidates = self._pending | self._query(list(region))
+        self._pending = set()
+        self.paint_events += 1
+        self.painted_pixels += sum(rect.width() * rect.height() for rect in region)
+
+        # Рисование уже обрезано системой по region: пиксели вне него не меняются
+        painter = QPainter(self)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.fillRect(region.boundingRect(), Qt.transparent)  # noqa
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        for entity_id, item in self.items.items():
+            if entity_id in candidates:
+                rect = self._rects[entity_id]
+                painter.drawPixmap(rect.topLeft(), item.atlas.pixmap, item.atlas.source_rect(item.frame))
+        painter.end()
+
+
+class PetWindow(BaseWindow):
+    """Отдельное прозрачное окно для одного entity (render_mode: windows)"""
+
+    def __init__(self, entity_id: str):
+        super().__init__(entity_id)
+        self.set_window_type("TRANSPARENT")
+        self.setAttribute(Qt.WA_ShowWithoutActivating)  # noqa
+        self.item = None
+        self.paint_events = 0
+        self.painted_pixels = 0
+
+    def apply(self, item):
+        geometry = QRect(int(item.x), int(item.y), item.width, item.height)
+        if geometry != self.geometry():
+            self.setGeometry(geometry)
+        self.item = item
+        if self.isHidden():
+            self.show()
+        self.update()
+
+    def paintEvent(self, event):
+        self.paint_events += 1
+        self.painted_pixels += self.width() * self.height()
+        painter = QPainter(self)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.fillRect(self.rect(), Qt.transparent)  # noqa
+        if self.item is not None:
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+            painter.drawPixmap(QPoint(0, 0), self.item.atlas.pixmap, self.item.atlas.source_rect(self.item.frame))
+        painter.end()
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from time import perf_counter_ns
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QGuiApplication
+
+from src.core.entity_registry import EntityRegistry, entity_registry
+from src.core.entity_store import FLAG_HIDDEN, EntityStore, entity_store
+from src.core.logger import logger
+from src.core.profiler import profiler
+from src.core.window.overlay import OverlayWindow, PetWindow
+from src.resource.atlas import Atlas
+
+
+class DrawItem(NamedTuple):
+    # Прямоугольник обрезанного кадра в координатах рабочего стола
+    x: int
+    y: int
+    width: int
+    height: int
+    atlas: Atlas
+    frame: int
+
+
+class Renderer(ABC):
+    """
+    Отрисовка entity из EntityStore спрайтами из SpriteCache.
+
+    sync() раз в тик собирает элементы видимых entity, сравнивает с прошлым тиком и
+    передаёт окнам только изменившиеся. Спрайт entity запрашивается асинхронно; пока он
+    не загружен, entity не рисуется. Наследники реализуют _apply() и windows().
+    """
+    MODES = ("overlay", "windows")
+
+    def __init__(self, sprite_cache, resources, store: EntityStore = entity_store,
+                 registry: EntityRegistry = entity_registry):
+        self.logger = logger
+        self.sprite_cache = sprite_cache
+        self.resources = resources
+        self.store = store
+        self.registry = registry
+        self.items: Dict[str, DrawItem] = {}
+        # id entity -> атлас; None - загружается или спрайта нет
+        self._atlases: Dict[str, Optional[Atlas]] = {}
+
+    def _atlas(self, qualified_id: str) -> Optional[Atlas]:
+        if qualified_id in self._atlases:
+            return self._atlases[qualified_id]
+        self._atlases[qualified_id] = None
+        entity = self.registry.get(qualified_id)
+        content_pack = self.resources.content_packs.get(entity.content_pack_id) if entity is not None else None
+        if entity is not None and entity.sprite and content_pack is not None:
+            self.sprite_cache.load_entity_async(entity, content_pack,
+                                                lambda atlas: self._atlases.__setitem__(qualified_id, atlas))
+        return self._atlases[qualified_id]
+
+    def forget(self, qualified_id: str):
+        """Сбросить атлас entity (спрайт изменился)"""
+        self._atlases.pop(qualified_id, None)
+
+    def _collect(self) -> Dict[str, DrawItem]:
+        columns = self.store.columns
+        x, y, frames, flags = columns["x"], columns["y"], columns["frame"], columns["flags"]
+        items = {}
+        for slot, handle in enumerate(self.store.handles):
+            if flags[slot] & FLAG_HIDDEN:
+                continue
+            atlas = self._atlas(handle.id)
+            if atlas is None or atlas.pixmap is None or not atlas.frames:
+                continue
+            frame = int(frames[slot]) % len(atlas.frames)
+            atlas_frame = atlas.frames[frame]
+            items[handle.id] = DrawItem(int(x[slot]) + atlas_frame.offset_x, int(y[slot]) + atlas_frame.offset_y,
+                                        atlas_frame.width, atlas_frame.height, atlas, frame)
+        return items
+
+    def sync(self):
+        start = perf_counter_ns() if profiler.enabled else 0
+        items = self._collect()
+        old_items = self.items
+        changes: List[Tuple[str, Optional[DrawItem], Optional[DrawItem]]] = []
+        for entity_id, item in items.items():
+            old = old_items.get(entity_id)
+            if old != item:
+                changes.append((entity_id, old, item))
+        for entity_id, old in old_items.items():
+            if entity_id not in items:
+                changes.append((entity_id, old, None))
+        self.items = items
+        if changes:
+            self._apply(changes)
+        if profiler.enabled:
+            profiler.record("renderer.sync", "render", start, perf_counter_ns() - start, {"changes": len(changes)})
+        return len(changes)
+
+    @abstractmethod
+    def _apply(self, changes: List[Tuple[str, Optional[DrawItem], Optional[DrawItem]]]):
+        """Передать окнам изменения: (id, старый элемент или None, новый элемент или None)"""
+
+    @abstractmethod
+    def windows(self) -> list:
+        """Окна рендерера (для закрытия и статистики)"""
+
+    def close(self):
+        for window in self.windows():
+            window.close()
+
+
+class OverlayRenderer(Renderer):
+    """Одно прозрачное окно на монитор; все entity рисуются в одном paintEvent"""
+
+    def __init__(self, sprite_cache, resources, cell_size: float = 128.0, **kwargs):
+        super().__init__(sprite_cache, resources, **kwargs)
+        self.overlays = [OverlayWindow(screen.geometry(), cell_size) for screen in QGuiApplication.screens()]
+
+    def _apply(self, changes):
+        for overlay in self.overlays:
+            area = overlay.geometry()
+            own = []
+            for entity_id, old, new in changes:
+                # Entity на стыке мониторов рисуется в обоих оверлеях
+                old = old if old is not None and _intersects(area, old) else None
+                new = new if new is not None and _intersects(area, new) else None
+                if old is not None or new is not None or entity_id in overlay.items:
+                    own.append((entity_id, old, new))
+            if own:
+                overlay.apply(own)
+
+    def windows(self) -> list:
+        return list(self.overlays)
+
+
+class WindowRenderer(Renderer):
+    """Окно на каждый entity, как в BaseWindow"""
+
+    def __init__(self, sprite_cache, resources, **kwargs):
+        super().__init__(sprite_cache, resources, **kwargs)
+        self.pet_windows: Dict[str, PetWindow] = {}
+
+    def _apply(self, changes):
+        for entity_id, _, new in changes:
+            window = self.pet_windows.get(entity_id)
+            if new is None:
+                if window is not None:
+                    window.close()
+                    del self.pet_windows[entity_id]
+                continue
+            if window is None:
+                window = self.pet_windows[entity_id] = PetWindow(entity_id)
+            window.apply(new)
+
+    def windows(self) -> list:
+        return list(self.pet_windows.values())
+
+
+def _intersects(area: QRect, item: DrawItem) -> bool:
+    return area.intersects(QRect(item.x, item.y, item.width, item.height))
+
+
+def create_renderer(mode: str, sprite_cache, resources, cell_size: float = 128.0) -> Renderer:
+    if mode not in Renderer.MODES:
+        logger.error(f"Invalid render mode: {mode}, use 'overlay'")
+        mode = "overlay"
+    if mode == "windows":
+        return WindowRenderer(sprite_cache, resources)
+    return OverlayRenderer(sprite_cache, resources, cell_size)
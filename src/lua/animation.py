@@ -0,0 +1,21 @@
+from src.core.animation import animation_engine
+from src.lua.sandbox import LuaSandbox
+
+
+def bind_animation(sandbox: LuaSandbox, env):
+    """
+    animation.play(id, clip, speed, restart), animation.stop(id, frame), animation.playing(id).
+    События кадров приходят в хук on_frame_event(entity_id, event, clip).
+    """
+    runtime = sandbox.runtime
+
+    def play(qualified_id, clip, speed=None, restart=False):
+        return animation_engine.play(str(qualified_id), str(clip), 1.0 if speed is None else float(speed),
+                                     bool(restart))
+
+    env.animation = runtime.table_from({
+        "play": play,
+        "stop": lambda qualified_id, frame=None: animation_engine.stop(
+            str(qualified_id), None if frame is None else int(frame)),
+        "playing": lambda qualified_id: animation_engine.playing(str(qualified_id)),
+    })
@@ -0,0 +1,94 @@
+from functools import partial
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.lua.modules import LUA_FUNCTIONS, LUA_CLASSES
+from src.lua.sandbox import LuaSandbox
+
+# имя функции API -> [число вызовов, суммарное время в нс]; заполняется при lua_api_stats
+API_STATS: Dict[str, List[int]] = {}
+
+
+def get_api_stats() -> Dict[str, Dict[str, float]]:
+    return {
+        name: {"calls": calls, "total_ms": total_ns / 1e6, "avg_us": total_ns / calls / 1e3 if calls else 0.0}
+        for name, (calls, total_ns) in API_STATS.items()
+    }
+
+
+def reset_api_stats():
+    for counters in API_STATS.values():
+        counters[0] = 0
+        counters[1] = 0
+
+
+class LuaBridge:
+    """
+    Привязывает LUA_FUNCTIONS и LUA_CLASSES к окружению скрипта.
+
+    По умолчанию функции кладутся в окружение как есть. Обёртка появляется только если
+    включены lua_api_stats или для пары скрипт/функция задан lua_api_trace.
+    """
+
+    def __init__(self, config: ModelSettings):
+        self.logger = logger
+        self.stats_enabled = bool(config.lua_api_stats)
+        self.trace_rules: Dict[str, int] = dict(config.lua_api_trace or {})
+
+    def _trace_rate(self, script_id: str, name: str) -> Optional[int]:
+        for key in (f"{script_id}:{name}", script_id, name):
+            if key in self.trace_rules:
+                rate = int(self.trace_rules[key])
+                return rate if rate > 0 else None
+        return None
+
+    def bind(self, sandbox: LuaSandbox, env, script_id: str, qualified_id: Optional[str] = None):
+        env.script_id = script_id
+        for name, fn in LUA_FUNCTIONS.items():
+            if getattr(fn, "__lua_script_id__", False):
+                # Функциям с lua_func(script_id=True) передаётся полный id: <content_pack_id>.<script_id>
+                fn = partial(fn, qualified_id or script_id)
+            env[name] = self._wrap(sandbox, script_id, name, fn)
+
+        for name, cls in LUA_CLASSES.items():
+            env[name] = self._wrap_class(sandbox, script_id, cls)
+
+    def _wrap_class(self, sandbox: LuaSandbox, script_id: str, cls):
+        wrapped_methods = {}
+        for attr_name in dir(cls):
+            attr = getattr(cls, attr_name)
+            if callable(attr) and not attr_name.startswith('__'):
+                method = self._wrap(sandbox, script_id, f"{cls.__name__}.{attr_name}", attr)
+                if method is not attr:
+                    wrapped_methods[attr_name] = method
+        if not wrapped_methods:
+            return cls
+        return type('Wrapped' + cls.__name__, (cls,), wrapped_methods)
+
+    def _wrap(self, sandbox: LuaSandbox, script_id: str, name: str, fn: Callable) -> Callable:
+        rate = self._trace_rate(script_id, name)
+        if not self.stats_enabled and rate is None:
+            return fn
+
+        counters = API_STATS.setdefault(name, [0, 0]) if self.stats_enabled else None
+        calls = 0
+
+        def wrapper(*args, **kwargs) -> Any:
+            nonlocal calls
+            if rate is not None:
+                calls += 1
+                if calls % rate == 0:
+                    self.logger.info(f"Called <{name}> from <{script_id}> at line <{sandbox.current_line()}>"
+                                     f" (call {calls}, every {rate})")
+            if counters is None:
+                return fn(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                counters[0] += 1
+                counters[1] += perf_counter_ns() - start
+
+        return wrapper
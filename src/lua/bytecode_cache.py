@@ -0,0 +1,164 @@
+import hashlib
+import hmac
+import os
+import secrets
+from pathlib import Path
+from typing import Dict, Optional
+
+import lupa
+from lupa import LuaRuntime
+
+from src.core.logger import logger
+from src.lua.sandbox import SANDBOX_VERSION
+
+CACHE_MAGIC = b"VPLC"
+CACHE_FORMAT = 2
+SECRET_SIZE = 32
+
+# Компилирует исходник без выполнения и возвращает string.dump (с отладочной информацией)
+DUMP_FUNCTION = '''
+    function(code, chunkname)
+        local fn, err = load(code, chunkname, "t")
+        if not fn then
+            error(err, 0)
+        end
+        return string.dump(fn)
+    end
+'''
+
+
+class BytecodeCache:
+    """
+    Дисковый кэш байткода Lua.
+
+    Ключ - sha256 от версии формата, lupa, реализации Lua, SANDBOX_VERSION, имени чанка и исходника.
+    Файл: CACHE_MAGIC | ключ | HMAC-SHA256(секрет, ключ | байткод) | байткод. Секрет создаётся
+    при первом запуске в key_file вне каталога кэша: подложить байткод, записав только в кэш,
+    нельзя. Записи с несовпадающим ключом или подписью удаляются и пересобираются. Без
+    секрета (файл не читается и не создаётся) кэш не используется.
+
+    Прочитанный или собранный байткод держится и в памяти: модуль, который require'ят скрипты
+    разных runtime (режим isolated), компилируется и читается с диска один раз за процесс.
+    """
+
+    _instances: Dict[str, "BytecodeCache"] = {}
+
+    def __init__(self, cache_dir: Path, key_file: Path):
+        self.logger = logger
+        self.cache_dir = Path(cache_dir)
+        self.key_file = Path(key_file)
+        self._secret = self._load_secret()
+        # encoding=None: string.dump возвращается как bytes, а не декодируется в str
+        self._compiler = LuaRuntime(encoding=None)
+        self._dump = self._compiler.eval(DUMP_FUNCTION)
+        self._version_tag = (
+            f"{CACHE_FORMAT}|{lupa.__version__}|{self._compiler.lua_implementation}|{SANDBOX_VERSION}"
+        ).encode("utf-8")
+        self._memory: Dict[bytes, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get(cls, cache_dir, key_file) -> "BytecodeCache":
+        key = f"{cache_dir}|{key_file}"
+        if key not in cls._instances:
+            cls._instances[key] = cls(Path(cache_dir), Path(key_file))
+        return cls._instances[key]
+
+    def _load_secret(self) -> Optional[bytes]:
+        try:
+            secret = self.key_file.read_bytes()
+            if len(secret) == SECRET_SIZE:
+                return secret
+            self.logger.warning(f"Invalid bytecode cache key {self.key_file}, creating a new one")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Failed to read bytecode cache key {self.key_file}: {e}, cache disabled")
+            return None
+
+        # Новый секрет делает недействительными все прежние записи
+        secret = secrets.token_bytes(SECRET_SIZE)
+        try:
+            self.key_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.key_file.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(secret)
+            os.replace(tmp_path, self.key_file)
+        except OSError as e:
+            self.logger.warning(f"Failed to create bytecode cache key {self.key_file}: {e}, cache disabled")
+            return None
+        return secret
+
+    def _sign(self, key: bytes, bytecode: bytes) -> bytes:
+        return hmac.new(self._secret, key + bytecode, hashlib.sha256).digest()
+
+    def _key(self, code: bytes, chunk_name: str) -> bytes:
+        digest = hashlib.sha256(self._version_tag)
+        digest.update(b"\0" + chunk_name.encode("utf-8") + b"\0")
+        digest.update(code)
+        return digest.digest()
+
+    def _path(self, key: bytes) -> Path:
+        name = key.hex()
+        return self.cache_dir / name[:2] / f"{name}.luac"
+
+    def get_bytecode(self, code: str, chunk_name: str) -> bytes:
+        raw = code.encode("utf-8")
+        key = self._key(raw, chunk_name)
+        bytecode = self._memory.get(key)
+        if bytecode is not None:
+            self.hits += 1
+            return bytecode
+
+        path = self._path(key)
+        bytecode = self._read(path, key)
+        if bytecode is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            bytecode = self._dump(raw, chunk_name.encode("utf-8"))
+            if self._secret is not None:
+                self._write(path, key, bytecode)
+        self._memory[key] = bytecode
+        return bytecode
+
+    def invalidate(self, code: str, chunk_name: str):
+        key = self._key(code.encode("utf-8"), chunk_name)
+        self._memory.pop(key, None)
+        path = self._path(key)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read(self, path: Path, key: bytes) -> Optional[bytes]:
+        if self._secret is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self.logger.warning(f"Failed to read bytecode cache {path}: {e}")
+            return None
+
+        header_size = len(CACHE_MAGIC) + 64
+        if (len(data) < header_size or not data.startswith(CACHE_MAGIC)
+                or data[4:36] != key or not hmac.compare_digest(self._sign(key, data[header_size:]), data[36:68])):
+            self.logger.warning(f"Rejected invalid bytecode cache entry: {path}")
+            path.unlink(missing_ok=True)
+            return None
+        return data[header_size:]
+
+    def _write(self, path: Path, key: bytes, bytecode: bytes):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(CACHE_MAGIC + key + self._sign(key, bytecode) + bytecode)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write bytecode cache {path}: {e}")
@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import Dict, Set
+
+
+class RequireGraph:
+    """Граф require между файлами Lua: какой файл какие модули подключает"""
+
+    def __init__(self):
+        self.requires: Dict[Path, Set[Path]] = {}
+        self.required_by: Dict[Path, Set[Path]] = {}
+
+    def add(self, requirer: Path, module: Path):
+        self.requires.setdefault(requirer, set()).add(module)
+        self.required_by.setdefault(module, set()).add(requirer)
+
+    def forget(self, requirer: Path):
+        """Удаляет исходящие рёбра файла (перед его перезагрузкой)"""
+        for module in self.requires.pop(requirer, ()):
+            requirers = self.required_by.get(module)
+            if requirers is not None:
+                requirers.discard(requirer)
+                if not requirers:
+                    del self.required_by[module]
+
+    def dependents_of(self, path: Path) -> Set[Path]:
+        """Все файлы, которые прямо или транзитивно подключают path"""
+        result: Set[Path] = set()
+        stack = [path]
+        while stack:
+            for requirer in self.required_by.get(stack.pop(), ()):
+                if requirer not in result:
+                    result.add(requirer)
+                    stack.append(requirer)
+        return result
+
+    def clear(self):
+        self.requires.clear()
+        self.required_by.clear()
+
+
+require_graph = RequireGraph()
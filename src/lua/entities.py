@@ -0,0 +1,120 @@
+import math
+from weakref import WeakKeyDictionary
+
+from src.core.entity_registry import entity_registry
+from src.core.entity_store import entity_store
+from src.lua.sandbox import LuaSandbox
+
+# Выполняется один раз на runtime: методы handle общие, в самом handle только id
+HANDLE_FACTORY = '''
+    local setmetatable = setmetatable
+    return function(get, set_position, set_velocity, set_frame, alive)
+        local methods = {}
+        function methods:position() return get(self.id, "x"), get(self.id, "y") end
+        function methods:velocity() return get(self.id, "vx"), get(self.id, "vy") end
+        function methods:size() return get(self.id, "width"), get(self.id, "height") end
+        function methods:frame() return get(self.id, "frame") end
+        function methods:set_position(x, y) set_position(self.id, x, y) end
+        function methods:set_velocity(vx, vy) set_velocity(self.id, vx, vy) end
+        function methods:set_frame(frame) set_frame(self.id, frame) end
+        function methods:alive() return alive(self.id) end
+        local meta = {__index = methods, __metatable = false}
+        return function(id) return setmetatable({id = id}, meta) end
+    end
+'''
+
+def finite(value) -> float:
+    """Число из Lua для координат и размеров: inf/nan сломали бы пространственный индекс"""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Expected a finite number, got {value}")
+    return value
+
+
+# sandbox -> функция создания handle; runtime выгруженного пака не удерживается
+_handle_factories = WeakKeyDictionary()
+
+
+def _handle_factory(sandbox: LuaSandbox):
+    factory = _handle_factories.get(sandbox)
+    if factory is None:
+        def require_handle(qualified_id):
+            handle = entity_store.get(str(qualified_id))
+            if handle is None:
+                raise KeyError(f"Entity {qualified_id} is not spawned")
+            return handle
+
+        def get(qualified_id, column):
+            value = entity_store.columns[column][require_handle(qualified_id).slot]
+            return int(value) if column == "frame" else float(value)
+
+        factory = sandbox.runtime.execute(HANDLE_FACTORY)(
+            get,
+            lambda qualified_id, x, y: require_handle(qualified_id).set_position(finite(x), finite(y)),
+            lambda qualified_id, vx, vy: require_handle(qualified_id).set_velocity(finite(vx), finite(vy)),
+            lambda qualified_id, frame: setattr(require_handle(qualified_id), "frame", int(frame)),
+            lambda qualified_id: str(qualified_id) in entity_store,
+        )
+        _handle_factories[sandbox] = factory
+    return factory
+
+
+def bind_entities(sandbox: LuaSandbox, env):
+    """
+    entities.get(id), by_pack, by_tag, at_point, in_rect, in_radius, move - реестр загруженных entity;
+    entities.handle(id), spawn, despawn - состояние во время работы (EntityStore).
+    id - полный "<content_pack_id>.<entity_id>", списки возвращаются таблицами Lua.
+    """
+    runtime = sandbox.runtime
+    new_handle = _handle_factory(sandbox)
+
+    def to_list(ids):
+        return runtime.table_from(ids)
+
+    def get(qualified_id):
+        entity = entity_registry.get(str(qualified_id))
+        if entity is None:
+            return None
+        x, y, width, height = entity_registry.bounds(str(qualified_id))
+        return runtime.table_from({
+            "id": str(qualified_id),
+            "content_pack_id": entity.content_pack_id,
+            "name": entity.name,
+            "x": x, "y": y, "width": width, "height": height,
+            "tags": runtime.table_from(list(entity.tags or ())),
+        })
+
+    def move(qualified_id, x, y, width=None, height=None):
+        qualified_id = str(qualified_id)
+        if entity_registry.get(qualified_id) is None:
+            return False
+        handle = entity_store.get(qualified_id)
+        if handle is not None:
+            if width is not None and height is not None:
+                handle.set_size(finite(width), finite(height))
+            handle.set_position(finite(x), finite(y))
+        else:
+            entity_registry.move(qualified_id, finite(x), finite(y),
+                                 None if width is None else finite(width), None if height is None else finite(height))
+        return True
+
+    def handle(qualified_id):
+        return None if entity_store.ensure(str(qualified_id)) is None else new_handle(str(qualified_id))
+
+    def spawn(qualified_id, x=0, y=0, width=0, height=0):
+        entity_store.spawn(str(qualified_id), finite(x), finite(y), finite(width), finite(height))
+        return new_handle(str(qualified_id))
+
+    env.entities = runtime.table_from({
+        "get": get,
+        "by_pack": lambda content_pack_id: to_list(entity_registry.by_pack(str(content_pack_id))),
+        "by_tag": lambda tag: to_list(entity_registry.by_tag(str(tag))),
+        "at_point": lambda x, y: to_list(entity_registry.at_point(finite(x), finite(y))),
+        "in_rect": lambda x, y, width, height: to_list(
+            entity_registry.in_rect(finite(x), finite(y), finite(width), finite(height))),
+        "in_radius": lambda x, y, radius: to_list(entity_registry.in_radius(finite(x), finite(y), finite(radius))),
+        "move": move,
+        "handle": handle,
+        "spawn": spawn,
+        "despawn": lambda qualified_id: entity_store.despawn(str(qualified_id)),
+    })
@@ -0,0 +1,38 @@
+from typing import Any
+
+from lupa import lua_type
+
+from src.core.event_bus import event_bus
+from src.lua.sandbox import LuaSandbox
+from src.lua.watchdog import LuaWatchdog
+
+
+def lua_to_python(value: Any, depth: int = 0) -> Any:
+    """Таблицы Lua нельзя передавать в другой LuaRuntime, поэтому payload хранится как dict/list"""
+    if lua_type(value) != 'table':
+        return value
+    if depth > 32:
+        raise ValueError("Event payload is nested too deep")
+
+    items = {key: lua_to_python(item, depth + 1) for key, item in value.items()}
+    if items and all(isinstance(key, int) for key in items) and sorted(items) == list(range(1, len(items) + 1)):
+        return [items[index] for index in range(1, len(items) + 1)]
+    return items
+
+
+def bind_event_bus(sandbox: LuaSandbox, env, owner: str):
+    runtime = sandbox.runtime
+
+    def deliver(handler, payload):
+        if isinstance(payload, (dict, list, tuple)):
+            payload = runtime.table_from(payload, recursive=True)
+        # Обработчик - код скрипта: под его бюджетом, как хуки
+        watchdog = LuaWatchdog.active
+        if watchdog is None or not watchdog.enabled:
+            handler(payload)
+        else:
+            watchdog.call(owner, "event", sandbox, handler, payload)
+
+    env.subscribe = lambda topic, fn: event_bus.subscribe(str(topic), fn, owner, deliver)
+    env.unsubscribe = lambda sub_id: event_bus.unsubscribe(sub_id, owner)
+    env.emit = lambda topic, payload=None: event_bus.emit(str(topic), lua_to_python(payload))
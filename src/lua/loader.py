@@ -1,11 +1,26 @@
-from lupa import LuaRuntime
+from lupa import LuaError, lua_type
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Tuple
 from src.core.logger import logger
 from src.core.models.m_settings import ModelSettings
-from src.lua.modules import LUA_FUNCTIONS, LUA_CLASSES
+from src.lua.bridge import LuaBridge
+from src.lua.animation import bind_animation
+from src.lua.bytecode_cache import BytecodeCache
+from src.lua.dependencies import require_graph
+from src.lua.entities import bind_entities
+from src.lua.events import bind_event_bus
+from src.lua.sandbox import LuaSandbox
+from src.lua.save import bind_save
+from src.lua.scheduler import lua_scheduler
+from src.resource.source import ContentPackSource, VpkSource, open_source
+
 
 class LoaderLua:
+    RUNTIME_MODES = ("isolated", "pack", "global")
+
+    # Общие runtime для режимов "pack" (ключ - путь пака) и "global"
+    _shared_sandboxes: Dict[str, LuaSandbox] = {}
+
     def __init__(self, config: Optional[ModelSettings] = None):
         self.logger = logger
         self.config = config
@@ -13,41 +28,35 @@ class LoaderLua:
             from src.core.settings import settings
             self.config = settings
 
-    def _create_safe_lua_runtime(self, content_pack_path: Path) -> LuaRuntime:
+        self.runtime_mode = self.config.lua_runtime_mode
+        if self.runtime_mode not in self.RUNTIME_MODES:
+            self.logger.error(f"Invalid lua runtime mode: {self.runtime_mode}, use 'isolated'")
+            self.runtime_mode = "isolated"
+
+        self.bridge = LuaBridge(self.config)
+        self.content_pack_id: Optional[str] = None
+        # Каталог или .vpk загружаемого пака
+        self.source: Optional[ContentPackSource] = None
+
+        # (корень пака, имя модуля) -> resolved путь к файлу модуля
+        self._module_paths: Dict[Tuple[Path, str], Path] = {}
+
+        self.bytecode_cache: Optional[BytecodeCache] = None
+        if self.config.lua_bytecode_cache:
+            self.bytecode_cache = BytecodeCache.get(self.config.lua_cache_directory, self.config.lua_cache_key_file)
+
+    def _get_sandbox(self, content_pack_path: Path) -> LuaSandbox:
         try:
-            lua = LuaRuntime()
-            lua.execute('''
-                print = nil
-                os = nil
-                io = nil
-                package = nil
-                loadfile = nil
-                dofile = nil
-            ''')
-
-            def safe_require(modname):
-                if not isinstance(modname, str):
-                    raise Exception("Module name must be string")
-                modpath = modname.replace('.', '/')
-                full_path = content_pack_path / f"{modpath}.lua"
-                if not (self._is_safe_path(full_path, content_pack_path)):
-                    raise Exception(f"Access outside content pack not allowed: {modname}")
-                if full_path.exists():
-                    file_path = full_path
-                else:
-                    raise Exception(f"Module not found: {modname}")
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        module_code = f.read()
-                    module_env = lua.table()
-                    lua.execute(module_code, module_env)
-                    return module_env
-                except Exception as e:
-                    raise Exception(f"Failed to load module {modname}: {str(e)}")
-
-            lua.globals().require = safe_require
-            self._enhance_runtime(lua)
-            return lua
+            if self.runtime_mode == "isolated":
+                return LuaSandbox()
+
+            key = "global" if self.runtime_mode == "global" else str(content_pack_path.resolve())
+            sandbox = self._shared_sandboxes.get(key)
+            if sandbox is None:
+                sandbox = LuaSandbox()
+                self._shared_sandboxes[key] = sandbox
+                self.logger.debug(f"Created shared Lua runtime: {key}")
+            return sandbox
         except ImportError as e:
             self.logger.error(f"Failed to create Lua runtime: {str(e)}")
             raise
@@ -55,33 +64,110 @@ class LoaderLua:
             self.logger.error(f"Unexpected error creating Lua runtime: {str(e)}")
             raise
 
-    def _enhance_runtime(self, runtime: LuaRuntime, script_id: str = 'unknown'):
-        runtime.globals().script_id = script_id
-        for name, fn in LUA_FUNCTIONS.items():
-            def wrapper(*args, **kwargs):
-                try:
-                    line = runtime.eval('debug.getinfo(3).currentline')
-                except:
-                    line = 'unknown'
-                self.logger.info(f"Called <{name}> from <{script_id}> at line <{line}>")
-                return fn(*args, **kwargs)
-            runtime.globals()[name] = wrapper
-
-        for name, cls in LUA_CLASSES.items():
-            wrapped_methods = {}
-            for attr_name in dir(cls):
-                attr = getattr(cls, attr_name)
-                if callable(attr) and not attr_name.startswith('__'):
-                    def method_wrapper(self, *args, **kwargs):
-                        try:
-                            line = runtime.eval('debug.getinfo(3).currentline')
-                        except:
-                            line = 'unknown'
-                        self.logger.debug(f"Called {cls.__name__}.{attr_name} from {script_id} at line {line}")
-                        return attr(self, *args, **kwargs)
-                    wrapped_methods[attr_name] = method_wrapper
-            wrapped_cls = type('Wrapped' + cls.__name__, (cls,), wrapped_methods)
-            runtime.globals()[name] = wrapped_cls
+    @classmethod
+    def shared_sandbox(cls, key: str) -> Optional[LuaSandbox]:
+        return cls._shared_sandboxes.get(key)
+
+    @classmethod
+    def release_content_pack(cls, content_pack_path: Path):
+        """Отпускает общий runtime пака (режим pack), чтобы его память освободилась"""
+        if content_pack_path is not None:
+            cls._shared_sandboxes.pop(str(content_pack_path.resolve()), None)
+
+    def _resolve_module(self, content_pack_root: Path, modname: str) -> Path:
+        key = (content_pack_root, modname)
+        module_path = self._module_paths.get(key)
+        if module_path is None:
+            modpath = modname.replace('.', '/')
+            module_path = (content_pack_root / f"{modpath}.lua").resolve()
+            try:
+                module_path.relative_to(content_pack_root)
+            except ValueError:
+                raise Exception(f"Access outside content pack not allowed: {modname}")
+            self._module_paths[key] = module_path
+        return module_path
+
+    def _make_safe_require(self, sandbox: LuaSandbox, content_pack_path: Path, requirer_path: Path):
+        content_pack_root = content_pack_path.resolve()
+        requirer_path = requirer_path.resolve()
+        source = self.source
+
+        def safe_require(modname):
+            if not isinstance(modname, str):
+                raise Exception("Module name must be string")
+            file_path = self._resolve_module(content_pack_root, modname)
+            name = file_path.relative_to(content_pack_root).as_posix()
+            signature = source.signature(name)
+            if signature is None:
+                raise Exception(f"Module not found: {modname}")
+            _, mtime_ns, size = signature
+
+            require_graph.add(requirer_path, file_path)
+
+            # Как package.loaded: модуль выполняется один раз на runtime, пока файл не изменился.
+            # В isolated режиме у каждого скрипта свой runtime и модуль выполняется в каждом;
+            # общим между ними остаётся только скомпилированный байткод (BytecodeCache)
+            if file_path in sandbox.loaded:
+                cached = sandbox.loaded[file_path]
+                if cached is None:
+                    raise Exception(f"Circular require: {modname}")
+                if cached[0] == mtime_ns and cached[1] == size:
+                    return cached[2]
+
+            sandbox.loaded[file_path] = None
+            try:
+                module_code = source.read_text(name)
+                require_graph.forget(file_path)
+                module_env = sandbox.new_env()
+                self._setup_env(sandbox, module_env, content_pack_path, modname, file_path)
+                result = self._run_code(sandbox, module_code, module_env, f"={modname}")
+                module = module_env if result is None else result
+            except Exception as e:
+                del sandbox.loaded[file_path]
+                raise Exception(f"Failed to load module {modname}: {str(e)}")
+
+            sandbox.loaded[file_path] = (mtime_ns, size, module)
+            return module
+
+        return safe_require
+
+    def _run_code(self, sandbox: LuaSandbox, code: str, env, chunk_name: str):
+        if self.bytecode_cache is None:
+            return sandbox.run(code, env, chunk_name)
+
+        bytecode = self.bytecode_cache.get_bytecode(code, chunk_name)
+        try:
+            chunk = sandbox.load(bytecode, env, chunk_name, mode="b")
+        except LuaError as e:
+            self.logger.warning(f"Cached bytecode for {chunk_name} rejected, compile from source: {e}")
+            self.bytecode_cache.invalidate(code, chunk_name)
+            chunk = sandbox.load(code, env, chunk_name)
+        return chunk()
+
+    def _setup_env(self, sandbox: LuaSandbox, env, content_pack_path: Path, script_id: str, script_path: Path):
+        env.require = self._make_safe_require(sandbox, content_pack_path, script_path)
+        self.bridge.bind(sandbox, env, script_id, self.qualified_id(script_id))
+        lua_scheduler.bind(sandbox, env, self.qualified_id(script_id))
+        bind_event_bus(sandbox, env, self.qualified_id(script_id))
+        bind_entities(sandbox, env)
+        bind_animation(sandbox, env)
+        bind_save(sandbox, env, self.qualified_id(script_id))
+
+    def qualified_id(self, script_id: str) -> str:
+        """Полный id скрипта, как в LuaManager: <content_pack_id>.<script_id>"""
+        return f"{self.content_pack_id}.{script_id}" if self.content_pack_id else script_id
+
+    @staticmethod
+    def _collect_hooks(env, base_globals) -> Dict[str, Any]:
+        # Только функции, объявленные самим скриптом (без стандартной библиотеки и API)
+        hooks = {}
+        for key, value in env.items():
+            if isinstance(key, str) and key not in base_globals and lua_type(value) == 'function':
+                hooks[key] = value
+        return hooks
+
+    def _is_packed(self) -> bool:
+        return isinstance(self.source, VpkSource)
 
     def _is_safe_path(self, target_path: Path, base_path: Path) -> bool:
         try:
@@ -90,15 +176,23 @@ class LoaderLua:
         except ValueError:
             return False
 
-    def scan_content_pack_scripts(self, content_pack_path: Path) -> Dict[str, Any]:
-        self.logger.info(f"Scanning Lua scripts in: {content_pack_path}")
+    def _open_source(self, content_pack_path: Path, source: Optional[ContentPackSource] = None):
+        self.source = source if source is not None else open_source(content_pack_path)
+
+    def scan_content_pack_scripts(self, content_pack_path: Path, content_pack_id: Optional[str] = None,
+                                  source: Optional[ContentPackSource] = None) -> Dict[str, Any]:
+        self.content_pack_id = content_pack_id
+        self._open_source(content_pack_path, source)
+        self.logger.info(f"Scanning Lua scripts in: {content_pack_path} (mode: {self.runtime_mode})")
         scripts = {}
 
-        for lua_file in content_pack_path.rglob("*.lua"):
-            if self._is_safe_path(lua_file, content_pack_path):
+        for name in self.source.files(".lua"):
+            lua_file = content_pack_path / name
+            # Имена в архиве проверены при открытии; в каталоге может быть symlink наружу
+            if self._is_packed() or self._is_safe_path(lua_file, content_pack_path):
                 script_data = self._load_lua_script(lua_file, content_pack_path)
                 if script_data:
-                    script_id = lua_file.relative_to(content_pack_path).with_suffix('').as_posix().replace('/', '.')
+                    script_id = self.script_id_from_path(lua_file, content_pack_path)
                     scripts[script_id] = script_data
                     self.logger.info(f"Loaded Lua script: {script_id}")
             else:
@@ -106,22 +200,42 @@ class LoaderLua:
 
         return scripts
 
+    @staticmethod
+    def script_id_from_path(script_path: Path, content_pack_path: Path) -> str:
+        return script_path.relative_to(content_pack_path).with_suffix('').as_posix().replace('/', '.')
+
+    def load_script(self, script_path: Path, content_pack_path: Path,
+                    content_pack_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Загрузка одного скрипта (для горячей перезагрузки)"""
+        self.content_pack_id = content_pack_id
+        self._open_source(content_pack_path)
+        if not self._is_safe_path(script_path, content_pack_path):
+            self.logger.warning(f"Unsafe script path: {script_path}")
+            return None
+        return self._load_lua_script(script_path, content_pack_path)
+
     def _load_lua_script(self, script_path: Path, content_pack_path: Path) -> Optional[Dict[str, Any]]:
         try:
-            lua_runtime = self._create_safe_lua_runtime(content_pack_path)
-            script_id = script_path.relative_to(content_pack_path).with_suffix('').as_posix().replace('/', '.')
-            self._enhance_runtime(lua_runtime, script_id)
+            sandbox = self._get_sandbox(content_pack_path)
+            script_id = self.script_id_from_path(script_path, content_pack_path)
+            # В isolated режиме окружение скрипта - глобалы его собственного runtime
+            env = sandbox.globals() if self.runtime_mode == "isolated" else sandbox.new_env()
+            self._setup_env(sandbox, env, content_pack_path, script_id, script_path)
+            require_graph.forget(script_path.resolve())
 
-            with open(script_path, 'r', encoding='utf-8') as f:
-                script_content = f.read()
+            script_content = self.source.read_text(script_path.relative_to(content_pack_path).as_posix())
 
-            lua_runtime.execute(script_content)
+            base_globals = set(env.keys())
+            self._run_code(sandbox, script_content, env, f"={script_id}")
 
             return {
                 'path': script_path,
                 'content': script_content,
-                'runtime': lua_runtime
+                'runtime': sandbox.runtime,
+                'sandbox': sandbox,
+                'env': env,
+                'hooks': self._collect_hooks(env, base_globals)
             }
         except Exception as e:
             self.logger.error(f"Failed to load Lua script {script_path}: {str(e)}")
-            return None
\ No newline at end of file
+            return None
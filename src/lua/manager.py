@@ -1,14 +1,50 @@
-from typing import Dict, Any, List, Optional
+from time import perf_counter_ns
+from typing import AbstractSet, Dict, Any, List, Optional, Set, Tuple, Callable
+from src.core.event_bus import event_bus
 from src.core.logger import logger
+from src.core.profiler import profiler
+from src.core.models.m_settings import ModelSettings
+from src.lua.events import lua_to_python
+from src.lua.scheduler import lua_scheduler
+from src.lua.watchdog import LuaWatchdog
 from src.resource.models.resources import ModelResources
 
 
+class _RateGroup:
+    """on_update скриптов с одинаковым on_update_rate: один счётчик времени на группу"""
+    __slots__ = ("period", "elapsed", "implementers")
+
+    def __init__(self, rate: float):
+        self.period = 1.0 / rate
+        self.elapsed = 0.0
+        self.implementers: List[Tuple[str, Any]] = []
+
+
 class LuaManager:
-    def __init__(self, resources: ModelResources):
+    def __init__(self, resources: ModelResources, config: Optional[ModelSettings] = None):
         self.logger = logger
+        self.config = config
+        if config is None:
+            from src.core.settings import settings
+            self.config = settings
+
         self.resources = resources
+        self.watchdog = LuaWatchdog(self.config)
+        LuaWatchdog.active = self.watchdog
         self.scripts: Dict[str, Dict[str, Any]] = {}
+        # hook name -> [(script_id, lua function)] в порядке регистрации скриптов
+        self.hooks: Dict[str, List[Tuple[str, Any]]] = {}
+        # on_update_rate скриптов (Гц); скрипты без него вызываются каждый тик
+        self._update_rates: Dict[str, float] = {}
+        self._update_every_tick: List[Tuple[str, Any]] = []
+        self._update_groups: Dict[float, _RateGroup] = {}
+        # Состояние из on_unload скриптов выгруженных паков до их повторной загрузки
+        self._suspended: Dict[str, Any] = {}
+        # Скрипты, чьи хуки вызывались с прошлого used_content_packs(): их паки не простаивают
+        self._ran: Set[str] = set()
         self._load_all_scripts()
+        if resources.materializer is not None:
+            resources.materializer.listeners.append(self)
 
     def _load_all_scripts(self):
         for content_pack_id, content_pack in self.resources.content_packs.items():
@@ -16,7 +52,159 @@ class LuaManager:
                 for script_id, script_data in content_pack.scripts.items():
                     full_id = f"{content_pack_id}.{script_id}"
                     self.scripts[full_id] = script_data
+                    self._read_update_rate(full_id, script_data)
                     self.logger.debug(f"Registered script: {full_id}")
+        self._rebuild_hook_index()
+
+    def _rebuild_hook_index(self):
+        hooks: Dict[str, List[Tuple[str, Any]]] = {}
+        for script_id, script_data in self.scripts.items():
+            for hook_name, lua_func in script_data.get('hooks', {}).items():
+                hooks.setdefault(hook_name, []).append((script_id, lua_func))
+        self.hooks = hooks
+        self._rebuild_update_groups()
+        self.logger.debug(f"Hook index rebuilt: {len(hooks)} hooks, {len(self.scripts)} scripts")
+
+    def _read_update_rate(self, script_id: str, script_data: Dict[str, Any]):
+        self._update_rates.pop(script_id, None)
+        env = script_data.get('env')
+        rate = env['on_update_rate'] if env is not None else None
+        if rate is None:
+            return
+        if isinstance(rate, (int, float)) and not isinstance(rate, bool) and rate > 0:
+            self._update_rates[script_id] = float(rate)
+        else:
+            self.logger.warning(f"Invalid on_update_rate in {script_id}: {rate}, updating every tick")
+
+    def _rebuild_update_groups(self):
+        every_tick: List[Tuple[str, Any]] = []
+        groups: Dict[float, _RateGroup] = {}
+        for script_id, lua_func in self.hooks.get("on_update", ()):
+            rate = self._update_rates.get(script_id)
+            if rate is None:
+                every_tick.append((script_id, lua_func))
+                continue
+            group = groups.get(rate)
+            if group is None:
+                group = groups[rate] = _RateGroup(rate)
+                # Накопленное время группы переживает перестройку
+                old = self._update_groups.get(rate)
+                if old is not None:
+                    group.elapsed = old.elapsed
+            group.implementers.append((script_id, lua_func))
+        self._update_every_tick = every_tick
+        self._update_groups = groups
+
+    def _reindex_script(self, script_id: str, old_hooks: Dict[str, Any], new_hooks: Dict[str, Any]):
+        # Меняем только списки хуков этого скрипта; позиция скрипта в порядке вызова сохраняется
+        for hook_name in old_hooks:
+            if hook_name not in new_hooks:
+                implementers = [entry for entry in self.hooks.get(hook_name, ()) if entry[0] != script_id]
+                if implementers:
+                    self.hooks[hook_name] = implementers
+                else:
+                    self.hooks.pop(hook_name, None)
+
+        for hook_name, lua_func in new_hooks.items():
+            implementers = self.hooks.setdefault(hook_name, [])
+            for index, (implementer_id, _) in enumerate(implementers):
+                if implementer_id == script_id:
+                    implementers[index] = (script_id, lua_func)
+                    break
+            else:
+                implementers.append((script_id, lua_func))
+
+    def register_script(self, script_id: str, script_data: Dict[str, Any]):
+        """Регистрирует или заменяет (при перезагрузке) скрипт, обновляя индекс хуков на месте"""
+        old = self.scripts.get(script_id)
+        self.scripts[script_id] = script_data
+        self._read_update_rate(script_id, script_data)
+        self._reindex_script(script_id, old.get('hooks', {}) if old else {}, script_data.get('hooks', {}))
+        self._rebuild_update_groups()
+        self.logger.debug(f"Registered script: {script_id}")
+
+    def _release_script(self, script_id: str,
+                        keep: Tuple[AbstractSet[int], AbstractSet[int]] = (frozenset(), frozenset())):
+        """Отменяет таймеры, корутины и подписки скрипта, кроме keep - (id задач, id подписок)"""
+        lua_scheduler.cancel_owner(script_id, keep[0])
+        event_bus.unsubscribe_owner(script_id, keep[1])
+
+    def unregister_script(self, script_id: str):
+        old = self.scripts.pop(script_id, None)
+        if old is not None:
+            self._release_script(script_id)
+            self.watchdog.forget(script_id)
+            self._update_rates.pop(script_id, None)
+            self._reindex_script(script_id, old.get('hooks', {}), {})
+            self._rebuild_update_groups()
+            self.logger.debug(f"Unregistered script: {script_id}")
+
+    def reload_script(self, script_id: str, load_script: Callable[[], Optional[Dict[str, Any]]]) -> bool:
+        """
+        Заменяет скрипт новой версией от load_script().
+
+        Новая версия загружается до выгрузки старой: если она не загрузилась, старая остаётся
+        со своими таймерами, корутинами и подписками. После загрузки старая версия получает
+        on_unload(); его результат (таблица или значение) передаётся в on_reload(state) новой
+        версии. Если on_reload нет, вызывается on_startup().
+        """
+        old = self.scripts.get(script_id)
+        owned = (lua_scheduler.owned(script_id), event_bus.owned(script_id))
+        script_data = load_script()
+        # Таймеры и подписки, заведённые кодом новой версии при загрузке: у них тот же владелец
+        added = (lua_scheduler.owned(script_id) - owned[0], event_bus.owned(script_id) - owned[1])
+        if script_data is None:
+            for entry_id in added[0]:
+                lua_scheduler.cancel(entry_id)
+            for sub_id in added[1]:
+                event_bus.unsubscribe(sub_id)
+            self.logger.error(f"Reload of {script_id} failed, keep previous version")
+            return False
+
+        state = None
+        if old is not None:
+            if 'on_unload' in old.get('hooks', {}):
+                state = lua_to_python(self.execute_function(script_id, 'on_unload'))
+            self._release_script(script_id, keep=added)
+
+        self.register_script(script_id, script_data)
+        self.watchdog.forget(script_id)
+        self._start_script(script_id, script_data, state, resumed=True)
+        self.logger.info(f"Reloaded script: {script_id}")
+        return True
+
+    def _start_script(self, script_id: str, script_data: Dict[str, Any], state: Any = None, resumed: bool = False):
+        hooks = script_data.get('hooks', {})
+        if resumed and 'on_reload' in hooks:
+            if isinstance(state, (dict, list)):
+                state = script_data['runtime'].table_from(state, recursive=True)
+            self.execute_function(script_id, 'on_reload', state)
+        elif 'on_startup' in hooks:
+            self.execute_function(script_id, 'on_startup')
+
+    def activate_content_pack(self, content_pack_id: str) -> bool:
+        """Загружает пак (content_pack_loading: lazy) и запускает его скрипты"""
+        return self.resources.get_content_pack(content_pack_id) is not None
+
+    def content_pack_materialized(self, content_pack):
+        for script_id, script_data in content_pack.scripts.items():
+            full_id = f"{content_pack.id}.{script_id}"
+            self.register_script(full_id, script_data)
+            resumed = full_id in self._suspended
+            self._start_script(full_id, script_data, self._suspended.pop(full_id, None), resumed=resumed)
+
+    def used_content_packs(self) -> Set[str]:
+        """Паки, чьи хуки вызывались с прошлого вызова; ContentPackMaterializer обновляет по ним LRU"""
+        ran, self._ran = self._ran, set()
+        return {script_id.split('.', 1)[0] for script_id in ran}
+
+    def content_pack_unloading(self, content_pack):
+        # Как при перезагрузке: on_unload отдаёт состояние, которое вернётся в on_reload при следующей загрузке
+        for script_id, script_data in content_pack.scripts.items():
+            full_id = f"{content_pack.id}.{script_id}"
+            if 'on_unload' in script_data.get('hooks', {}):
+                self._suspended[full_id] = lua_to_python(self.execute_function(full_id, 'on_unload'))
+            self.unregister_script(full_id)
 
     def execute_function(self, script_id: str, function_name: str, *args) -> Any:
         script_data = self.scripts.get(script_id)
@@ -25,9 +213,9 @@ class LuaManager:
             return None
 
         try:
-            lua_func = script_data['runtime'].globals()[function_name]
+            lua_func = script_data['env'][function_name]
             if lua_func:
-                result = lua_func(*args)
+                result = self._call(script_id, function_name, script_data, lua_func, *args)
                 self.logger.trace(f"Executed {script_id}.{function_name}")
                 return result
             else:
@@ -43,17 +231,79 @@ class LuaManager:
             return []
 
         functions = []
-        runtime = script_data['runtime']
-        for key in runtime.globals().keys():
-            if callable(runtime.globals()[key]):
+        env = script_data['env']
+        for key in env.keys():
+            if callable(env[key]):
                 functions.append(key)
 
         return functions
 
+    def get_hook_implementers(self, function_name: str) -> List[str]:
+        return [script_id for script_id, _ in self.hooks.get(function_name, ())]
+
+    def _call(self, script_id: str, function_name: str, script_data: Dict[str, Any], lua_func, *args) -> Any:
+        self._ran.add(script_id)
+        if profiler.enabled:
+            start = perf_counter_ns()
+            try:
+                return self._invoke(script_id, function_name, script_data, lua_func, *args)
+            finally:
+                profiler.record(function_name, "lua", start, perf_counter_ns() - start,
+                                {"script": script_id, "hook": function_name})
+        return self._invoke(script_id, function_name, script_data, lua_func, *args)
+
+    def _invoke(self, script_id: str, function_name: str, script_data: Dict[str, Any], lua_func, *args) -> Any:
+        if not self.watchdog.enabled:
+            return lua_func(*args)
+        return self.watchdog.call(script_id, function_name, script_data['sandbox'], lua_func, *args)
+
+    def begin_tick(self):
+        self.watchdog.begin_tick()
+
     def execute_all(self, function_name: str, *args) -> None:
-        for script_id in list(self.scripts.keys()):
-            if function_name in self.get_available_functions(script_id):
-                try:
-                    self.execute_function(script_id, function_name, *args)
-                except Exception as e:
-                    logger.error(f"Error executing {function_name} in {script_id}: {str(e)}")
\ No newline at end of file
+        self._execute_implementers(function_name, self.hooks.get(function_name, ()), *args)
+
+    def _execute_implementers(self, function_name: str, implementers, *args) -> None:
+        for script_id, lua_func in implementers:
+            try:
+                self._call(script_id, function_name, self.scripts[script_id], lua_func, *args)
+            except Exception as e:
+                logger.error(f"Error executing {function_name} in {script_id}: {str(e)}")
+
+    def _run_on_update(self, delta_time: float) -> None:
+        self._execute_implementers("on_update", self._update_every_tick, delta_time)
+        # Группа с on_update_rate вызывается, когда накопила свой период, и получает всё накопленное время
+        for group in self._update_groups.values():
+            group.elapsed += delta_time
+            # Допуск на накопленную ошибку сложения float (30 * 1/60 < 0.5)
+            if group.elapsed >= group.period - 1e-9:
+                group_delta, group.elapsed = group.elapsed, 0.0
+                self._execute_implementers("on_update", group.implementers, group_delta)
+
+    def update(self, delta_time: float) -> None:
+        """Один тик Lua: on_update, доставка событий, пробуждение корутин"""
+        self.begin_tick()
+        self._run_on_update(delta_time)
+        # События, накопленные с прошлого тика (ввод, emit из скриптов), доставляются после on_update
+        if profiler.enabled:
+            start = perf_counter_ns()
+            event_bus.dispatch()
+            middle = perf_counter_ns()
+            lua_scheduler.update(delta_time)
+            profiler.record("event_bus.dispatch", "events", start, middle - start)
+            profiler.record("lua_scheduler.update", "scheduler", middle, perf_counter_ns() - middle)
+        else:
+            event_bus.dispatch()
+            lua_scheduler.update(delta_time)
+
+    def shutdown(self) -> None:
+        """После on_exit: отменяет таймеры, корутины и подписки всех скриптов и отпускает их runtime"""
+        materializer = self.resources.materializer
+        if materializer is not None and self in materializer.listeners:
+            materializer.listeners.remove(self)
+        for script_id in list(self.scripts):
+            self.unregister_script(script_id)
+        self._suspended.clear()
+        self._ran.clear()
+        if LuaWatchdog.active is self.watchdog:
+            LuaWatchdog.active = None
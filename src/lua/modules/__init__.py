@@ -1,14 +1,20 @@
 import importlib
 import inspect
+import json
 import pkgutil
 from pathlib import Path
 from src.core.logger import logger
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
-def lua_func(name: Optional[str] = None):
+def lua_func(name: Optional[str] = None, main_process: bool = False, script_id: bool = False):
+    """main_process=True - функция работает с Qt/логами приложения; в worker-процессах вызов
+    ставится в очередь и выполняется в главном процессе после тика (результат не возвращается)
+    script_id=True - первым аргументом функция получает id вызвавшего скрипта"""
     def decorator(fn):
         setattr(fn, "__lua_func__", name or fn.__name__)
+        setattr(fn, "__lua_main_process__", main_process)
+        setattr(fn, "__lua_script_id__", script_id)
         return fn
     return decorator
 
@@ -22,10 +28,59 @@ def lua_cls(name: Optional[str] = None):
 LUA_FUNCTIONS = {}
 LUA_CLASSES = {}
 
-def _discover_lua_components():
+MANIFEST_VERSION = 1
+
+
+class LazyLuaFunction:
+    """
+    Функция Lua API из манифеста: модуль импортируется при первом вызове, после чего
+    функция заменяет заглушку в LUA_FUNCTIONS (скрипты, загруженные позже, получают её напрямую)
+    """
+
+    def __init__(self, name: str, module_name: str, attr: str, main_process: bool, script_id: bool):
+        self.__lua_func__ = name
+        self.__lua_main_process__ = main_process
+        self.__lua_script_id__ = script_id
+        self.module_name = module_name
+        self.attr = attr
+        self.fn = None
+
+    def resolve(self):
+        if self.fn is None:
+            module = importlib.import_module(f'.{self.module_name}', __name__)
+            self.fn = getattr(module, self.attr)
+            if LUA_FUNCTIONS.get(self.__lua_func__) is self:
+                LUA_FUNCTIONS[self.__lua_func__] = self.fn
+        return self.fn
+
+    def __call__(self, *args, **kwargs):
+        return (self.fn or self.resolve())(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyLuaFunction({self.__lua_func__!r}, {self.module_name}.{self.attr})"
+
+
+def _module_signatures() -> Dict[str, List[int]]:
+    package_path = Path(__file__).parent
+    signatures = {}
+    for _, module_name, is_package in pkgutil.iter_modules([str(package_path)]):
+        stat = (package_path / module_name / "__init__.py" if is_package else package_path / f"{module_name}.py").stat()
+        signatures[module_name] = [stat.st_mtime_ns, stat.st_size]
+    return signatures
+
+
+def _manifest_path() -> Path:
+    from src.core.settings import settings
+    return Path(settings.lua_cache_directory) / "modules.json"
+
+
+def _discover_lua_components() -> Dict[str, Any]:
+    """Импорт всех модулей пакета; возвращает манифест найденных функций и классов"""
     logger.info("Start discovering lua components")
     package_path = Path(__file__).parent
     package_name = __name__
+    manifest: Dict[str, Any] = {"version": MANIFEST_VERSION, "modules": _module_signatures(),
+                                "functions": {}, "classes": {}}
 
     for _, module_name, _ in pkgutil.iter_modules([str(package_path)]):
         if module_name == '__init__':
@@ -41,6 +96,8 @@ def _discover_lua_components():
                         logger.critical(f"Duplicate lua function {lua_name}")
                         raise Exception(f"Duplicate lua function {lua_name}")
                     LUA_FUNCTIONS[lua_name] = obj
+                    manifest["functions"][lua_name] = [module_name, name, getattr(obj, "__lua_main_process__", False),
+                                                       getattr(obj, "__lua_script_id__", False)]
                     logger.info(f"Registered lua function: {lua_name}")
 
                 if hasattr(obj, '__lua_cls__'):
@@ -49,6 +106,7 @@ def _discover_lua_components():
                         logger.critical(f"Duplicate lua class {lua_name}")
                         raise Exception(f"Duplicate lua class {lua_name}")
                     LUA_CLASSES[lua_name] = obj
+                    manifest["classes"][lua_name] = [module_name, name]
                     logger.info(f"Registered lua class: {lua_name}")
 
         except ImportError as e:
@@ -57,5 +115,41 @@ def _discover_lua_components():
     logger.info("Finished discovering lua components")
     logger.info(f"Loaded functions: {len(LUA_FUNCTIONS)}")
     logger.info(f"Loaded classes: {len(LUA_CLASSES)}")
+    return manifest
+
+
+def _register_from_manifest() -> bool:
+    """
+    Регистрация по манифесту (modules.json в lua_cache_directory): функции - заглушками
+    LazyLuaFunction без импорта модулей, классы импортируются сразу (LuaBridge обходит их
+    методы при привязке). False - манифеста нет или модули пакета изменились.
+    """
+    try:
+        with open(_manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("modules") != _module_signatures():
+        return False
+
+    for lua_name, (module_name, attr, main_process, script_id) in manifest["functions"].items():
+        LUA_FUNCTIONS[lua_name] = LazyLuaFunction(lua_name, module_name, attr, main_process, script_id)
+    for lua_name, (module_name, attr) in manifest["classes"].items():
+        LUA_CLASSES[lua_name] = getattr(importlib.import_module(f'.{module_name}', __name__), attr)
+    logger.info(f"Registered lua components from manifest: {len(LUA_FUNCTIONS)} functions, "
+                f"{len(LUA_CLASSES)} classes")
+    return True
+
+
+def _save_manifest(manifest: Dict[str, Any]):
+    path = _manifest_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+    except OSError as e:
+        logger.warning(f"Failed to write lua modules manifest {path}: {e}")
+
 
-_discover_lua_components()
\ No newline at end of file
+if not _register_from_manifest():
+    _save_manifest(_discover_lua_components())
@@ -1,6 +1,6 @@
-from src.core.logger import logger
+from src.core.script_log import script_log
 from . import lua_func
 
-@lua_func(name='print')
-def lua_print(*args):
-    logger.info(" ".join(args))
\ No newline at end of file
+@lua_func(name='print', main_process=True, script_id=True)
+def lua_print(script_id, *args):
+    script_log.write(script_id, args)
@@ -0,0 +1,244 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from lupa import LuaRuntime
+
+# Увеличивать при любом изменении SANDBOX_PRELUDE/SANDBOX_HELPERS: входит в ключ кэша байткода
+SANDBOX_VERSION = 4
+
+# Выполняется первым, пока debug ещё доступен; скриптам debug не виден, иначе debug.sethook()
+# снимал бы ограничение CPU.
+# guarded_call вызывает fn под debug.sethook: каждые step инструкций проверяет лимит инструкций
+# и дедлайн. Возвращает ok, число инструкций (с точностью до step), причину превышения и
+# результаты fn (или ошибку). Хук ставится на поток Lua, поэтому coroutine.resume и
+# coroutine.wrap переносят хук текущего вызова на возобновляемую корутину. После превышения
+# хук срабатывает на каждой инструкции: pcall в скрипте не даёт продолжить работу.
+GUARDED_CALL = '''
+    local sethook, gethook, getinfo = debug.sethook, debug.gethook, debug.getinfo
+    local pcall, error, type = pcall, error, type
+    local pack, unpack = table.pack, table.unpack
+    local co_create, co_resume, co_close = coroutine.create, coroutine.resume, coroutine.close
+    -- Хук текущего guarded_call и его шаг; nil - вызов без ограничений
+    local active_hook, active_count = nil, 0
+    local guarded_call
+
+    local function resume(co, ...)
+        if type(co) == "thread" then
+            if active_hook then
+                sethook(co, active_hook, "", active_count)
+            else
+                sethook(co)
+            end
+        end
+        return co_resume(co, ...)
+    end
+
+    local function finish_wrapped(co, ok, ...)
+        if not ok then
+            co_close(co)
+            error((...), 2)
+        end
+        return ...
+    end
+
+    coroutine.resume = resume
+    coroutine.wrap = function(fn)
+        local co = co_create(fn)
+        return function(...)
+            return finish_wrapped(co, resume(co, ...))
+        end
+    end
+
+    guarded_call = function(fn, instruction_limit, deadline, clock, step, ...)
+        local count, exceeded = 0, nil
+        local hook
+        hook = function()
+            if exceeded == nil then
+                count = count + step
+                if instruction_limit > 0 and count > instruction_limit then
+                    exceeded = "instructions"
+                elseif deadline > 0 and clock() > deadline then
+                    exceeded = "time"
+                else
+                    return
+                end
+                active_count = 1
+            end
+            -- Код самого guarded_call после pcall не прерываем
+            if getinfo(2, "f").func == guarded_call then
+                return
+            end
+            sethook(hook, "", 1)
+            error(exceeded .. " budget exceeded", 2)
+        end
+
+        -- Вложенный вызов (событие из хука другого скрипта того же runtime) возвращает внешний хук
+        local outer_hook, outer_mask, outer_count = gethook()
+        local outer_active, outer_active_count = active_hook, active_count
+        active_hook, active_count = hook, step
+        sethook(hook, "", step)
+        local results = pack(pcall(fn, ...))
+        active_hook, active_count = outer_active, outer_active_count
+        if type(outer_hook) == "function" then
+            sethook(outer_hook, outer_mask, outer_count)
+        else
+            sethook()
+        end
+        return results[1], count, exceeded, unpack(results, 2, results.n)
+    end
+
+    local function current_line(level)
+        local info = getinfo(level, "l")
+        return info and info.currentline
+    end
+
+    return guarded_call, current_line
+'''
+
+SANDBOX_PRELUDE = '''
+    print = nil
+    debug = nil
+    os = nil
+    io = nil
+    package = nil
+    loadfile = nil
+    dofile = nil
+'''
+
+# Выполняется один раз на runtime, пока load/setmetatable ещё доступны
+SANDBOX_HELPERS = '''
+    local base, load, setmetatable, getmetatable = _G, load, setmetatable, getmetatable
+    local error, next, ipairs = error, next, ipairs
+
+    -- Метатаблица строк общая для всего runtime: скрытая, она не даёт добраться до настоящей string
+    getmetatable("").__metatable = false
+
+    local LIBRARIES = {"string", "table", "math", "coroutine", "utf8"}
+
+    local function read_only(name, lib)
+        return setmetatable({}, {
+            __index = lib,
+            __newindex = function()
+                error(name .. " is read-only", 2)
+            end,
+            __pairs = function()
+                local key
+                return function()
+                    local value
+                    key, value = next(lib, key)
+                    return key, value
+                end
+            end,
+            __metatable = false,
+        })
+    end
+
+    local function new_env()
+        local env = setmetatable({}, {__index = base, __metatable = false})
+        env._G = env
+        for _, name in ipairs(LIBRARIES) do
+            env[name] = read_only(name, base[name])
+        end
+        env.load = function(chunk, chunkname, mode, chunk_env)
+            return load(chunk, chunkname, mode, chunk_env or env)
+        end
+        return env
+    end
+
+    local function load_chunk(code, chunkname, env, mode)
+        local fn, err = load(code, chunkname, mode, env)
+        if not fn then
+            error(err, 0)
+        end
+        return fn
+    end
+
+    local create, resume, status = coroutine.create, coroutine.resume, coroutine.status
+    local yield, isyieldable = coroutine.yield, coroutine.isyieldable
+    local tasks = {}
+
+    function wait(seconds)
+        if not isyieldable() then
+            error("wait() can only be called inside a coroutine (spawn/set_timeout/set_interval)", 2)
+        end
+        return yield("time", seconds or 0)
+    end
+
+    function wait_frames(frames)
+        if not isyieldable() then
+            error("wait_frames() can only be called inside a coroutine (spawn/set_timeout/set_interval)", 2)
+        end
+        return yield("frames", frames or 1)
+    end
+
+    -- Корутины хранятся на стороне Lua, Python оперирует только их id
+    local function create_task(id, fn)
+        tasks[id] = create(fn)
+    end
+
+    local function resume_task(id, ...)
+        local co = tasks[id]
+        if co == nil then
+            return false, true, "task not found"
+        end
+        local ok, kind, amount = resume(co, ...)
+        local done = status(co) == "dead"
+        if done then
+            tasks[id] = nil
+        end
+        return ok, done, kind, amount
+    end
+
+    local function drop_task(id)
+        tasks[id] = nil
+    end
+
+    return new_env, load_chunk, create_task, resume_task, drop_task
+'''
+
+
+class LuaSandbox:
+    """LuaRuntime без os/io/package/loadfile/dofile/debug, умеющий выполнять код в отдельных _ENV"""
+
+    def __init__(self):
+        self.runtime = LuaRuntime()
+        self._guarded_call, self._current_line = self.runtime.execute(GUARDED_CALL)
+        self.runtime.execute(SANDBOX_PRELUDE)
+        (self._new_env, self._load_chunk,
+         self.create_task, self.resume_task, self.drop_task) = self.runtime.execute(SANDBOX_HELPERS)
+        # Аналог package.loaded: путь модуля -> (mtime_ns, size, значение); None - модуль загружается
+        self.loaded: Dict[Path, Optional[Tuple[int, int, Any]]] = {}
+
+    def globals(self):
+        return self.runtime.globals()
+
+    def new_env(self):
+        """
+        Таблица окружения; чтение проваливается в глобалы runtime, запись остаётся в ней.
+
+        string/table/math/coroutine/utf8 - свои для каждого окружения прокси только для чтения,
+        поэтому скрипт не может подменить функции библиотек для остальных. Общими остаются
+        сами функции библиотек и базовые функции, метатаблица строк (скрыта от getmetatable)
+        и wait/wait_frames.
+        """
+        return self._new_env()
+
+    def load(self, code, env, chunk_name: str = "=chunk", mode: str = "t"):
+        """Компилирует исходник (mode="t") или байткод (mode="b") в функцию с окружением env"""
+        return self._load_chunk(code, chunk_name, env, mode)
+
+    def run(self, code, env, chunk_name: str = "=chunk", mode: str = "t"):
+        return self.load(code, env, chunk_name, mode)()
+
+    def current_line(self, level: int = 3):
+        """Строка вызывающего Lua кода для Python функции, вызванной из Lua"""
+        try:
+            return self._current_line(level)
+        except Exception:
+            return 'unknown'
+
+    def call_guarded(self, fn, instruction_limit: int, deadline: float, clock, step: int, *args):
+        return self._guarded_call(fn, instruction_limit, deadline, clock, step, *args)
+
+    def memory_kb(self) -> float:
+        return self.runtime.eval('collectgarbage("count")')
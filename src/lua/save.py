@@ -0,0 +1,61 @@
+from weakref import WeakKeyDictionary
+
+from src.core.saves import save_manager
+from src.lua.sandbox import LuaSandbox
+
+# Прокси таблицы состояния: чтение и pairs идут в data, запись отмечает ключ в dirty.
+# Отметка остаётся в Lua, поэтому присваивание не вызывает Python
+PROXY_FACTORY = '''
+    local setmetatable, next, rawequal, type = setmetatable, next, rawequal, type
+    return function(data, dirty)
+        return setmetatable({}, {
+            __index = data,
+            __newindex = function(_, key, value)
+                if type(value) == "table" or not rawequal(data[key], value) then
+                    dirty[key] = true
+                end
+                data[key] = value
+            end,
+            __pairs = function() return next, data, nil end,
+            __len = function() return #data end,
+            __metatable = false,
+        })
+    end
+'''
+
+# sandbox -> функция создания прокси; runtime выгруженного пака не удерживается
+_proxy_factories = WeakKeyDictionary()
+
+
+def bind_save(sandbox: LuaSandbox, env, owner: str):
+    """
+    save.register(name, defaults) - таблица, которая сохраняется между запусками; при повторном
+    запуске значения из сохранения заменяют defaults. Изменения вложенных таблиц не видны
+    прокси - после них нужен save.mark(name, key) (без key - все ключи таблицы).
+    """
+    runtime = sandbox.runtime
+    make_proxy = _proxy_factories.get(sandbox)
+    if make_proxy is None:
+        make_proxy = _proxy_factories[sandbox] = runtime.execute(PROXY_FACTORY)
+    # name -> (data, dirty) таблиц этого скрипта
+    tables = {}
+
+    def register(name, defaults=None):
+        name = str(name)
+        data = defaults if defaults is not None else runtime.table()
+        for key, value in save_manager.saved(f"{owner}:{name}").items():
+            data[key] = runtime.table_from(value, recursive=True) if isinstance(value, (dict, list, tuple)) else value
+        dirty = runtime.table()
+        tables[name] = (data, dirty)
+        save_manager.track(f"{owner}:{name}", data, dirty)
+        return make_proxy(data, dirty)
+
+    def mark(name, key=None):
+        data, dirty = tables[str(name)]
+        for marked in (data.keys() if key is None else (key,)):
+            dirty[marked] = True
+
+    env.save = runtime.table_from({
+        "register": register,
+        "mark": mark,
+    })
@@ -0,0 +1,169 @@
+import heapq
+import itertools
+from typing import AbstractSet, Dict, List, Optional, Set, Tuple
+
+from src.core.logger import logger
+from src.lua.sandbox import LuaSandbox
+from src.lua.watchdog import LuaWatchdog
+
+
+class _Entry:
+    __slots__ = ("id", "owner", "sandbox", "fn", "interval", "wake", "cancelled", "args")
+
+    def __init__(self, entry_id: int, owner: str, sandbox: LuaSandbox, fn=None, interval: Optional[float] = None):
+        self.id = entry_id
+        self.owner = owner
+        self.sandbox = sandbox
+        self.fn = fn  # None - корутина, иначе таймер, запускающий fn в новой корутине
+        self.interval = interval
+        self.wake = 0.0
+        self.cancelled = False
+        # Аргументы отложенного возобновления (бюджет тика скрипта исчерпан)
+        self.args = ()
+
+
+class LuaScheduler:
+    """
+    Корутины и таймеры скриптов.
+
+    Спящие корутины и таймеры лежат в min-heap по времени (или номеру кадра) пробуждения;
+    update() достаёт только те, чей срок наступил, поэтому ждущие скрипты ничего не стоят за кадр.
+    В Lua доступны spawn, set_timeout, set_interval, cancel, а внутри корутин - wait и wait_frames.
+    Корутины возобновляются через watchdog (хук "coroutine") с бюджетом скрипта-владельца;
+    если его tick_time_ms исчерпан, корутина ждёт следующего кадра.
+    """
+
+    def __init__(self):
+        self.logger = logger
+        self.time = 0.0
+        self.frame = 0
+        self._time_heap: List[Tuple[float, int, _Entry]] = []
+        self._frame_heap: List[Tuple[int, int, _Entry]] = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._entries: Dict[int, _Entry] = {}
+
+    def bind(self, sandbox: LuaSandbox, env, owner: str):
+        env.spawn = lambda fn, *args: self.spawn(sandbox, owner, fn, *args)
+        env.set_timeout = lambda fn, seconds: self.set_timeout(sandbox, owner, fn, seconds)
+        env.set_interval = lambda fn, seconds: self.set_interval(sandbox, owner, fn, seconds)
+        env.cancel = lambda entry_id: self.cancel(entry_id, owner)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._entries)
+
+    def spawn(self, sandbox: LuaSandbox, owner: str, fn, *args) -> int:
+        entry = _Entry(next(self._ids), owner, sandbox)
+        self._entries[entry.id] = entry
+        sandbox.create_task(entry.id, fn)
+        self._resume(entry, *args)
+        return entry.id
+
+    def set_timeout(self, sandbox: LuaSandbox, owner: str, fn, seconds: float) -> int:
+        return self._add_timer(_Entry(next(self._ids), owner, sandbox, fn), seconds)
+
+    def set_interval(self, sandbox: LuaSandbox, owner: str, fn, seconds: float) -> int:
+        return self._add_timer(_Entry(next(self._ids), owner, sandbox, fn, max(0.0, float(seconds))), seconds)
+
+    def _add_timer(self, entry: _Entry, seconds: float) -> int:
+        self._entries[entry.id] = entry
+        self._push_time(entry, self.time + max(0.0, float(seconds)))
+        return entry.id
+
+    def cancel(self, entry_id: int, owner: Optional[str] = None) -> bool:
+        entry = self._entries.get(entry_id)
+        if entry is None or (owner is not None and entry.owner != owner):
+            return False
+        self._drop(entry)
+        return True
+
+    def owned(self, owner: str) -> Set[int]:
+        return {entry.id for entry in self._entries.values() if entry.owner == owner}
+
+    def cancel_owner(self, owner: str, keep: AbstractSet[int] = frozenset()):
+        for entry in [entry for entry in self._entries.values() if entry.owner == owner and entry.id not in keep]:
+            self._drop(entry)
+
+    def _drop(self, entry: _Entry):
+        entry.cancelled = True
+        self._entries.pop(entry.id, None)
+        if entry.fn is None:
+            entry.sandbox.drop_task(entry.id)
+
+    def _push_time(self, entry: _Entry, wake: float):
+        entry.wake = wake
+        heapq.heappush(self._time_heap, (wake, next(self._seq), entry))
+
+    def _push_frame(self, entry: _Entry, frame: int):
+        heapq.heappush(self._frame_heap, (frame, next(self._seq), entry))
+
+    def _resume_task(self, entry: _Entry, watchdog: Optional[LuaWatchdog], *args):
+        if watchdog is None:
+            return entry.sandbox.resume_task(entry.id, *args)
+        result = watchdog.call(entry.owner, "coroutine", entry.sandbox, entry.sandbox.resume_task, entry.id, *args)
+        if result is None:
+            # Бюджет превышен: корутина прервана, как при ошибке
+            entry.sandbox.drop_task(entry.id)
+            return False, True, "budget exceeded", None
+        return result
+
+    def _resume(self, entry: _Entry, *args):
+        watchdog = LuaWatchdog.active
+        if watchdog is not None and not watchdog.enabled:
+            watchdog = None
+        if watchdog is not None and watchdog.exhausted(entry.owner, "coroutine"):
+            entry.args = args
+            self._push_frame(entry, self.frame + 1)
+            return
+        entry.args = ()
+
+        try:
+            ok, done, kind, amount = self._resume_task(entry, watchdog, *args)
+        except Exception as e:
+            ok, done, kind, amount = False, True, str(e), None
+
+        if not ok:
+            self.logger.error(f"Error in coroutine {entry.id} of {entry.owner}: {kind}")
+            done = True
+        if done:
+            self._entries.pop(entry.id, None)
+            return
+
+        if kind == "time":
+            self._push_time(entry, self.time + max(0.0, float(amount or 0)))
+        else:
+            # wait_frames или голый coroutine.yield - следующий кадр
+            self._push_frame(entry, self.frame + max(1, int(amount or 1)))
+
+    def _fire_timer(self, entry: _Entry):
+        if entry.interval is None:
+            self._entries.pop(entry.id, None)
+        else:
+            self._push_time(entry, max(entry.wake + entry.interval, self.time))
+        self.spawn(entry.sandbox, entry.owner, entry.fn)
+
+    def update(self, delta_time: float):
+        self.time += delta_time
+        self.frame += 1
+
+        # Сначала забираем всё, что уже пора будить: wait(0) внутри update не зациклится
+        due = []
+        while self._time_heap and self._time_heap[0][0] <= self.time:
+            due.append(heapq.heappop(self._time_heap)[2])
+        while self._frame_heap and self._frame_heap[0][0] <= self.frame:
+            due.append(heapq.heappop(self._frame_heap)[2])
+
+        for entry in due:
+            if entry.cancelled:
+                continue
+            if entry.fn is None:
+                self._resume(entry, *entry.args)
+            else:
+                self._fire_timer(entry)
+
+    def global_update(self, delta_time: float):
+        self.update(delta_time)
+
+
+lua_scheduler = LuaScheduler()
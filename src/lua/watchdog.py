@@ -0,0 +1,144 @@
+from time import perf_counter, perf_counter_ns
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelLuaBudget, ModelSettings
+from src.lua.sandbox import LuaSandbox
+
+
+class ScriptBudgetUsage:
+    __slots__ = ("calls", "instructions", "time_ns", "tick_time_ns", "overruns", "skipped", "last_overrun")
+
+    def __init__(self):
+        self.calls = 0
+        self.instructions = 0
+        self.time_ns = 0
+        self.tick_time_ns = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.last_overrun: Optional[str] = None
+
+
+class LuaWatchdog:
+    """
+    Ограничивает вызовы хуков скриптов по числу инструкций Lua и по времени.
+
+    Лимиты берутся из lua_budget и уточняются lua_budget_hooks (по имени хука)
+    и lua_budget_scripts (по полному id скрипта); 0 - без ограничения.
+    tick_time_ms - суммарное время скрипта за тик, сбрасывается в begin_tick().
+    Корутины и таймеры планировщика идут под именем "coroutine", обработчики событий - "event".
+    """
+    # Watchdog LuaManager этого процесса: через него вызывают Lua планировщик и шина событий
+    active: Optional["LuaWatchdog"] = None
+
+    def __init__(self, config: ModelSettings):
+        self.logger = logger
+        self.enabled = bool(config.lua_watchdog)
+        self.step = max(1, int(config.lua_watchdog_step))
+        self.default_budget = config.lua_budget
+        self.hook_budgets: Dict[str, ModelLuaBudget] = dict(config.lua_budget_hooks or {})
+        self.script_budgets: Dict[str, ModelLuaBudget] = dict(config.lua_budget_scripts or {})
+
+        self.usage: Dict[str, ScriptBudgetUsage] = {}
+        self._budgets: Dict[Tuple[str, str], Tuple[int, float, float]] = {}
+        # Скрипт, чей вызов сейчас выполняется: вложенный вызов того же скрипта (spawn из хука)
+        # уже входит во время внешнего
+        self._running: Optional[str] = None
+
+    def _resolve_budget(self, script_id: str, function_name: str) -> Tuple[int, float, float]:
+        key = (script_id, function_name)
+        budget = self._budgets.get(key)
+        if budget is None:
+            layers = [self.script_budgets.get(script_id), self.hook_budgets.get(function_name), self.default_budget]
+            values = []
+            for field in ("instructions", "time_ms", "tick_time_ms"):
+                value = next((getattr(layer, field) for layer in layers
+                              if layer is not None and getattr(layer, field) is not None), 0)
+                values.append(value or 0)
+            budget = (int(values[0]), float(values[1]) / 1000.0, float(values[2]) * 1e6)
+            self._budgets[key] = budget
+        return budget
+
+    def begin_tick(self):
+        for usage in self.usage.values():
+            usage.tick_time_ns = 0
+
+    def forget(self, script_id: str):
+        self.usage.pop(script_id, None)
+        self._budgets = {key: value for key, value in self._budgets.items() if key[0] != script_id}
+
+    def exhausted(self, script_id: str, function_name: str) -> bool:
+        """Скрипт израсходовал tick_time_ms в этом тике: вызов будет пропущен"""
+        usage = self.usage.get(script_id)
+        if usage is None:
+            return False
+        tick_limit_ns = self._resolve_budget(script_id, function_name)[2]
+        return bool(tick_limit_ns) and usage.tick_time_ns >= tick_limit_ns
+
+    def call(self, script_id: str, function_name: str, sandbox: LuaSandbox, lua_func, *args) -> Any:
+        usage = self.usage.get(script_id)
+        if usage is None:
+            usage = self.usage[script_id] = ScriptBudgetUsage()
+
+        instruction_limit, time_limit, tick_limit_ns = self._resolve_budget(script_id, function_name)
+        deadline = 0.0
+        if time_limit or tick_limit_ns:
+            if tick_limit_ns and usage.tick_time_ns >= tick_limit_ns:
+                usage.skipped += 1
+                return None
+            now = perf_counter()
+            remaining = [limit for limit in (time_limit, (tick_limit_ns - usage.tick_time_ns) / 1e9) if limit > 0]
+            deadline = now + min(remaining)
+
+        outer, self._running = self._running, script_id
+        start = perf_counter_ns()
+        try:
+            ok, count, exceeded, *results = sandbox.call_guarded(
+                lua_func, instruction_limit, deadline, perf_counter, self.step, *args
+            )
+        finally:
+            self._running = outer
+        elapsed = perf_counter_ns() - start
+
+        usage.calls += 1
+        usage.instructions += count
+        if outer != script_id:
+            usage.time_ns += elapsed
+            usage.tick_time_ns += elapsed
+
+        if exceeded is not None:
+            usage.overruns += 1
+            usage.last_overrun = f"{function_name}: {exceeded}"
+            self.logger.error(f"Script {script_id} exceeded {exceeded} budget in {function_name} "
+                              f"({count} instructions, {elapsed / 1e6:.1f} ms), call aborted")
+            return None
+        if not ok:
+            raise Exception(results[0])
+        # Как при прямом вызове из lupa: одно значение или кортеж
+        if len(results) == 1:
+            return results[0]
+        return tuple(results) or None
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Использование бюджета по скриптам, самые дорогие первыми"""
+        rows = [
+            {
+                "script_id": script_id,
+                "calls": usage.calls,
+                "instructions": usage.instructions,
+                "time_ms": usage.time_ns / 1e6,
+                "overruns": usage.overruns,
+                "skipped": usage.skipped,
+                "last_overrun": usage.last_overrun,
+            }
+            for script_id, usage in self.usage.items()
+        ]
+        return sorted(rows, key=lambda row: row["time_ms"], reverse=True)
+
+    def report_by_content_pack(self) -> Dict[str, float]:
+        """Суммарное время (мс) по content pack - первой части полного id скрипта"""
+        packs: Dict[str, float] = {}
+        for script_id, usage in self.usage.items():
+            pack_id = script_id.split('.', 1)[0]
+            packs[pack_id] = packs.get(pack_id, 0.0) + usage.time_ns / 1e6
+        return dict(sorted(packs.items(), key=lambda item: item[1], reverse=True))
@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import List, Optional, Tuple
+
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.resource.models.resources import ModelResources
+
+# (имя хука, аргументы)
+HookCall = Tuple[str, tuple]
+
+
+def _make_proxy(name: str, outbox: List[Tuple[str, tuple]]):
+    from src.lua.events import lua_to_python
+
+    def proxy(*args):
+        outbox.append((name, tuple(lua_to_python(arg) for arg in args)))
+
+    return proxy
+
+
+def _worker_main(conn, config_data: dict, content_packs: List[Tuple[str, str]]):
+    """
+    Точка входа worker-процесса: грузит свои content pack и выполняет пачки вызовов.
+    Логгер здесь не настраивается: у worker только stderr, файлы логов пишет главный процесс.
+    """
+    from src.lua.loader import LoaderLua
+    from src.lua.manager import LuaManager
+    from src.lua.modules import LUA_FUNCTIONS
+    from src.resource.models.content_pack import ModelContentPack
+
+    outbox: List[Tuple[str, tuple]] = []
+    for name, fn in list(LUA_FUNCTIONS.items()):
+        if getattr(fn, "__lua_main_process__", False):
+            proxy = LUA_FUNCTIONS[name] = _make_proxy(name, outbox)
+            # id скрипта подставляет LuaBridge и в worker - он уходит в главный процесс первым аргументом
+            proxy.__lua_script_id__ = getattr(fn, "__lua_script_id__", False)
+
+    config = ModelSettings(**config_data)
+    resources = ModelResources()
+    for content_pack_id, path in content_packs:
+        scripts = LoaderLua(config).scan_content_pack_scripts(Path(path), content_pack_id)
+        resources.content_packs[content_pack_id] = ModelContentPack(id=content_pack_id, path=Path(path), scripts=scripts)
+    manager = LuaManager(resources, config)
+    conn.send(("ready", len(manager.scripts)))
+
+    while True:
+        message = conn.recv()
+        if message[0] == "stop":
+            break
+
+        _, calls, delta_time = message
+        start = perf_counter()
+        for function_name, args in calls:
+            manager.execute_all(function_name, *args)
+        if delta_time is not None:
+            manager.update(delta_time)
+
+        proxied = list(outbox)
+        outbox.clear()
+        conn.send(("done", perf_counter() - start, proxied))
+
+    conn.close()
+
+
+class _Worker:
+    # starting - процесс запущен, ждём "ready"; ready - принимает вызовы;
+    # waiting - упал, новый запуск в retry_at; failed - превышен lua_worker_max_restarts
+    STATES = ("starting", "ready", "waiting", "failed")
+
+    def __init__(self, index: int, content_packs: List[Tuple[str, str]]):
+        self.index = index
+        self.content_packs = content_packs
+        self.process = None
+        self.conn = None
+        self.state = "starting"
+        self.scripts = 0
+        self.last_elapsed = 0.0
+        self.restarts = 0
+        # Неудачи подряд: от них растёт пауза перед перезапуском; сбрасывается первым ответом
+        self.failures = 0
+        self.retry_at = 0.0
+        self.ready_deadline = 0.0
+
+
+class LuaWorkerPool:
+    """
+    Выполняет content pack в пуле процессов (lua_execution_mode: workers).
+
+    Интерфейс как у LuaManager (execute_all, update, shutdown). За тик каждому worker
+    уходит одно сообщение со всеми вызовами и приходит один ответ. Функции API с
+    main_process=True выполняются в главном процессе по списку из ответа. Упавший или
+    зависший worker перезапускается без ожидания в GUI-потоке: процесс запускается после
+    паузы (RESTART_BACKOFF, удваивается с каждой неудачей подряд), готовность проверяется в
+    следующих тиках, а после готовности его скрипты получают on_startup заново. После
+    lua_worker_max_restarts неудач подряд worker отключается.
+    """
+    RESTART_BACKOFF = 0.5
+    MAX_RESTART_BACKOFF = 30.0
+    # Загрузка пака может быть долгой, поэтому таймаут готовности шире, чем на тик
+    READY_TIMEOUT = 60.0
+
+    def __init__(self, resources: ModelResources, config: Optional[ModelSettings] = None):
+        self.logger = logger
+        self.config = config
+        if config is None:
+            from src.core.settings import settings
+            self.config = settings
+
+        model = self.config.data if hasattr(self.config, "data") else self.config
+        self._config_data = model.model_dump()
+        self.timeout = float(self.config.lua_worker_timeout)
+        self.max_restarts = int(self.config.lua_worker_max_restarts)
+        self._context = multiprocessing.get_context("spawn")
+
+        content_packs = [(str(content_pack_id), str(content_pack.path))
+                         for content_pack_id, content_pack in resources.content_packs.items()
+                         if content_pack.path is not None]
+        count = max(1, min(self.config.lua_workers or os.cpu_count() or 1, len(content_packs) or 1))
+        groups = [content_packs[index::count] for index in range(count)]
+
+        self.workers = [_Worker(index, group) for index, group in enumerate(groups) if group]
+        for worker in self.workers:
+            self._start(worker)
+        # Первый запуск ждём (до on_startup от приложения); неудачные перезапускаются в фоне
+        for worker in self.workers:
+            if worker.conn.poll(max(0.0, worker.ready_deadline - monotonic())):
+                self._receive_ready(worker)
+            else:
+                self._restart(worker, "failed to start")
+
+    def _start(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        worker.conn = parent_conn
+        worker.process = self._context.Process(
+            target=_worker_main, args=(child_conn, self._config_data, worker.content_packs),
+            name=f"lua-worker-{worker.index}", daemon=True
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.state = "starting"
+        worker.ready_deadline = monotonic() + max(self.timeout, self.READY_TIMEOUT)
+
+    def _receive_ready(self, worker: _Worker) -> bool:
+        try:
+            _, worker.scripts = worker.conn.recv()
+        except (EOFError, OSError):
+            self._restart(worker, "failed to start")
+            return False
+        worker.state = "ready"
+        self.logger.info(f"Lua worker {worker.index} ready: {len(worker.content_packs)} packs, "
+                         f"{worker.scripts} scripts")
+        return True
+
+    def _restart(self, worker: _Worker, reason: str):
+        """Останавливает процесс и планирует новый запуск; не блокирует"""
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.terminate()
+        worker.conn.close()
+        worker.restarts += 1
+        worker.failures += 1
+        packs = [pack for pack, _ in worker.content_packs]
+        if worker.failures > self.max_restarts:
+            worker.state = "failed"
+            self.logger.error(f"Lua worker {worker.index} ({packs}) {reason}, "
+                              f"disabled after {self.max_restarts} restarts")
+            return
+        delay = min(self.RESTART_BACKOFF * 2 ** (worker.failures - 1), self.MAX_RESTART_BACKOFF)
+        worker.state = "waiting"
+        worker.retry_at = monotonic() + delay
+        self.logger.error(f"Lua worker {worker.index} ({packs}) {reason}, restarting in {delay:.1f} s")
+
+    def _check_restarts(self) -> List[_Worker]:
+        """Запускает worker, чья пауза истекла; возвращает только что готовые (им нужен on_startup)"""
+        now = monotonic()
+        started = []
+        for worker in self.workers:
+            if worker.state == "waiting" and now >= worker.retry_at:
+                self._start(worker)
+            elif worker.state == "starting":
+                try:
+                    ready = worker.conn.poll(0)
+                except (EOFError, OSError):
+                    ready = False
+                if ready:
+                    if self._receive_ready(worker):
+                        started.append(worker)
+                elif not worker.process.is_alive() or now > worker.ready_deadline:
+                    self._restart(worker, "failed to start")
+        return started
+
+    def _run_batch(self, calls: List[HookCall], delta_time: Optional[float]):
+        started = self._check_restarts()
+
+        sent = []
+        for worker in self.workers:
+            if worker.state != "ready":
+                continue
+            # Перезапущенный worker получает on_startup первым вызовом своей пачки
+            worker_calls = [("on_startup", ())] + calls if worker in started else calls
+            try:
+                worker.conn.send(("batch", worker_calls, delta_time))
+                sent.append(worker)
+            except (BrokenPipeError, OSError):
+                self._restart(worker, "is not reachable")
+
+        proxied: List[Tuple[str, tuple]] = []
+        for worker in sent:
+            try:
+                if not worker.conn.poll(self.timeout):
+                    self._restart(worker, f"did not answer in {self.timeout} s")
+                    continue
+                _, worker.last_elapsed, worker_proxied = worker.conn.recv()
+                worker.failures = 0
+                proxied.extend(worker_proxied)
+            except (EOFError, OSError):
+                self._restart(worker, "crashed")
+
+        self._run_proxied(proxied)
+
+    def _run_proxied(self, proxied: List[Tuple[str, tuple]]):
+        if not proxied:
+            return
+        from src.lua.modules import LUA_FUNCTIONS
+
+        for name, args in proxied:
+            fn = LUA_FUNCTIONS.get(name)
+            if fn is None:
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                self.logger.error(f"Error executing proxied <{name}>: {e}")
+
+    def execute_all(self, function_name: str, *args) -> None:
+        self._run_batch([(function_name, args)], None)
+
+    def begin_tick(self):
+        pass
+
+    def update(self, delta_time: float) -> None:
+        self._run_batch([], delta_time)
+
+    def shutdown(self) -> None:
+        for worker in self.workers:
+            try:
+                worker.conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.terminate()
@@ -0,0 +1,206 @@
+"""
+Атлас кадров спрайта: кадры листа (или отдельные файлы) обрезаются по непрозрачной области,
+одинаковые кадры хранятся один раз, остальные раскладываются полками в одно изображение.
+
+Дисковый кэш (little-endian):
+    заголовок  ATLAS_MAGIC | версия u16 | ширина u32 | высота u32 | кадров u32 | ширина кадра u32 | высота кадра u32
+    кадры      на кадр: x u32 | y u32 | ширина u32 | высота u32 | смещение x i32 | смещение y i32
+    пиксели    RGBA8888 premultiplied, строки без выравнивания
+
+Атлас из кэша собирается из сырых пикселей без декодирования PNG.
+"""
+import hashlib
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QPoint, QRect
+from PySide6.QtGui import QImage, QPainter
+
+from src.core.logger import logger
+
+ATLAS_MAGIC = b"VPAT"
+ATLAS_VERSION = 1
+ATLAS_SUFFIX = ".atlas"
+ATLAS_FORMAT = QImage.Format.Format_RGBA8888_Premultiplied
+
+HEADER = struct.Struct("<4sHIIIII")
+FRAME = struct.Struct("<IIIIii")
+
+# Прозрачный зазор между кадрами, чтобы при масштабировании не подмешивались соседи
+PADDING = 1
+
+
+class AtlasFrame(NamedTuple):
+    # Прямоугольник в атласе
+    x: int
+    y: int
+    width: int
+    height: int
+    # Положение обрезанного кадра внутри исходного кадра
+    offset_x: int
+    offset_y: int
+
+
+class Atlas:
+    """Изображение атласа и прямоугольники кадров; pixmap появляется после загрузки в GUI-потоке"""
+
+    def __init__(self, image: Optional[QImage], frames: List[AtlasFrame], frame_width: int, frame_height: int):
+        self.image = image
+        self.pixmap = None
+        self.frames = frames
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.width = image.width() if image is not None else 0
+        self.height = image.height() if image is not None else 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def nbytes(self) -> int:
+        return self.width * self.height * 4
+
+    def source_rect(self, index: int) -> QRect:
+        frame = self.frames[index]
+        return QRect(frame.x, frame.y, frame.width, frame.height)
+
+    def target_offset(self, index: int) -> QPoint:
+        frame = self.frames[index]
+        return QPoint(frame.offset_x, frame.offset_y)
+
+
+def opaque_bounds(image: QImage) -> Optional[Tuple[int, int, int, int]]:
+    """(x, y, ширина, высота) непрозрачной области; None - кадр полностью прозрачный"""
+    image = image.convertToFormat(ATLAS_FORMAT)
+    width, height, stride = image.width(), image.height(), image.bytesPerLine()
+    data = bytes(image.constBits())
+    top = bottom = None
+    left, right = width, -1
+    for row in range(height):
+        alpha = data[row * stride + 3:row * stride + width * 4:4]
+        stripped = alpha.lstrip(b"\0")
+        if not stripped:
+            continue
+        if top is None:
+            top = row
+        bottom = row
+        left = min(left, width - len(stripped))
+        right = max(right, len(alpha.rstrip(b"\0")) - 1)
+    if top is None:
+        return None
+    return left, top, right - left + 1, bottom - top + 1
+
+
+def split_sheet(sheet: QImage, frame_width: int, frame_height: int) -> List[QImage]:
+    """Кадры листа слева направо, сверху вниз"""
+    columns = max(1, sheet.width() // frame_width)
+    rows = max(1, sheet.height() // frame_height)
+    return [sheet.copy(column * frame_width, row * frame_height, frame_width, frame_height)
+            for row in range(rows) for column in range(columns)]
+
+
+def build_atlas(frames: Sequence[QImage]) -> Atlas:
+    """Обрезка, удаление повторов и раскладка кадров полками по убыванию высоты"""
+    frame_width = max((frame.width() for frame in frames), default=0)
+    frame_height = max((frame.height() for frame in frames), default=0)
+
+    unique: List[QImage] = []
+    # индекс кадра -> (индекс уникального изображения, смещение x, смещение y)
+    placements: List[Tuple[int, int, int]] = []
+    seen: Dict[Tuple[int, int, bytes], int] = {}
+    for frame in frames:
+        bounds = opaque_bounds(frame)
+        if bounds is None:
+            bounds = (0, 0, 1, 1)
+        x, y, width, height = bounds
+        cropped = frame.copy(x, y, width, height).convertToFormat(ATLAS_FORMAT)
+        key = (width, height, bytes(cropped.constBits()))
+        index = seen.get(key)
+        if index is None:
+            index = seen[key] = len(unique)
+            unique.append(cropped)
+        placements.append((index, x, y))
+
+    area = sum((image.width() + PADDING) * (image.height() + PADDING) for image in unique)
+    atlas_width = 1
+    while atlas_width * atlas_width < area or atlas_width < max((image.width() for image in unique), default=1):
+        atlas_width *= 2
+
+    positions: List[Tuple[int, int]] = [(0, 0)] * len(unique)
+    shelf_x = shelf_y = shelf_height = 0
+    for index in sorted(range(len(unique)), key=lambda i: -unique[i].height()):
+        image = unique[index]
+        if shelf_x + image.width() > atlas_width:
+            shelf_x, shelf_y, shelf_height = 0, shelf_y + shelf_height + PADDING, 0
+        positions[index] = (shelf_x, shelf_y)
+        shelf_x += image.width() + PADDING
+        shelf_height = max(shelf_height, image.height())
+
+    atlas_image = QImage(atlas_width, max(1, shelf_y + shelf_height), ATLAS_FORMAT)
+    atlas_image.fill(0)
+    painter = QPainter(atlas_image)
+    painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+    for image, (x, y) in zip(unique, positions):
+        painter.drawImage(x, y, image)
+    painter.end()
+
+    atlas_frames = []
+    for index, offset_x, offset_y in placements:
+        x, y = positions[index]
+        atlas_frames.append(AtlasFrame(x, y, unique[index].width(), unique[index].height(), offset_x, offset_y))
+    return Atlas(atlas_image, atlas_frames, frame_width, frame_height)
+
+
+def cache_key(signatures: Sequence, frame_size: Optional[Tuple[int, int]]) -> str:
+    """Ключ дискового кэша по сигнатурам исходных файлов (путь, mtime, размер) и размеру кадра"""
+    raw = f"{ATLAS_VERSION}|{frame_size}|{list(signatures)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def write_atlas(path: Path, atlas: Atlas):
+    image = atlas.image.convertToFormat(ATLAS_FORMAT)
+    width, height, stride = image.width(), image.height(), image.bytesPerLine()
+    data = bytes(image.constBits())
+    if stride != width * 4:
+        data = b"".join(data[row * stride:row * stride + width * 4] for row in range(height))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, width, height, len(atlas.frames),
+                            atlas.frame_width, atlas.frame_height))
+        for frame in atlas.frames:
+            f.write(FRAME.pack(*frame))
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_atlas(path: Path) -> Optional[Atlas]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Failed to read atlas cache {path}: {e}")
+        return None
+
+    try:
+        magic, version, width, height, count, frame_width, frame_height = HEADER.unpack_from(data, 0)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            raise ValueError("bad header")
+        position = HEADER.size
+        frames = []
+        for _ in range(count):
+            frames.append(AtlasFrame(*FRAME.unpack_from(data, position)))
+            position += FRAME.size
+        if len(data) - position != width * height * 4:
+            raise ValueError("truncated pixels")
+    except (struct.error, ValueError) as e:
+        logger.warning(f"Rejected invalid atlas cache {path}: {e}")
+        return None
+
+    # copy(): QImage не владеет переданным буфером
+    image = QImage(data[position:], width, height, width * 4, ATLAS_FORMAT).copy()
+    return Atlas(image, frames, frame_width, frame_height)
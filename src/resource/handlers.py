@@ -7,6 +7,9 @@ from typing import Optional, Any
 import yaml
 import json
 
+# libyaml в разы быстрее чистого Python, если PyYAML собран с ним
+YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def handle_file_errors(func):
     @wraps(func)
@@ -28,4 +31,18 @@ def handle_file_errors(func):
         except Exception as e:
             logger.error(f"Unknown error while loading {path}: {e}")
         return None
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+@handle_file_errors
+def load_yaml(path: Path) -> Optional[Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        logger.debug(f"Load yaml {path.__str__()}")
+        return yaml.load(f, Loader=YamlSafeLoader)
+
+
+@handle_file_errors
+def save_yaml(path: Path, data: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        logger.debug(f"Save yaml {path.__str__()}")
+        f.write(yaml.dump(data, default_flow_style=False))
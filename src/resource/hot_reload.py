@@ -0,0 +1,219 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QFileSystemWatcher, QTimer
+
+from src.core.entity_registry import entity_registry
+from src.core.event_bus import event_bus
+from src.core.logger import logger
+from src.core.profiler import profiler
+from src.core.models.m_settings import ModelSettings
+from src.lua.dependencies import require_graph
+from src.lua.loader import LoaderLua
+from src.lua.manager import LuaManager
+from src.resource.loader import Loader
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.resources import ModelResources
+from src.resource.source import is_packed
+
+WATCHED_SUFFIXES = (".lua", ".yaml")
+
+
+class HotReloader:
+    """
+    Перезагрузка изменённых файлов content pack без перезапуска.
+
+    QFileSystemWatcher следит за каталогами и файлами паков. Изменения копятся
+    hot_reload_debounce_ms и обрабатываются пачкой: .lua - этот скрипт и все, кто его
+    require (по require_graph); .yaml - только этот entity. Работа зависит от числа
+    изменённых файлов, а не от числа установленных паков.
+    """
+
+    def __init__(self, resources: ModelResources, lua_manager: LuaManager, config: Optional[ModelSettings] = None):
+        self.logger = logger
+        self.config = config
+        if config is None:
+            from src.core.settings import settings
+            self.config = settings
+
+        self.resources = resources
+        self.lua_manager = lua_manager
+        self.loader = Loader(self.config)
+
+        # resolved корень пака -> (id пака, путь как в ModelContentPack)
+        self._pack_roots: Dict[Path, Tuple[str, Path]] = {}
+        for content_pack_id, content_pack in resources.content_packs.items():
+            # Упакованные .vpk не отслеживаются: после пересборки архива нужен перезапуск
+            if content_pack.path is not None and not is_packed(content_pack.path):
+                self._pack_roots[content_pack.path.resolve()] = (content_pack_id, content_pack.path)
+
+        # resolved путь скрипта -> полный id в LuaManager
+        self._script_ids: Dict[Path, str] = {}
+        for script_id, script_data in lua_manager.scripts.items():
+            self._script_ids[Path(script_data['path']).resolve()] = script_id
+
+        self._watcher: Optional[QFileSystemWatcher] = None
+        self._debounce: Optional[QTimer] = None
+        self._pending: Set[Path] = set()
+        self._dir_snapshots: Dict[Path, Dict[Path, Tuple[int, int]]] = {}
+        self.last_reload_ms = 0.0
+
+    def start(self):
+        self._watcher = QFileSystemWatcher()
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._debounce = QTimer()
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(int(self.config.hot_reload_debounce_ms))
+        self._debounce.timeout.connect(self._flush)
+
+        directories: List[str] = []
+        files: List[str] = []
+        for root in self._pack_roots:
+            for directory in [root, *[path for path in root.rglob("*") if path.is_dir()]]:
+                directories.append(str(directory))
+                self._dir_snapshots[directory] = self._snapshot(directory)
+                files.extend(str(path) for path in self._dir_snapshots[directory])
+        if directories:
+            self._watcher.addPaths(directories)
+        if files:
+            self._watcher.addPaths(files)
+        self.logger.info(f"Hot reload: watching {len(directories)} dirs, {len(files)} files")
+
+    def stop(self):
+        if self._watcher is not None:
+            self._watcher.deleteLater()
+            self._watcher = None
+
+    @staticmethod
+    def _snapshot(directory: Path) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in directory.iterdir():
+            if path.suffix in WATCHED_SUFFIXES and path.is_file():
+                stat = path.stat()
+                snapshot[path.resolve()] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _schedule(self, paths: Iterable[Path]):
+        self._pending.update(paths)
+        if self._debounce is not None:
+            self._debounce.start()
+
+    def _on_file_changed(self, path: str):
+        file = Path(path)
+        # Редакторы часто заменяют файл целиком, и watcher его теряет
+        if self._watcher is not None and file.exists() and path not in self._watcher.files():
+            self._watcher.addPath(path)
+        self._schedule([file.resolve()])
+
+    def _on_directory_changed(self, path: str):
+        directory = Path(path).resolve()
+        old = self._dir_snapshots.get(directory, {})
+        new = self._snapshot(directory) if directory.exists() else {}
+        self._dir_snapshots[directory] = new
+
+        changed = [file for file, signature in new.items() if old.get(file) != signature]
+        removed = [file for file in old if file not in new]
+        if self._watcher is not None:
+            added = [str(file) for file in new if file not in old]
+            if added:
+                self._watcher.addPaths(added)
+        self._schedule(changed + removed)
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        self.reload_paths(pending)
+
+    def _find_pack(self, file: Path) -> Optional[Tuple[str, Path, Path]]:
+        for parent in file.parents:
+            pack = self._pack_roots.get(parent)
+            if pack is not None:
+                return pack[0], pack[1], parent
+        return None
+
+    def reload_paths(self, paths: Iterable[Path]):
+        start = perf_counter()
+        scripts: Set[Path] = set()
+        for path in paths:
+            path = Path(path).resolve()
+            if path.suffix == ".lua":
+                scripts.add(path)
+                scripts.update(require_graph.dependents_of(path))
+            elif path.suffix == ".yaml":
+                with profiler.span("reload entity", "reload", {"path": str(path)}):
+                    self._reload_entity(path)
+
+        for script_path in scripts:
+            with profiler.span("reload script", "reload", {"path": str(script_path)}):
+                self._reload_script(script_path)
+
+        self.last_reload_ms = (perf_counter() - start) * 1000
+        if scripts:
+            self.logger.info(f"Hot reload: {len(scripts)} scripts in {self.last_reload_ms:.1f} ms")
+
+    def _reload_script(self, script_path: Path):
+        pack = self._find_pack(script_path)
+        if pack is None:
+            return
+        content_pack_id, content_pack_path, _ = pack
+        if not self.resources.is_materialized(content_pack_id):
+            # Ленивый пак ещё не загружен: новая версия подхватится при загрузке
+            return
+        script_id = self._script_ids.get(script_path)
+
+        if not script_path.exists():
+            if script_id is not None:
+                self.lua_manager.unregister_script(script_id)
+                del self._script_ids[script_path]
+                self._content_pack(content_pack_id).scripts.pop(script_id.split('.', 1)[1], None)
+            return
+
+        # content_pack.path может быть относительным, сам скрипт - нет
+        relative_path = content_pack_path / script_path.relative_to(content_pack_path.resolve())
+        local_id = LoaderLua.script_id_from_path(relative_path, content_pack_path)
+        script_id = script_id or f"{content_pack_id}.{local_id}"
+        loader_lua = LoaderLua(self.config)
+
+        def load_script():
+            return loader_lua.load_script(relative_path, content_pack_path, content_pack_id)
+
+        if self.lua_manager.reload_script(script_id, load_script):
+            self._script_ids[script_path] = script_id
+            self._content_pack(content_pack_id).scripts[local_id] = self.lua_manager.scripts[script_id]
+
+    def _content_pack(self, content_pack_id: str) -> ModelContentPack:
+        return self.resources.content_packs[content_pack_id]
+
+    def _reload_entity(self, file: Path):
+        pack = self._find_pack(file)
+        if pack is None:
+            return
+        content_pack_id, _, _ = pack
+        if not self.resources.is_materialized(content_pack_id):
+            return
+        if file.stem == self.config.file_name_for_content_pack:
+            self.logger.warning(f"Hot reload: {file} changed, restart required to apply content pack info")
+            return
+
+        content_pack = self._content_pack(content_pack_id)
+        if not isinstance(content_pack.entities, dict):
+            content_pack.entities = {}
+
+        if not file.exists():
+            self.logger.warning(f"Hot reload: entity file removed {file}, entity kept until restart")
+            return
+
+        try:
+            entity = self.loader.load_entity(file, content_pack)
+        except Exception as e:
+            self.logger.error(f"Hot reload: failed to load entity {file}: {e}")
+            return
+        if entity is None:
+            return
+
+        content_pack.entities[entity.id] = entity
+        entity_registry.register(entity)
+        event_bus.emit("entity.reloaded", {"content_pack_id": content_pack_id, "entity_id": entity.id})
+        self.logger.info(f"Hot reload: entity {content_pack_id}.{entity.id}")
@@ -0,0 +1,146 @@
+from time import monotonic
+from typing import Any, Dict, List, Optional, Set
+
+from src.core.entity_registry import entity_registry
+from src.core.entity_store import entity_store
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.core.saves import save_manager
+from src.lua.dependencies import require_graph
+from src.lua.loader import LoaderLua
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.resources import ModelResources
+
+
+class ContentPackMaterializer:
+    """
+    Ленивая загрузка content pack (content_pack_loading: lazy).
+
+    При запуске Loader читает только info.yaml. Entities и скрипты пака загружаются при
+    первом обращении (ModelResources.get_content_pack, LuaManager.activate_content_pack)
+    вместе с его зависимостями. Если память Lua runtime загруженных паков больше
+    content_pack_memory_budget_mb, паки, к которым дольше всех не обращались (LRU) и не
+    обращались хотя бы content_pack_min_idle секунд, выгружаются. Паки из
+    content_packs_active и их зависимости не выгружаются.
+
+    Слушатели (LuaManager) получают content_pack_materialized(pack) и
+    content_pack_unloading(pack) и регистрируют или снимают скрипты пака. Перед проверкой
+    бюджета паки из used_content_packs() слушателей (их хуки вызывались) считаются обращёнными.
+    """
+
+    def __init__(self, loader, resources: ModelResources, config: ModelSettings):
+        self.logger = logger
+        self.loader = loader
+        self.resources = resources
+        self.config = config
+        self.listeners: List[Any] = []
+
+        self.materialized: Set[str] = set()
+        # id пака -> время последнего обращения; порядок словаря - порядок LRU
+        self._last_access: Dict[str, float] = {}
+        self._pinned: Set[str] = set()
+
+    def pin(self, content_pack_ids):
+        """Паки, которые нельзя выгружать, и их зависимости"""
+        stack = [content_pack_id for content_pack_id in content_pack_ids
+                 if content_pack_id in self.resources.content_packs]
+        while stack:
+            content_pack_id = stack.pop()
+            if content_pack_id not in self._pinned:
+                self._pinned.add(content_pack_id)
+                stack.extend(str(dep) for dep in self.resources.content_packs[content_pack_id].dependencies)
+
+    def touch(self, content_pack_id: str):
+        self._last_access.pop(content_pack_id, None)
+        self._last_access[content_pack_id] = monotonic()
+
+    def materialize(self, content_pack_id: str) -> Optional[ModelContentPack]:
+        content_pack = self.resources.content_packs.get(content_pack_id)
+        if content_pack is None:
+            return None
+        self.touch(content_pack_id)
+        if content_pack_id in self.materialized:
+            return content_pack
+
+        # Ошибочные паки (цикл, нет зависимости) в content_packs не попадают, поэтому рекурсия конечна
+        for dep in content_pack.dependencies:
+            self.materialize(str(dep))
+
+        self.loader.load_content_pack(content_pack)
+        entity_registry.register_content_pack(content_pack)
+        self.materialized.add(content_pack_id)
+        # Запрошенный пак - самый свежий, его зависимости - следом
+        self.touch(content_pack_id)
+        self.logger.info(f"Materialized content pack {content_pack_id}")
+        for listener in list(self.listeners):
+            listener.content_pack_materialized(content_pack)
+
+        self.enforce_budget(keep=content_pack_id)
+        return content_pack
+
+    def unload(self, content_pack_id: str):
+        if content_pack_id not in self.materialized:
+            return
+        content_pack = self.resources.content_packs[content_pack_id]
+        for listener in list(self.listeners):
+            listener.content_pack_unloading(content_pack)
+
+        for script_data in content_pack.scripts.values():
+            require_graph.forget(script_data['path'].resolve())
+        save_manager.forget_content_pack(content_pack_id)
+        entity_registry.unregister_content_pack(content_pack_id)
+        entity_store.despawn_content_pack(content_pack_id)
+        content_pack.entities = {}
+        content_pack.scripts = {}
+        LoaderLua.release_content_pack(content_pack.path)
+        self.materialized.discard(content_pack_id)
+        self._last_access.pop(content_pack_id, None)
+        self.logger.info(f"Unloaded content pack {content_pack_id}")
+
+    def memory_kb(self, content_pack_id: str) -> float:
+        """Память Lua runtime пака; общий runtime режима global в учёт не входит"""
+        content_pack = self.resources.content_packs[content_pack_id]
+        shared = LoaderLua.shared_sandbox("global")
+        sandboxes = {id(data['sandbox']): data['sandbox'] for data in content_pack.scripts.values()
+                     if data['sandbox'] is not shared}
+        return sum(sandbox.memory_kb() for sandbox in sandboxes.values())
+
+    def _required_by_materialized(self) -> Set[str]:
+        required = set()
+        for content_pack_id in self.materialized:
+            required.update(str(dep) for dep in self.resources.content_packs[content_pack_id].dependencies)
+        return required
+
+    def enforce_budget(self, keep: Optional[str] = None):
+        budget_kb = self.config.content_pack_memory_budget_mb * 1024
+        if budget_kb <= 0:
+            return
+
+        # Пак, чьи скрипты работают каждый тик, используется, даже если к нему никто не обращался
+        for listener in self.listeners:
+            used = getattr(listener, "used_content_packs", None)
+            for content_pack_id in (used() if used is not None else ()):
+                if content_pack_id in self.materialized:
+                    self.touch(content_pack_id)
+
+        usage = {content_pack_id: self.memory_kb(content_pack_id) for content_pack_id in self.materialized}
+        total = sum(usage.values())
+        if total <= budget_kb:
+            return
+
+        now = monotonic()
+        for content_pack_id, last_access in list(self._last_access.items()):
+            if total <= budget_kb:
+                break
+            if (content_pack_id in self._pinned or content_pack_id == keep or content_pack_id not in self.materialized
+                    or now - last_access < self.config.content_pack_min_idle
+                    or content_pack_id in self._required_by_materialized()):
+                continue
+            self.unload(content_pack_id)
+            total -= usage.get(content_pack_id, 0.0)
+
+        if total > budget_kb:
+            self.logger.debug(f"Content packs use {total:.0f} KB of Lua memory, budget {budget_kb:.0f} KB")
+
+    def global_update(self, delta_time: float):
+        self.enforce_budget()
@@ -3,15 +3,25 @@ from src.lua.loader import LoaderLua
 from src.resource.models.content_pack import ModelContentPack, ModelErrorContentPack
 from src.resource.models.entity import ModelEntity
 from src.resource.models.resources import ModelResources
-from src.resource.handlers import handle_file_errors
+from src.resource.handlers import YamlSafeLoader, handle_file_errors, load_yaml, save_yaml
+from src.resource.manifest_cache import ManifestCache, construct
+from src.resource.pack_graph import resolve_load_waves
+from src.resource.source import ContentPackSource, is_packed, open_source
+from src.core.entity_registry import entity_registry
+from src.core.saves import save_manager
 from src.core.logger import logger
+from src.core.profiler import profiler
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Any, Dict, AnyStr, Counter, List
+from threading import Lock
+from typing import Optional, Any, Callable, Dict, AnyStr, Counter, List, Tuple
 import yaml
 
 
 class Loader:
+    _global_runtime_lock = Lock()
 
     def __init__(self, config: Optional[ModelSettings] = None):
         logger.info("Init Loader")
@@ -20,21 +30,46 @@ class Loader:
             from src.core.settings import settings
             self.config = settings
 
-    def scan(self, dirs: Optional[Path] = None) -> ModelResources:
+        self.manifest_cache: Optional[ManifestCache] = None
+        if self.config.manifest_cache:
+            self.manifest_cache = ManifestCache.get(self.config.manifest_cache_file)
+
+    def _lookup_manifest(self, source: ContentPackSource, name: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+        signature = source.signature(name)
+        if self.manifest_cache is None or signature is None:
+            return None, signature
+        return self.manifest_cache.lookup(signature), signature
+
+    def _store_manifest(self, signature: Any, data: Dict[str, Any]):
+        if self.manifest_cache is not None:
+            self.manifest_cache.put(signature, data)
+
+    def scan(self, dirs: Optional[Path] = None,
+             progress: Optional[Callable[[int, int, str], Any]] = None) -> ModelResources:
+        """
+        Загрузка content pack волнами по графу dependencies: паки одной волны независимы
+        и грузятся параллельно в пуле потоков (loader_workers). Порядок в ModelResources
+        не зависит от порядка завершения потоков: зависимости раньше зависимых, дальше -
+        порядок каталогов.
+
+        progress(загружено, всего, id пака) вызывается в потоке scan() после каждого пака.
+        """
         logger.info("Scan dirs: {}".format(dirs))
         if dirs is None:
             dirs = self.config.content_packs_dirs
 
         resources = ModelResources()
-        for _dir in dirs:
-            for path in Path(_dir).iterdir():
-                if not path.is_dir():
-                    continue
+        # Пак - каталог или упакованный архив .vpk
+        pack_dirs = [path for _dir in dirs for path in sorted(Path(_dir).iterdir())
+                     if path.is_dir() or (is_packed(path) and path.is_file())]
+        errors: Dict[str, ModelErrorContentPack] = {}
 
+        with ThreadPoolExecutor(max_workers=self.config.loader_workers or None,
+                                thread_name_prefix="pack-loader") as executor:
+            content_packs: Dict[str, ModelContentPack] = {}
+            for path, (content_pack_info, cached, signature) in zip(
+                    pack_dirs, executor.map(self._read_content_pack_info, pack_dirs)):
                 logger.debug(f"Check dir: {path.__str__()}")
-                logger.debug("Get raw content pack info")
-
-                content_pack_info = self._load_content_pack_info(path)
                 if content_pack_info is None:
                     error_str = f"Dir {path.__str__()}: Raw content pack info not found"
                     resources.error_content_packs.append(ModelErrorContentPack(path=path, error=error_str))
@@ -46,69 +81,198 @@ class Loader:
                         ModelErrorContentPack(id=content_pack_info.get("id"), path=path, error=error_str))
                     logger.warning(error_str)
                     continue
+                elif content_pack_info["id"] in content_packs:
+                    error_str = f"Dir {path.__str__()}: content pack id '{content_pack_info['id']}' is already " \
+                                f"used by {content_packs[content_pack_info['id']].path}"
+                    resources.error_content_packs.append(
+                        ModelErrorContentPack(id=content_pack_info["id"], path=path, error=error_str))
+                    logger.error(error_str)
+                    continue
 
-                logger.info(f"Start loading raw content pack: {path.__str__()}")
-                content_pack = ModelContentPack(**content_pack_info)
-                content_pack = content_pack.model_copy(update={"path": path})
+                if cached:
+                    content_pack = construct(ModelContentPack, content_pack_info)
+                else:
+                    content_pack = ModelContentPack(**content_pack_info)
+                    self._store_manifest(signature, content_pack.model_dump(exclude={"entities", "scripts", "path"}))
+                content_packs[content_pack.id] = content_pack.model_copy(update={"path": path})
 
-                # Загрузка entities
-                content_pack.entities = self._load_entities_from_content_pack(content_pack)
-                # Загрузка Lua скриптов
-                content_pack.scripts = self._load_scripts_from_content_pack(content_pack)
+            waves, dependency_errors = resolve_load_waves(
+                {content_pack_id: [str(dep).strip() for dep in content_pack.dependencies]
+                 for content_pack_id, content_pack in content_packs.items()}
+            )
+            for content_pack_id, content_pack in content_packs.items():
+                if content_pack_id in dependency_errors:
+                    error_str = f"Content pack {content_pack_id}: {dependency_errors[content_pack_id]}"
+                    errors[content_pack_id] = ModelErrorContentPack(id=content_pack_id, path=content_pack.path,
+                                                                    error=error_str)
+                    logger.error(error_str)
+            resources.error_content_packs.extend(errors.values())
 
-                resources.content_packs[content_pack_info["id"]] = content_pack
+            if self.config.content_pack_loading == "lazy":
+                # Только info.yaml; entities и скрипты - при первом обращении
+                for wave in waves:
+                    for content_pack_id in wave:
+                        resources.content_packs[content_pack_id] = content_packs[content_pack_id]
+                self._attach_materializer(resources)
+                if progress is not None:
+                    progress(len(resources.content_packs), len(resources.content_packs), "")
+            else:
+                total = sum(len(wave) for wave in waves)
+                for index, wave in enumerate(waves):
+                    logger.debug(f"Load wave {index}: {wave}")
+                    for content_pack in executor.map(self.load_content_pack, [content_packs[i] for i in wave]):
+                        resources.content_packs[content_pack.id] = content_pack
+                        # В потоке scan() и в порядке волн, чтобы порядок в индексах не зависел от потоков
+                        entity_registry.register_content_pack(content_pack)
+                        if progress is not None:
+                            progress(len(resources.content_packs), total, content_pack.id)
 
+        if self.manifest_cache is not None:
+            self.manifest_cache.save()
+            logger.debug(f"Manifest cache: {self.manifest_cache.hits} hits, {self.manifest_cache.misses} misses")
         return resources
 
-    def _load_scripts_from_content_pack(self, content_pack: ModelContentPack) -> Dict[str, Any]:
+    def _attach_materializer(self, resources: ModelResources):
+        from src.resource.lazy import ContentPackMaterializer
+
+        materializer = ContentPackMaterializer(self, resources, self.config)
+        resources._materializer = materializer
+        active = [str(content_pack_id) for content_pack_id in self.config.content_packs_active]
+        materializer.pin(active)
+        for content_pack_id in active:
+            if content_pack_id not in resources.content_packs:
+                logger.warning(f"Active content pack {content_pack_id} is not installed")
+
+        # Паки из сохранения тоже нужны при запуске: их entity и таблицы save восстанавливаются сразу
+        saved = sorted(save_manager.content_pack_ids() - set(active))
+        startup = [content_pack_id for content_pack_id in active + saved if content_pack_id in resources.content_packs]
+        if not startup:
+            logger.warning("content_pack_loading is lazy, but content_packs_active is empty and the save references "
+                           "no content packs: nothing is loaded until a pack is activated")
+        for content_pack_id in startup:
+            materializer.materialize(content_pack_id)
+
+    def load_content_pack(self, content_pack: ModelContentPack) -> ModelContentPack:
+        """Загрузка entities и скриптов пака, info которого уже прочитан"""
+        logger.info(f"Start loading raw content pack: {content_pack.path.__str__()}")
+        # Один источник на пак: каталог обходится один раз для entities и скриптов
+        source = open_source(content_pack.path)
+        # Загрузка entities
+        with profiler.span("load entities", "resource", {"content_pack": content_pack.id}):
+            content_pack.entities = self._load_entities_from_content_pack(content_pack, source)
+        # Загрузка Lua скриптов (в режиме workers скрипты грузят worker-процессы)
+        if self.config.lua_execution_mode != "workers":
+            # В режиме global все паки делят один LuaRuntime, а он не потокобезопасен
+            lock = self._global_runtime_lock if self.config.lua_runtime_mode == "global" else nullcontext()
+            with lock, profiler.span("load scripts", "resource", {"content_pack": content_pack.id}):
+                content_pack.scripts = self._load_scripts_from_content_pack(content_pack, source)
+        return content_pack
+
+    def _load_scripts_from_content_pack(self, content_pack: ModelContentPack,
+                                        source: Optional[ContentPackSource] = None) -> Dict[str, Any]:
         loader_lua = LoaderLua(self.config)
-        return loader_lua.scan_content_pack_scripts(content_pack.path)
+        return loader_lua.scan_content_pack_scripts(content_pack.path, content_pack.id, source)
 
-    def _load_entities_from_content_pack(self, content_pack_info: ModelContentPack) -> Dict[AnyStr, ModelEntity]:
-        _temp_id = []
+    def _load_entities_from_content_pack(self, content_pack_info: ModelContentPack,
+                                         source: Optional[ContentPackSource] = None) -> Dict[AnyStr, ModelEntity]:
+        source = source or open_source(content_pack_info.path)
+        # id entity -> файл, где он объявлен первым
+        _temp_id: Dict[str, Path] = {}
         entities = {}
-        for file in content_pack_info.path.rglob("*.yaml"):  # type: Path
+        for name in source.files(".yaml"):
+            file = content_pack_info.path / name
             if file.stem == self.config.file_name_for_content_pack:
                 continue
             logger.debug(f"File found: {file.__str__()}")
 
-            data = self.load_yaml(file)
-            if data is None:
-                logger.warning(f"File {file.__str__()}: data not found")
+            entity = self._load_entity(source, name, content_pack_info)
+            if entity is None:
                 continue
-            elif data.get("id", None) is None:
-                logger.warning(f"File {file.__str__()}: id not found")
+            elif entity.id in _temp_id:
+                logger.error(f"File {file.__str__()}: id '{entity.id}' is already used in "
+                             f"{_temp_id[entity.id].__str__()}, entity skipped")
                 continue
-            elif data["id"] in _temp_id:
-                logger.error(f"File {file.__str__()}: id is already ")
-                return {}
 
-            data["content_pack_id"] = content_pack_info.id
+            _temp_id[entity.id] = file
+            entities[entity.id] = entity
+        return entities
 
-            entity = ModelEntity(**data)
+    def _load_entity_data(self, file: Path, source: Optional[ContentPackSource] = None,
+                          name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        data = self.load_yaml(file) if source is None else self.read_yaml(file, source, name)
+        if data is None:
+            logger.warning(f"File {file.__str__()}: data not found")
+            return None
+        elif data.get("id", None) is None:
+            logger.warning(f"File {file.__str__()}: id not found")
+            return None
+        return data
 
-            logger.info(f"Entity(id='{data['id']}') found from file {file.__str__()}")
-            entities[entity.id] = entity
-        return entities if len(entities) > 0 else []
+    @staticmethod
+    def _create_entity(file: Path, data: Dict[str, Any], content_pack_info: ModelContentPack) -> ModelEntity:
+        data["content_pack_id"] = content_pack_info.id
 
-    def _load_content_pack_info(self, path: Path) -> Optional[Dict[str, Any]]:
-        info_path = path / f"{self.config.file_name_for_content_pack}.{'yaml'}"
-        if info_path.exists():
-            return self.load_yaml(info_path)
-        logger.warning(f"Not found content pack info: {info_path}")
-        return None
+        entity = ModelEntity(**data)
 
+        logger.info(f"Entity(id='{data['id']}') found from file {file.__str__()}")
+        return entity
 
-    @staticmethod
-    @handle_file_errors
-    def load_yaml(path: Path) -> Optional[Dict[str, Any]]:
-        with open(path, "r", encoding="utf-8") as f:
-            logger.debug(f"Load yaml {path.__str__()}")
-            return yaml.safe_load(f)
+    def load_entity(self, file: Path, content_pack_info: ModelContentPack) -> Optional[ModelEntity]:
+        """Загрузка одного entity по пути файла (для горячей перезагрузки)"""
+        root = Path(content_pack_info.path)
+        name = Path(file).resolve().relative_to(root.resolve()).as_posix()
+        return self._load_entity(open_source(root), name, content_pack_info)
+
+    def _load_entity(self, source: ContentPackSource, name: str,
+                     content_pack_info: ModelContentPack) -> Optional[ModelEntity]:
+        # Неизменённый файл берётся из manifest cache без разбора и валидации
+        cached, signature = self._lookup_manifest(source, name)
+        if cached is not None:
+            return construct(ModelEntity, cached, content_pack_id=content_pack_info.id)
+
+        file = content_pack_info.path / name
+        data = self._load_entity_data(file, source, name)
+        if data is None:
+            return None
+        entity = self._create_entity(file, data, content_pack_info)
+        self._store_manifest(signature, entity.model_dump(exclude={"content_pack_id"}))
+        return entity
+
+    def _content_pack_info_name(self) -> str:
+        return f"{self.config.file_name_for_content_pack}.{'yaml'}"
+
+    def _read_content_pack_info(self, path: Path) -> Tuple[Optional[Dict[str, Any]], bool, Any]:
+        """(данные info, взяты ли они из manifest cache, подпись файла для кэша)"""
+        try:
+            source = open_source(path)
+        except Exception as e:
+            logger.error(f"Failed to open content pack {path}: {e}")
+            return None, False, None
+        cached, signature = self._lookup_manifest(source, self._content_pack_info_name())
+        if cached is not None:
+            return cached, True, signature
+        if signature is None:
+            logger.warning(f"Not found content pack info: {path / self._content_pack_info_name()}")
+            return None, False, None
+        return self._load_content_pack_info(path, source), False, signature
+
+    def _load_content_pack_info(self, path: Path, source: Optional[ContentPackSource] = None) -> Optional[Dict[str, Any]]:
+        name = self._content_pack_info_name()
+        source = source or open_source(path)
+        if source.signature(name) is None:
+            logger.warning(f"Not found content pack info: {path / name}")
+            return None
+        return self.read_yaml(path / name, source, name)
+
+
+    load_yaml = staticmethod(load_yaml)
 
     @staticmethod
     @handle_file_errors
-    def save_yaml(path: Path, data: Dict[str, Any]) -> None:
-        with open(path, "w", encoding="utf-8") as f:
-            logger.debug(f"Save yaml {path.__str__()}")
-            f.write(yaml.dump(data, default_flow_style=False))
\ No newline at end of file
+    def read_yaml(path: Path, source: ContentPackSource, name: str) -> Optional[Dict[str, Any]]:
+        """YAML из каталога или архива пака; path - только для сообщений"""
+        logger.debug(f"Load yaml {path.__str__()}")
+        data = source.read_bytes(name)
+        return yaml.load(bytes(data) if isinstance(data, memoryview) else data, Loader=YamlSafeLoader)
+
+    save_yaml = staticmethod(save_yaml)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+import pydantic
+from pydantic import BaseModel
+
+from src.core.logger import logger
+from src.resource.models.animation import ModelAnimationClip
+from src.resource.models.content_pack import ModelContentPack
+from src.resource.models.entity import ModelEntity
+
+CACHE_MAGIC = b"VPMC"
+CACHE_FORMAT = 2
+
+# (st_mtime_ns, st_size, проверенные данные модели)
+CacheEntry = Tuple[int, int, Dict[str, Any]]
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_schema_tag_value: Optional[str] = None
+
+
+def _schema_tag() -> str:
+    # Любое изменение полей, типов или значений по умолчанию делает старый снимок недействительным
+    global _schema_tag_value
+    if _schema_tag_value is None:
+        digest = hashlib.sha256()
+        for model in (ModelContentPack, ModelEntity, ModelAnimationClip):
+            digest.update(json.dumps(model.model_json_schema(), sort_keys=True).encode("utf-8"))
+        _schema_tag_value = f"{CACHE_FORMAT}|{pydantic.VERSION}|{digest.hexdigest()}"
+    return _schema_tag_value
+
+
+def _construct_value(annotation: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return construct(annotation, value) if isinstance(value, dict) else value
+
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Union:
+        models = [arg for arg in args if isinstance(arg, type) and issubclass(arg, BaseModel)]
+        return _construct_value(models[0], value) if len(models) == 1 else value
+    if origin is dict and len(args) == 2 and isinstance(value, dict):
+        return {key: _construct_value(args[1], item) for key, item in value.items()}
+    if origin is list and args and isinstance(value, list):
+        return [_construct_value(args[0], item) for item in value]
+    return value
+
+
+def construct(model: Type[ModelT], data: Dict[str, Any], **extra) -> ModelT:
+    """
+    model_construct для данных из снимка, включая вложенные модели (model_construct их не собирает).
+    Данные уже проверены при записи, а тег схемы гарантирует, что модели с тех пор не менялись.
+    """
+    values = {name: _construct_value(model.model_fields[name].annotation, value) if name in model.model_fields
+              else value for name, value in data.items()}
+    return model.model_construct(**values, **extra)
+
+
+class ManifestCache:
+    """
+    Снимок проверенных данных info.yaml и entity .yaml: ключ файла -> (mtime, size, данные).
+
+    Для неизменённого файла Loader берёт данные отсюда и собирает модель через
+    construct(), без разбора YAML и без валидации. Снимок - один pickle-файл с
+    заголовком CACHE_MAGIC и тегом схемы; при несовпадении он молча пересобирается.
+    """
+
+    _instances: Dict[str, "ManifestCache"] = {}
+
+    def __init__(self, cache_file: Path):
+        self.logger = logger
+        self.cache_file = Path(cache_file)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, CacheEntry] = {}
+        self._seen = set()
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def get(cls, cache_file) -> "ManifestCache":
+        key = str(cache_file)
+        if key not in cls._instances:
+            cls._instances[key] = cls(Path(cache_file))
+        return cls._instances[key]
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self.logger.warning(f"Failed to read manifest cache {self.cache_file}: {e}")
+            return
+
+        try:
+            if not data.startswith(CACHE_MAGIC):
+                raise ValueError("bad magic")
+            tag, entries = pickle.loads(data[len(CACHE_MAGIC):])
+        except Exception as e:
+            self.logger.warning(f"Rejected invalid manifest cache {self.cache_file}: {e}")
+            return
+        if tag == _schema_tag():
+            self._entries = entries
+        else:
+            self.logger.info("Manifest cache schema changed, rebuilding")
+
+    def lookup(self, signature: Tuple[str, int, int]) -> Optional[Dict[str, Any]]:
+        """signature - (ключ файла, mtime_ns, размер) от источника пака (каталог или .vpk)"""
+        key, mtime_ns, size = signature
+        self._seen.add(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put(self, signature: Optional[Tuple[str, int, int]], data: Dict[str, Any]):
+        if signature is None:
+            return
+        key, mtime_ns, size = signature
+        self._entries[key] = (mtime_ns, size, data)
+        self._dirty = True
+
+    def save(self):
+        # Записи файлов, не встреченных при сканировании и уже удалённых с диска, выбрасываются
+        for key in [key for key in self._entries if key not in self._seen]:
+            if not os.path.exists(key.split("!", 1)[0]):
+                del self._entries[key]
+                self._dirty = True
+        if not self._dirty:
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(CACHE_MAGIC + pickle.dumps((_schema_tag(), self._entries), protocol=pickle.HIGHEST_PROTOCOL))
+            os.replace(tmp_path, self.cache_file)
+            self._dirty = False
+        except OSError as e:
+            self.logger.warning(f"Failed to write manifest cache {self.cache_file}: {e}")
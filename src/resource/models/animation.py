@@ -0,0 +1,14 @@
+from typing import AnyStr, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ModelAnimationClip(BaseModel):
+    # Индексы кадров атласа sprite по порядку показа
+    frames: List[int]
+    fps: float = 10.0
+    # Длительность каждого кадра в секундах (вместо fps)
+    durations: Optional[List[float]] = None
+    mode: AnyStr = "loop" # once | loop | ping_pong
+    # Позиция в frames -> имя события
+    events: Dict[int, AnyStr] = Field(default_factory=dict) # noqa
@@ -1,7 +1,9 @@
 from pathlib import Path
 
-from pydantic import BaseModel
-from typing import Optional, AnyStr, List
+from pydantic import BaseModel, Field
+from typing import Optional, AnyStr, List, Dict
+
+from src.resource.models.animation import ModelAnimationClip
 
 
 class ModelEntity(BaseModel):
@@ -9,10 +11,17 @@ class ModelEntity(BaseModel):
     name: Optional[AnyStr] = None
     icon: Optional[AnyStr] = None
     sprite: Optional[AnyStr] = None
+    # [ширина, высота] кадра, если sprite - лист кадров
+    sprite_frame_size: Optional[List[AnyStr]] = None
+    # Клипы по кадрам атласа sprite; default_animation запускается при появлении entity
+    animations: Dict[str, ModelAnimationClip] = Field(default_factory=dict) # noqa
+    default_animation: Optional[AnyStr] = None
 
     position: Optional[List[AnyStr]] = None
     size: Optional[List[AnyStr]] = None
 
     scripts: Optional[List[Path]] = None
 
+    tags: List[AnyStr] = Field(default_factory=list) # noqa
+
     content_pack_id: Optional[AnyStr]
\ No newline at end of file
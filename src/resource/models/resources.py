@@ -1,11 +1,29 @@
 from src.resource.models.content_pack import ModelContentPack, ModelErrorContentPack
-from typing import List, Dict, AnyStr
-from pydantic import BaseModel, Field
+from typing import List, Dict, AnyStr, Any, Optional
+from pydantic import BaseModel, Field, PrivateAttr
 
 class ModelResources(BaseModel):
     content_packs: Dict[AnyStr, ModelContentPack] = Field(default_factory=dict) # noqa
     error_content_packs: List[ModelErrorContentPack] = Field(default_factory=list) # noqa
 
+    # ContentPackMaterializer в режиме content_pack_loading: lazy
+    _materializer: Any = PrivateAttr(default=None)
+
+    @property
+    def materializer(self) -> Any:
+        return self._materializer
+
+    def get_content_pack(self, content_pack_id: str) -> Optional[ModelContentPack]:
+        """Пак с загруженными entities и скриптами (в ленивом режиме загружает его при первом обращении)"""
+        if self._materializer is not None:
+            return self._materializer.materialize(content_pack_id)
+        return self.content_packs.get(content_pack_id)
+
+    def is_materialized(self, content_pack_id: str) -> bool:
+        if self._materializer is not None:
+            return content_pack_id in self._materializer.materialized
+        return content_pack_id in self.content_packs
+
     @property
     def number_error_load_content_packs(self) -> int:
         return len(self.error_content_packs)
\ No newline at end of file
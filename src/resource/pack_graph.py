@@ -0,0 +1,64 @@
+from typing import Dict, List, Sequence, Tuple
+
+
+def _find_cycle(start: str, dependencies: Dict[str, Sequence[str]], remaining: Dict[str, None]) -> List[str]:
+    """Идёт по зависимостям из start внутри remaining, пока не встретит уже пройденный пак"""
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    node = start
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(dep for dep in dependencies[node] if dep in remaining)
+    return path[seen[node]:] + [node]
+
+
+def resolve_load_waves(dependencies: Dict[str, Sequence[str]]) -> Tuple[List[List[str]], Dict[str, str]]:
+    """
+    Раскладывает content pack по волнам загрузки: пак попадает в волну, когда все его
+    зависимости загружены в предыдущих. Внутри волны паки независимы.
+
+    dependencies - id пака -> id зависимостей, в порядке обнаружения паков; порядок
+    внутри волн повторяет его, поэтому результат детерминирован.
+    Возвращает (волны, id пака -> ошибка) для паков с отсутствующими зависимостями,
+    циклами и зависимостями от таких паков.
+    """
+    errors: Dict[str, str] = {}
+    for pack_id, deps in dependencies.items():
+        missing = [dep for dep in deps if dep not in dependencies]
+        if missing:
+            errors[pack_id] = f"missing dependencies: {', '.join(missing)}"
+
+    waves: List[List[str]] = []
+    loaded = set()
+    pending = [pack_id for pack_id in dependencies if pack_id not in errors]
+    while pending:
+        failed = False
+        for pack_id in pending:
+            broken = [dep for dep in dependencies[pack_id] if dep in errors]
+            if broken:
+                errors[pack_id] = f"dependency failed to load: {', '.join(broken)}"
+                failed = True
+        if failed:
+            pending = [pack_id for pack_id in pending if pack_id not in errors]
+            continue
+
+        wave = [pack_id for pack_id in pending if all(dep in loaded for dep in dependencies[pack_id])]
+        if not wave:
+            break
+        waves.append(wave)
+        loaded.update(wave)
+        pending = [pack_id for pack_id in pending if pack_id not in loaded]
+
+    # Всё, что осталось, стоит в цикле или зависит от цикла
+    remaining = dict.fromkeys(pending)
+    for pack_id in pending:
+        if pack_id in errors:
+            continue
+        cycle = _find_cycle(pack_id, dependencies, remaining)
+        for member in cycle:
+            errors.setdefault(member, f"dependency cycle: {' -> '.join(cycle)}")
+    for pack_id in pending:
+        errors.setdefault(pack_id, "depends on a dependency cycle")
+
+    return waves, errors
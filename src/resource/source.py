@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.resource.vpk import VPK_SUFFIX, VpkArchive
+
+# (ключ для кэшей, mtime_ns, размер)
+Signature = Tuple[str, int, int]
+
+
+class DirectorySource:
+    """Content pack в виде каталога. Дерево обходится один раз на экземпляр"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._files: Optional[List[str]] = None
+
+    def files(self, suffix: str) -> List[str]:
+        """Относительные posix-пути файлов с данным расширением"""
+        if self._files is None:
+            files = []
+            for root, dirs, names in os.walk(self.root):
+                dirs.sort()
+                relative = Path(root).relative_to(self.root)
+                files.extend((relative / name).as_posix() for name in sorted(names))
+            self._files = files
+        return [name for name in self._files if name.endswith(suffix)]
+
+    def signature(self, name: str) -> Optional[Signature]:
+        path = self.root / name
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def read_bytes(self, name: str) -> bytes:
+        with open(self.root / name, "rb") as f:
+            return f.read()
+
+    def read_text(self, name: str) -> str:
+        with open(self.root / name, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class VpkSource:
+    """Content pack в виде .vpk: чтение из отображённого в память архива"""
+
+    def __init__(self, archive: VpkArchive):
+        self.archive = archive
+        self.root = archive.path
+        self._key = os.path.abspath(archive.path)
+
+    def files(self, suffix: str) -> List[str]:
+        return [name for name in self.archive.entries if name.endswith(suffix)]
+
+    def signature(self, name: str) -> Optional[Signature]:
+        entry = self.archive.get(name)
+        if entry is None:
+            return None
+        return f"{self._key}!{name}", entry.mtime_ns, entry.size
+
+    def read_bytes(self, name: str) -> memoryview:
+        return self.archive.read(name)
+
+    def read_text(self, name: str) -> str:
+        return str(self.archive.read(name), "utf-8")
+
+
+ContentPackSource = Union[DirectorySource, VpkSource]
+
+# Архивы открываются один раз на процесс: индекс и mmap переиспользуются
+_archives: Dict[str, Tuple[int, int, VpkArchive]] = {}
+_archives_lock = Lock()
+
+
+def is_packed(path: Path) -> bool:
+    return Path(path).suffix == VPK_SUFFIX
+
+
+def open_source(path: Path) -> ContentPackSource:
+    path = Path(path)
+    if not is_packed(path):
+        return DirectorySource(path)
+
+    key = os.path.abspath(path)
+    stat = os.stat(path)
+    with _archives_lock:
+        cached = _archives.get(key)
+        if cached is None or cached[0] != stat.st_mtime_ns or cached[1] != stat.st_size:
+            # Старый архив не закрывается: на его mmap могут ссылаться уже выданные срезы
+            cached = (stat.st_mtime_ns, stat.st_size, VpkArchive(path))
+            _archives[key] = cached
+    return VpkSource(cached[2])
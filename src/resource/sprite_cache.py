@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+from src.core.entity_registry import parse_vector
+from src.core.logger import logger
+from src.core.models.m_settings import ModelSettings
+from src.resource.atlas import ATLAS_SUFFIX, Atlas, AtlasFrame, build_atlas, cache_key, read_atlas, split_sheet, \
+    write_atlas
+from src.resource.source import ContentPackSource, open_source
+
+# (сигнатура файла, размер кадра листа или None)
+SpriteKey = Tuple[Tuple[str, int, int], Optional[Tuple[int, int]]]
+SpriteCallback = Callable[[Optional[Atlas]], Any]
+
+
+class _Delivery(QObject):
+    # Сигнал из потока декодирования доставляется в GUI-поток очередью событий Qt
+    decoded = Signal(object, object, object)
+
+
+class SpriteCache:
+    """
+    Спрайты в видеопамяти: декодирование PNG в QImage в пуле потоков, перевод в QPixmap
+    в GUI-потоке и LRU по байтам (sprite_cache_budget_mb).
+
+    Каждый спрайт хранится как Atlas: обычная картинка - атлас из одного кадра, лист с
+    sprite_frame_size - атлас из обрезанных кадров без повторов. Готовые атласы пишутся в
+    sprite_cache_directory, и при следующем запуске PNG не декодируется.
+    """
+
+    def __init__(self, config: Optional[ModelSettings] = None):
+        self.logger = logger
+        self.config = config
+        if config is None:
+            from src.core.settings import settings
+            self.config = settings
+
+        self.budget_bytes = int(self.config.sprite_cache_budget_mb * 1024 * 1024)
+        self.cache_directory = Path(self.config.sprite_cache_directory) if self.config.sprite_disk_cache else None
+        self._executor = ThreadPoolExecutor(max_workers=self.config.sprite_decode_workers or None,
+                                            thread_name_prefix="sprite")
+
+        # Порядок словаря - порядок LRU, последний - самый свежий
+        self._entries: "OrderedDict[SpriteKey, Atlas]" = OrderedDict()
+        self._pending: Dict[SpriteKey, List[SpriteCallback]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._delivery = _Delivery()
+        self._delivery.decoded.connect(self._on_decoded)
+
+    @staticmethod
+    def make_key(source: ContentPackSource, name: str,
+                 frame_size: Optional[Tuple[int, int]] = None) -> Optional[SpriteKey]:
+        signature = source.signature(name)
+        return None if signature is None else (signature, frame_size)
+
+    def get(self, key: SpriteKey) -> Optional[Atlas]:
+        atlas = self._entries.get(key)
+        if atlas is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return atlas
+
+    def load(self, source: ContentPackSource, name: str, frame_size: Optional[Tuple[int, int]] = None) -> Optional[Atlas]:
+        """Синхронная загрузка в вызывающем (GUI) потоке"""
+        key = self.make_key(source, name, frame_size)
+        if key is None:
+            self.logger.error(f"Sprite {source.root}/{name} not found")
+            return None
+        atlas = self.get(key)
+        if atlas is None:
+            self.misses += 1
+            atlas = self._decode(source, name, key)
+            self._store(key, atlas)
+        return atlas
+
+    def load_async(self, source: ContentPackSource, name: str, frame_size: Optional[Tuple[int, int]] = None,
+                   callback: Optional[SpriteCallback] = None) -> Optional[SpriteKey]:
+        """Декодирование в пуле потоков; callback(atlas) вызывается в GUI-потоке"""
+        key = self.make_key(source, name, frame_size)
+        if key is None:
+            self.logger.error(f"Sprite {source.root}/{name} not found")
+            if callback is not None:
+                callback(None)
+            return None
+
+        atlas = self.get(key)
+        if atlas is not None:
+            if callback is not None:
+                callback(atlas)
+            return key
+
+        callbacks = self._pending.get(key)
+        if callbacks is None:
+            self.misses += 1
+            callbacks = self._pending[key] = []
+            self._executor.submit(self._decode_task, source, name, key)
+        if callback is not None:
+            callbacks.append(callback)
+        return key
+
+    def load_entity_async(self, entity, content_pack, callback: Optional[SpriteCallback] = None):
+        if not entity.sprite or content_pack.path is None:
+            return None
+        frame_size = None
+        if entity.sprite_frame_size:
+            width, height = parse_vector(entity.sprite_frame_size)
+            if width > 0 and height > 0:
+                frame_size = (int(width), int(height))
+        return self.load_async(open_source(content_pack.path), str(entity.sprite), frame_size, callback)
+
+    def preload(self, resources):
+        """Фоновая загрузка спрайтов всех загруженных entity"""
+        for content_pack in resources.content_packs.values():
+            for entity in (content_pack.entities or {}).values():
+                self.load_entity_async(entity, content_pack)
+
+    def _decode_task(self, source: ContentPackSource, name: str, key: SpriteKey):
+        try:
+            self._delivery.decoded.emit(key, self._decode(source, name, key), None)
+        except Exception as e:
+            self._delivery.decoded.emit(key, None, e)
+
+    def _decode(self, source: ContentPackSource, name: str, key: SpriteKey) -> Atlas:
+        signature, frame_size = key
+        cache_file = None
+        if self.cache_directory is not None:
+            cache_file = self.cache_directory / f"{cache_key([signature], frame_size)}{ATLAS_SUFFIX}"
+            atlas = read_atlas(cache_file)
+            if atlas is not None:
+                self.disk_hits += 1
+                return atlas
+
+        image = QImage.fromData(bytes(source.read_bytes(name)))
+        if image.isNull():
+            raise ValueError(f"Failed to decode sprite {source.root}/{name}")
+        if frame_size is not None:
+            atlas = build_atlas(split_sheet(image, *frame_size))
+        else:
+            atlas = Atlas(image, [AtlasFrame(0, 0, image.width(), image.height(), 0, 0)],
+                          image.width(), image.height())
+
+        if cache_file is not None:
+            try:
+                write_atlas(cache_file, atlas)
+            except OSError as e:
+                self.logger.warning(f"Failed to write atlas cache {cache_file}: {e}")
+        return atlas
+
+    def _on_decoded(self, key: SpriteKey, atlas: Optional[Atlas], error: Optional[Exception]):
+        callbacks = self._pending.pop(key, [])
+        if error is not None:
+            self.logger.error(f"Failed to load sprite {key[0][0]}: {error}")
+            atlas = None
+        else:
+            self._store(key, atlas)
+        for callback in callbacks:
+            callback(atlas)
+
+    def _store(self, key: SpriteKey, atlas: Atlas):
+        # QPixmap создаётся только в GUI-потоке; QImage после перевода не нужен
+        atlas.pixmap = QPixmap.fromImage(atlas.image)
+        atlas.image = None
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old.nbytes()
+        self._entries[key] = atlas
+        self.bytes += atlas.nbytes()
+        self._evict(keep=key)
+
+    def _evict(self, keep: Optional[SpriteKey] = None):
+        while self.bytes > self.budget_bytes and self.budget_bytes > 0:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self.bytes -= self._entries.pop(key).nbytes()
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "megabytes": self.bytes / 1024 / 1024,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "pending": len(self._pending),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,221 @@
+"""
+Упакованный content pack (.vpk): один файл вместо дерева каталогов.
+
+Формат (little-endian):
+    заголовок  VPK_MAGIC | версия u16 | число записей u32 | размер индекса u64
+    индекс     на запись: длина имени u16 | смещение u64 | размер u64 | mtime_ns u64 | crc32 u32 | имя utf-8
+    данные     содержимое файлов подряд, смещения абсолютные
+
+Архив открывается через mmap, индекс читается один раз, содержимое отдаётся срезами
+memoryview без копирования.
+
+CLI:
+    python -m src.resource.vpk pack <каталог пака> [файл.vpk]
+    python -m src.resource.vpk unpack <файл.vpk> [каталог]
+    python -m src.resource.vpk list <файл.vpk>
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+VPK_MAGIC = b"VPK\0"
+VPK_VERSION = 1
+VPK_SUFFIX = ".vpk"
+
+HEADER = struct.Struct("<4sHIQ")
+ENTRY = struct.Struct("<HQQQI")
+
+# Не попадают в архив при упаковке
+SKIPPED_NAMES = {"__pycache__", ".git", ".DS_Store", "Thumbs.db"}
+
+
+class VpkError(Exception):
+    pass
+
+
+class VpkEntry:
+    __slots__ = ("name", "offset", "size", "mtime_ns", "crc32")
+
+    def __init__(self, name: str, offset: int, size: int, mtime_ns: int, crc32: int):
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.crc32 = crc32
+
+
+def _check_name(name: str) -> str:
+    path = PurePosixPath(name)
+    if not name or path.is_absolute() or ".." in path.parts or "\\" in name:
+        raise VpkError(f"Unsafe entry name: {name!r}")
+    return name
+
+
+class VpkArchive:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Пустой файл mmap не отображает
+            self._file.close()
+            raise VpkError(f"{self.path}: empty archive")
+        self._view = memoryview(self._mmap)
+        try:
+            self.entries: Dict[str, VpkEntry] = self._read_index()
+        except VpkError:
+            self.close()
+            raise
+
+    def _read_index(self) -> Dict[str, VpkEntry]:
+        size = len(self._mmap)
+        if size < HEADER.size:
+            raise VpkError(f"{self.path}: truncated header")
+        magic, version, count, index_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != VPK_MAGIC:
+            raise VpkError(f"{self.path}: not a vpk archive")
+        if version != VPK_VERSION:
+            raise VpkError(f"{self.path}: unsupported version {version}")
+        index_end = HEADER.size + index_size
+        if index_end > size:
+            raise VpkError(f"{self.path}: truncated index")
+
+        # Заголовки записей, имена и данные проверяются по границам индекса и файла:
+        # повреждённый архив даёт VpkError, а не struct.error или UnicodeDecodeError
+        entries: Dict[str, VpkEntry] = {}
+        position = HEADER.size
+        for number in range(count):
+            if position + ENTRY.size > index_end:
+                raise VpkError(f"{self.path}: entry {number} header is out of index bounds")
+            name_length, offset, entry_size, mtime_ns, crc32 = ENTRY.unpack_from(self._mmap, position)
+            position += ENTRY.size
+            if position + name_length > index_end:
+                raise VpkError(f"{self.path}: entry {number} name is out of index bounds")
+            try:
+                name = bytes(self._view[position:position + name_length]).decode("utf-8")
+            except UnicodeDecodeError:
+                raise VpkError(f"{self.path}: entry {number} name is not valid utf-8")
+            _check_name(name)
+            position += name_length
+            if offset < index_end or offset + entry_size > size:
+                raise VpkError(f"{self.path}: entry {name} is out of bounds")
+            if name in entries:
+                raise VpkError(f"{self.path}: duplicate entry {name}")
+            entries[name] = VpkEntry(name, offset, entry_size, mtime_ns, crc32)
+        if position != index_end:
+            raise VpkError(f"{self.path}: index size mismatch")
+        return entries
+
+    def names(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, name: str) -> Optional[VpkEntry]:
+        return self.entries.get(name)
+
+    def read(self, name: str) -> memoryview:
+        """Срез отображённого файла без копирования"""
+        entry = self.entries.get(name)
+        if entry is None:
+            raise FileNotFoundError(f"{self.path}!{name}")
+        return self._view[entry.offset:entry.offset + entry.size]
+
+    def verify(self, name: str) -> bool:
+        return zlib.crc32(self.read(name)) == self.entries[name].crc32
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+def pack(source_dir: Path, output: Path) -> int:
+    source_dir = Path(source_dir)
+    files: List[Tuple[str, Path]] = []
+    for root, dirs, names in os.walk(source_dir):
+        dirs[:] = sorted(name for name in dirs if name not in SKIPPED_NAMES)
+        for name in sorted(names):
+            if name in SKIPPED_NAMES:
+                continue
+            file = Path(root) / name
+            files.append((_check_name(file.relative_to(source_dir).as_posix()), file))
+
+    encoded = [name.encode("utf-8") for name, _ in files]
+    index_size = sum(ENTRY.size + len(name) for name in encoded)
+    offset = HEADER.size + index_size
+
+    index = bytearray()
+    blobs = []
+    for name, (_, file) in zip(encoded, files):
+        data = file.read_bytes()
+        index += ENTRY.pack(len(name), offset, len(data), file.stat().st_mtime_ns, zlib.crc32(data)) + name
+        blobs.append(data)
+        offset += len(data)
+
+    output = Path(output)
+    tmp_path = output.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(VPK_MAGIC, VPK_VERSION, len(files), index_size))
+        f.write(index)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp_path, output)
+    return len(files)
+
+
+def unpack(archive_path: Path, output_dir: Path) -> int:
+    archive = VpkArchive(archive_path)
+    try:
+        output_dir = Path(output_dir)
+        for name, entry in archive.entries.items():
+            if not archive.verify(name):
+                raise VpkError(f"{archive_path}: checksum mismatch for {name}")
+            target = output_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(archive.read(name))
+            os.utime(target, ns=(entry.mtime_ns, entry.mtime_ns))
+        return len(archive.entries)
+    finally:
+        archive.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.resource.vpk")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_parser = commands.add_parser("pack", help="pack a content pack directory")
+    pack_parser.add_argument("source")
+    pack_parser.add_argument("output", nargs="?")
+    unpack_parser = commands.add_parser("unpack", help="unpack an archive into a directory")
+    unpack_parser.add_argument("archive")
+    unpack_parser.add_argument("output", nargs="?")
+    list_parser = commands.add_parser("list", help="list archive entries")
+    list_parser.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "pack":
+            source = Path(args.source)
+            output = Path(args.output) if args.output else source.with_suffix(VPK_SUFFIX)
+            print(f"Packed {pack(source, output)} files into {output}")
+        elif args.command == "unpack":
+            archive = Path(args.archive)
+            output = Path(args.output) if args.output else archive.with_suffix("")
+            print(f"Unpacked {unpack(archive, output)} files into {output}")
+        else:
+            archive = VpkArchive(Path(args.archive))
+            for entry in archive.entries.values():
+                print(f"{entry.size:>10} {entry.name}")
+            archive.close()
+    except (OSError, VpkError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import pytest
+
+from src.core import global_timer
+from src.core.global_timer import GlobalTimer
+from src.core.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000_000
+
+    def __call__(self):
+        return self.now
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+
+    def global_update(self, delta_time):
+        self.calls += 1
+        self.time += delta_time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(global_timer, "perf_counter_ns", clock)
+    # Состояние GlobalTimer классовое: без QTimer, тики вызываются напрямую
+    for name, value in {
+        "_timer": None, "_subscribers": [], "_rated": {}, "_wheel": TimerWheel(), "_time": 0.0,
+        "_ticks_per_second": 60, "_idle_enabled": True, "_idle_ticks_per_second": 2,
+        "_idle_reasons": {"inactive"}, "_activity_checks": [], "_last_activity": clock.now,
+        "_last_time": clock.now, "_accumulator": 0.0, "_max_catch_up_steps": 5,
+    }.items():
+        monkeypatch.setattr(GlobalTimer, name, value)
+    return clock
+
+
+def run_idle(clock, seconds: float):
+    interval_ns = GlobalTimer._interval() * 1_000_000
+    for _ in range(int(seconds * 1e9 / interval_ns)):
+        clock.now += interval_ns
+        GlobalTimer._update_all()
+
+
+def test_idle_variable_time_runs_at_wall_clock(clock, monkeypatch):
+    monkeypatch.setattr(GlobalTimer, "_mode", "variable")
+    subscriber = Counter()
+    GlobalTimer.subscribe(subscriber)
+    run_idle(clock, 10.0)
+    assert GlobalTimer._time == pytest.approx(10.0)
+    assert subscriber.time == pytest.approx(10.0)
+
+
+def test_idle_fixed_rated_subscribers_keep_their_rate(clock, monkeypatch):
+    monkeypatch.setattr(GlobalTimer, "_mode", "fixed")
+    every_second, autosave = Counter(), Counter()
+    GlobalTimer.subscribe(every_second, rate=1.0)
+    GlobalTimer.subscribe(autosave, rate=1.0 / 60)
+    run_idle(clock, 120.0)
+    assert GlobalTimer._time == pytest.approx(120.0)
+    assert every_second.calls == 120
+    assert autosave.calls == 2
@@ -0,0 +1,56 @@
+import pytest
+
+from src.core.models.m_settings import ModelSettings
+from src.lua.manager import LuaManager
+from src.lua.scheduler import lua_scheduler
+from src.resource import lazy
+from src.resource.lazy import ContentPackMaterializer
+from src.resource.loader import Loader
+
+
+@pytest.fixture
+def config(tmp_path):
+    for content_pack_id, script in (("busy", "function on_update(dt) ticks = (ticks or 0) + 1 end"),
+                                    ("quiet", "function on_startup() set_interval(function() end, 1) end")):
+        root = tmp_path / content_pack_id
+        root.mkdir()
+        (root / "info.yaml").write_text(f"id: {content_pack_id}\n", encoding="utf-8")
+        (root / "main.lua").write_text(script, encoding="utf-8")
+    return ModelSettings(content_packs_dirs=[str(tmp_path)], content_pack_loading="lazy", manifest_cache=False,
+                         lua_bytecode_cache=False, content_pack_memory_budget_mb=1, content_pack_min_idle=60)
+
+
+def test_pack_with_running_hooks_survives_budget(config, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lazy, "monotonic", lambda: now[0])
+    # Каждый пак "весит" 1000 KB: вдвоём они не помещаются в бюджет 1 MB
+    monkeypatch.setattr(ContentPackMaterializer, "memory_kb", lambda self, content_pack_id: 1000.0)
+
+    resources = Loader(config).scan()
+    materializer = resources.materializer
+    materializer.materialize("busy")
+    materializer.materialize("quiet")
+    manager = LuaManager(resources, config)
+
+    # К пакам давно никто не обращался, но on_update пака busy вызывается каждый тик
+    now[0] += 120.0
+    manager.update(1 / 60)
+    materializer.enforce_budget()
+
+    assert materializer.materialized == {"busy"}
+    assert manager.scripts["busy.main"]["env"].ticks == 1
+
+
+def test_shutdown_releases_scripts(config):
+    resources = Loader(config).scan()
+    materializer = resources.materializer
+    materializer.materialize("quiet")
+    manager = LuaManager(resources, config)
+    manager.execute_function("quiet.main", "on_startup")
+    assert lua_scheduler.owned("quiet.main")
+
+    manager.shutdown()
+
+    assert manager.scripts == {} and manager.hooks == {}
+    assert not lua_scheduler.owned("quiet.main")
+    assert manager not in materializer.listeners
@@ -0,0 +1,23 @@
+import pytest
+
+from src.lua.sandbox import LuaSandbox
+
+
+@pytest.mark.parametrize("patch", [
+    "string.upper = function() return 'patched' end",
+    "table.insert = nil",
+    "getmetatable('').__index = {upper = function() return 'patched' end}",
+])
+def test_shared_env_cannot_patch_stdlib(patch):
+    sandbox = LuaSandbox()
+    first, second = sandbox.new_env(), sandbox.new_env()
+    with pytest.raises(Exception):
+        sandbox.run(patch, first)
+    assert sandbox.run("return string.upper('a'), ('b'):upper(), type(table.insert)", second) == ("A", "B", "function")
+
+
+def test_stdlib_proxies_are_readable():
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    code = "local n = 0 for _ in pairs(math) do n = n + 1 end return n > 10, math.floor(2.5), #string.rep('x', 3)"
+    assert sandbox.run(code, env) == (True, 2, 3)
@@ -0,0 +1,102 @@
+from time import perf_counter
+
+import pytest
+
+from src.core.event_bus import EventBus
+from src.core.models.m_settings import ModelLuaBudget, ModelSettings
+from src.lua import events
+from src.lua.sandbox import LuaSandbox
+from src.lua.scheduler import LuaScheduler
+from src.lua.watchdog import LuaWatchdog
+
+LOOP = "local x = 0 for i = 1, 5e7 do x = x + i end return x"
+
+
+@pytest.fixture
+def watchdog():
+    return LuaWatchdog(ModelSettings(lua_budget=ModelLuaBudget(instructions=100_000, time_ms=200)))
+
+
+def run_guarded(watchdog, code: str, name: str = "a"):
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    sandbox.run(code, env)
+    start = perf_counter()
+    result = watchdog.call("pack.script", name, sandbox, env[name])
+    return result, perf_counter() - start
+
+
+def test_debug_is_hidden_from_scripts():
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    assert sandbox.run("return debug", env) is None
+
+
+def test_sethook_cannot_remove_budget(watchdog):
+    result, elapsed = run_guarded(watchdog, f"function a() pcall(function() debug.sethook() end) {LOOP} end")
+    assert result is None
+    assert elapsed < 0.2
+    assert watchdog.usage["pack.script"].overruns == 1
+
+
+@pytest.mark.parametrize("body", [
+    f"return coroutine.wrap(function() {LOOP} end)()",
+    f"return coroutine.resume(coroutine.create(function() {LOOP} end))",
+])
+def test_budget_applies_to_coroutines(watchdog, body):
+    result, elapsed = run_guarded(watchdog, f"function a() {body} end")
+    assert result is None
+    assert elapsed < 0.2
+    assert watchdog.usage["pack.script"].last_overrun == "a: instructions"
+
+
+def test_pcall_cannot_swallow_overrun(watchdog):
+    result, elapsed = run_guarded(watchdog, f"function a() while true do pcall(function() {LOOP} end) end end")
+    assert result is None
+    assert elapsed < 0.2
+
+
+def test_coroutines_within_budget_work(watchdog):
+    code = '''
+        function a()
+            local gen = coroutine.wrap(function() for i = 1, 3 do coroutine.yield(i) end end)
+            local co = coroutine.create(function(x) return x * 2 end)
+            local _, doubled = coroutine.resume(co, 21)
+            return gen() + gen() + gen(), doubled
+        end
+    '''
+    result, _ = run_guarded(watchdog, code)
+    assert result == (6, 42)
+
+
+def test_scheduler_resumes_under_budget(watchdog, monkeypatch):
+    monkeypatch.setattr(LuaWatchdog, "active", watchdog)
+    scheduler = LuaScheduler()
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    scheduler.bind(sandbox, env, "pack.script")
+    sandbox.run(f"ticks = 0 set_interval(function() ticks = ticks + 1 {LOOP} end, 0.1)", env)
+
+    start = perf_counter()
+    scheduler.update(0.1)
+    assert perf_counter() - start < 0.2
+    assert env.ticks == 1
+    assert watchdog.usage["pack.script"].last_overrun == "coroutine: instructions"
+    assert scheduler.active_count == 1
+
+
+def test_event_handlers_run_under_budget(watchdog, monkeypatch):
+    monkeypatch.setattr(LuaWatchdog, "active", watchdog)
+    bus = EventBus()
+    monkeypatch.setattr(events, "event_bus", bus)
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    events.bind_event_bus(sandbox, env, "pack.script")
+    sandbox.run(f"calls = 0 subscribe('ping', function(payload) calls = calls + payload.n {LOOP} end)", env)
+
+    bus.emit("ping", {"n": 1})
+    start = perf_counter()
+    bus.dispatch()
+    assert perf_counter() - start < 0.2
+    assert env.calls == 1
+    assert watchdog.usage["pack.script"].last_overrun == "event: instructions"
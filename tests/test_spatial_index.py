@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from src.core.entity_registry import EntityRegistry
+from src.core.entity_store import EntityStore
+from src.core.spatial_index import SpatialGrid
+from src.lua.entities import bind_entities
+from src.lua.sandbox import LuaSandbox
+
+
+def test_huge_entity_goes_to_oversized_bucket():
+    grid = SpatialGrid(128.0)
+    start = time.perf_counter()
+    grid.insert("huge", 0.0, 0.0, 1e7, 1e7)
+    grid.move("huge", 10.0, 10.0)
+    grid.insert("small", 50.0, 50.0, 10.0, 10.0)
+    assert time.perf_counter() - start < 0.1
+    assert sorted(grid.query_point(55.0, 55.0)) == ["huge", "small"]
+    assert grid.query_rect(5e6, 5e6, 1.0, 1.0) == ["huge"]
+    grid.move("huge", 0.0, 0.0, 10.0, 10.0)
+    assert grid.query_rect(5e6, 5e6, 1.0, 1.0) == []
+    grid.remove("small")
+    assert grid.query_rect(-1e9, -1e9, 2e9, 2e9) == ["huge"]
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("nan")])
+def test_non_finite_bounds_do_not_break_grid(value):
+    grid = SpatialGrid(128.0)
+    grid.insert("a", value, 0.0, 10.0, 10.0)
+    grid.insert("b", 0.0, 0.0, 10.0, 10.0)
+    assert grid.query_point(5.0, 5.0) == ["b"]
+
+
+@pytest.mark.parametrize("backend", ["numpy", "array"])
+def test_sync_spatial_puts_huge_entity_in_oversized_bucket(backend):
+    registry = EntityRegistry(128.0)
+    store = EntityStore(backend, registry)
+    registry.spatial.insert("pack.huge", 0.0, 0.0, 10.0, 10.0)
+    store.spawn("pack.huge", 0.0, 0.0, 1e7, 1e7)
+    start = time.perf_counter()
+    assert registry.in_rect(5e6, 5e6, 1.0, 1.0) == ["pack.huge"]
+    assert time.perf_counter() - start < 0.1
+
+
+@pytest.mark.parametrize("code", [
+    "entities.spawn('pack.a', math.huge, 0, 1, 1)",
+    "entities.spawn('pack.a', 0, 0, 0/0, 1)",
+    "entities.in_radius(0, 0, math.huge)",
+])
+def test_lua_rejects_non_finite_numbers(code):
+    sandbox = LuaSandbox()
+    env = sandbox.new_env()
+    bind_entities(sandbox, env)
+    with pytest.raises(Exception, match="finite"):
+        sandbox.run(code, env)